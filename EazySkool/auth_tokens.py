@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Auth Tokens
+Jetons signés (HMAC avec SECRET_KEY) : jeton d'accès de courte durée et jeton de rafraîchissement,
+vérifiés en mémoire, sans lecture en base ni session partagée entre les processus
+"""
+
+from functools import wraps
+from typing import Dict, Optional
+
+from flask import g, jsonify, request
+from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
+
+from config import SECRET_KEY, ACCESS_TOKEN_TTL, REFRESH_TOKEN_TTL, AUTH_ALLOW_LEGACY_USER_ID
+
+# Sels distincts : un jeton de rafraîchissement n'est pas accepté comme jeton d'accès (et inversement)
+_access_serializer = URLSafeTimedSerializer(SECRET_KEY, salt='eazyskool.access')
+_refresh_serializer = URLSafeTimedSerializer(SECRET_KEY, salt='eazyskool.refresh')
+
+
+class TokenError(Exception):
+    """Jeton absent, invalide ou expiré"""
+
+
+def issue_tokens(user_id: int) -> Dict:
+    """Jetons d'accès et de rafraîchissement d'un utilisateur authentifié"""
+    return {
+        'access_token': _access_serializer.dumps({'uid': user_id}),
+        'refresh_token': _refresh_serializer.dumps({'uid': user_id}),
+        'token_type': 'Bearer',
+        'expires_in': ACCESS_TOKEN_TTL
+    }
+
+
+def _load_user_id(serializer: URLSafeTimedSerializer, token: str, max_age: int) -> int:
+    try:
+        payload = serializer.loads(token, max_age=max_age)
+    except SignatureExpired:
+        raise TokenError("Jeton expiré")
+    except BadSignature:
+        raise TokenError("Jeton invalide")
+    user_id = payload.get('uid') if isinstance(payload, dict) else None
+    if not isinstance(user_id, int):
+        raise TokenError("Jeton invalide")
+    return user_id
+
+
+def verify_access_token(token: str) -> int:
+    """Identifiant de l'utilisateur d'un jeton d'accès (TokenError si invalide ou expiré)"""
+    return _load_user_id(_access_serializer, token, ACCESS_TOKEN_TTL)
+
+
+def verify_refresh_token(token: str) -> int:
+    """Identifiant de l'utilisateur d'un jeton de rafraîchissement (TokenError si invalide ou expiré)"""
+    return _load_user_id(_refresh_serializer, token, REFRESH_TOKEN_TTL)
+
+
+def bearer_token() -> Optional[str]:
+    """Jeton de l'en-tête `Authorization: Bearer <jeton>` de la requête courante"""
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not token.strip():
+        return None
+    return token.strip()
+
+
+def _legacy_user_id(view_args: Dict) -> Optional[int]:
+    """user_id envoyé par les anciens clients (URL, corps JSON ou paramètre de requête)"""
+    user_id = view_args.get('user_id')
+    if user_id is None:
+        user_id = (request.get_json(silent=True) or {}).get('user_id')
+    if user_id is None:
+        user_id = request.args.get('user_id', type=int)
+    return user_id if isinstance(user_id, int) and not isinstance(user_id, bool) else None
+
+
+def _unauthorized(message: str):
+    response = jsonify({
+        'success': False,
+        'error': message
+    })
+    response.headers['WWW-Authenticate'] = 'Bearer'
+    return response, 401
+
+
+def require_auth(view):
+    """
+    Décorateur des routes authentifiées : l'utilisateur du jeton d'accès est placé dans
+    `g.user_id`, sinon réponse 401. Avec AUTH_ALLOW_LEGACY_USER_ID, un client sans jeton
+    peut encore désigner l'utilisateur par `user_id` (ancien fonctionnement, non vérifié).
+    """
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = bearer_token()
+        if token:
+            try:
+                g.user_id = verify_access_token(token)
+            except TokenError as e:
+                return _unauthorized(str(e))
+        else:
+            legacy_user_id = _legacy_user_id(kwargs) if AUTH_ALLOW_LEGACY_USER_ID else None
+            if legacy_user_id is None:
+                return _unauthorized("Authentification requise")
+            g.user_id = legacy_user_id
+        return view(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Autocomplete
+Suggestions de recherche à la frappe : arbre des préfixes en mémoire (sans accents ni majuscules)
+sur les noms d'écoles, de villes et de spécialisations, classées par note moyenne
+"""
+
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from config import MAX_AUTOCOMPLETE_LIMIT, AUTOCOMPLETE_MAX_DEPTH
+from live_index import LiveIndex
+from search import fold_text
+
+# Ligne fournie par les gestionnaires : (type, id, libellé, note) ; type = school, city ou specialization
+EntryRow = Tuple[str, int, str, Optional[float]]
+EntryKey = Tuple[str, int]
+
+
+class Entry(NamedTuple):
+    kind: str
+    id: int
+    label: str
+    score: float
+    # Ordre des suggestions : meilleure note d'abord, puis libellé
+    rank: Tuple
+
+
+def _entry(row: EntryRow) -> Entry:
+    kind, entry_id, label, score = row
+    score = round(float(score or 0), 2)
+    return Entry(kind, entry_id, label, score, (-score, fold_text(label), kind, entry_id))
+
+
+def _suffixes(label: str) -> List[str]:
+    """Le libellé replié depuis chacun de ses mots : « ecole de strasbourg » se trouve aussi par « stras »"""
+    words = fold_text(label).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words)) if words[i]]
+
+
+class _Node:
+    __slots__ = ('children', 'top', 'entries')
+
+    def __init__(self):
+        self.children: Dict[str, '_Node'] = {}
+        # Meilleures entrées du sous-arbre (clés, dans l'ordre des suggestions)
+        self.top: List[EntryKey] = []
+        # Suffixes terminés ici (complets : un nœud à la profondeur maximale les garde tous)
+        self.entries: List[Tuple[str, EntryKey]] = []
+
+
+class PrefixIndex:
+    """
+    Arbre des préfixes dont chaque nœud garde ses `top_k` meilleures entrées : une suggestion
+    coûte la descente des caractères de la recherche, quel que soit le nombre d'entrées.
+    Les mises à jour ne touchent que les chemins des entrées ajoutées ou retirées.
+    Non thread-safe : Autocompleter le protège par un verrou.
+    """
+
+    def __init__(self, top_k: int = MAX_AUTOCOMPLETE_LIMIT, max_depth: int = AUTOCOMPLETE_MAX_DEPTH):
+        self.top_k = top_k
+        self.max_depth = max_depth
+        self.root = _Node()
+        self.entries: Dict[EntryKey, Entry] = {}
+
+    def _rank(self, key: EntryKey) -> Tuple:
+        return self.entries[key].rank
+
+    def _path(self, suffix: str, create: bool = False) -> Optional[List[_Node]]:
+        node = self.root
+        path = [node]
+        for char in suffix[:self.max_depth]:
+            child = node.children.get(char)
+            if child is None:
+                if not create:
+                    return None
+                child = node.children[char] = _Node()
+            node = child
+            path.append(node)
+        return path
+
+    @classmethod
+    def build(cls, entries: Iterable[Entry], **options) -> 'PrefixIndex':
+        """Index complet : chemins insérés d'abord, puis meilleures entrées calculées une fois par nœud"""
+        index = cls(**options)
+        for entry in entries:
+            key = (entry.kind, entry.id)
+            index.entries[key] = entry
+            for suffix in _suffixes(entry.label):
+                index._path(suffix, create=True)[-1].entries.append((suffix, key))
+        # Parcours en profondeur : chaque nœud est calculé après ses enfants
+        stack = [(index.root, False)]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                index._recompute(node)
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+        return index
+
+    def add(self, entry: Entry):
+        key = (entry.kind, entry.id)
+        if key in self.entries:
+            self.remove(key)
+        self.entries[key] = entry
+        for suffix in _suffixes(entry.label):
+            path = self._path(suffix, create=True)
+            path[-1].entries.append((suffix, key))
+            for node in path:
+                if key in node.top:
+                    continue
+                if len(node.top) >= self.top_k and entry.rank >= self._rank(node.top[-1]):
+                    continue
+                node.top.append(key)
+                node.top.sort(key=self._rank)
+                del node.top[self.top_k:]
+
+    def remove(self, key: EntryKey):
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+        paths = []
+        for suffix in _suffixes(entry.label):
+            path = self._path(suffix)
+            if path is not None:
+                path[-1].entries = [item for item in path[-1].entries if item[1] != key]
+                paths.append((suffix, path))
+        # Les nœuds sont recalculés du plus profond au plus haut : un parent relit les tops de ses enfants
+        stale = {}
+        for suffix, path in paths:
+            for depth, node in enumerate(path):
+                if key in node.top:
+                    stale[id(node)] = (depth, node)
+        del self.entries[key]
+        for depth, node in sorted(stale.values(), key=lambda item: -item[0]):
+            self._recompute(node)
+        for suffix, path in paths:
+            self._prune(suffix, path)
+
+    def _recompute(self, node: _Node):
+        candidates = {key for _, key in node.entries}
+        for child in node.children.values():
+            candidates.update(child.top)
+        node.top = sorted(candidates, key=self._rank)[:self.top_k]
+
+    def _prune(self, suffix: str, path: List[_Node]):
+        """Supprime les nœuds devenus vides en remontant le chemin"""
+        chars = suffix[:self.max_depth]
+        for depth in range(len(path) - 1, 0, -1):
+            node = path[depth]
+            if node.children or node.entries:
+                break
+            path[depth - 1].children.pop(chars[depth - 1], None)
+
+    def search(self, query: str, limit: int) -> List[Entry]:
+        """Meilleures entrées dont un mot commence par la recherche (repliée)"""
+        folded = fold_text(query)
+        if not folded:
+            return []
+        path = self._path(folded)
+        if path is None:
+            return []
+        node = path[-1]
+        if len(folded) <= self.max_depth:
+            return [self.entries[key] for key in node.top[:limit]]
+        # Recherche plus longue que l'arbre : filtre des suffixes du nœud le plus profond
+        keys = {key for suffix, key in node.entries if suffix.startswith(folded)}
+        return sorted((self.entries[key] for key in keys), key=lambda entry: entry.rank)[:limit]
+
+
+class Autocompleter(LiveIndex):
+    """Suggestions tenues à jour depuis les entrées de la base (get_autocomplete_entries)"""
+
+    def row_key(self, row: EntryRow) -> EntryKey:
+        return row[0], row[1]
+
+    def build(self, rows: Iterable[EntryRow]) -> PrefixIndex:
+        return PrefixIndex.build(map(_entry, rows))
+
+    def apply(self, index: PrefixIndex, removed: List[EntryKey], changed: List[EntryRow]):
+        for key in removed:
+            index.remove(key)
+        for row in changed:
+            index.add(_entry(row))
+
+    def suggest(self, query: str, limit: int) -> List[Dict]:
+        entries = self.read(lambda index: index.search(query, limit), [])
+        return [{'type': entry.kind, 'id': entry.id, 'label': entry.label, 'average_rating': entry.score}
+                for entry in entries]
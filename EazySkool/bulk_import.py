@@ -0,0 +1,586 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Bulk Import
+Import MySQL en flux : fichiers SQL, CSV et JSON lus au fil de l'eau, lignes insérées par
+executemany en lots, validées par tranches, avec reprise au dernier point validé
+"""
+
+import csv
+import json
+import os
+import re
+import time
+from decimal import Decimal
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from mysql.connector import Error, errorcode
+
+from config import BULK_IMPORT_BATCH_SIZE, BULK_IMPORT_CHUNK_SIZE, BULK_IMPORT_INDEX_MIN_ROWS
+
+# Opérations produites par les lecteurs :
+#   ('sql', instruction)                -> exécutée telle quelle (CREATE TABLE, CREATE VIEW, ...)
+#   ('rows', table, colonnes, lignes)   -> lignes insérées en lots ; colonnes None = lignes en dictionnaires,
+#                                          () = toutes les colonnes de la table
+Operation = Tuple
+
+# Erreurs d'une instruction déjà appliquée lors d'un import précédent (table, index existants)
+_ALREADY_APPLIED_ERRORS = (
+    errorcode.ER_TABLE_EXISTS_ERROR,
+    errorcode.ER_DUP_KEYNAME
+)
+
+# Découpage d'un script SQL : chaque motif consomme le texte depuis la position courante
+_SQL_SCAN = re.compile(r"""
+    (?P<text>[^'"`;\-\#/]+|-(?!-)|/(?!\*))
+  | (?P<quoted>'(?:[^'\\]|\\.|'')*'|"(?:[^"\\]|\\.|"")*"|`[^`]*`)
+  | (?P<comment>--[^\n]*\n|\#[^\n]*\n|/\*.*?\*/)
+  | (?P<end>;)
+""", re.X | re.S)
+
+_INSERT = re.compile(r"""\s*INSERT\s+INTO\s+`?(?P<table>\w+)`?\s*(?:\((?P<columns>[^)]*)\)\s*)?VALUES\s*""",
+                     re.I | re.S)
+
+_VALUE_TOKEN = re.compile(r"""\s*(?:
+    '(?P<string>(?:[^'\\]|\\.|'')*)'
+  | (?P<number>[-+]?\d+(?:\.\d*)?(?:[eE][-+]?\d+)?)
+  | (?P<word>[A-Za-z_]\w*)
+  | (?P<punct>[(),])
+)""", re.X | re.S)
+
+_STRING_ESCAPES = {'0': '\0', 'b': '\b', 'n': '\n', 'r': '\r', 't': '\t', 'Z': '\x1a'}
+_WORDS = {'NULL': None, 'TRUE': 1, 'FALSE': 0}
+
+
+class SQLValuesError(ValueError):
+    """Liste VALUES non reconnue (fonction, sous-requête...) : l'instruction est exécutée telle quelle"""
+
+
+def _unescape(literal: str) -> str:
+    if "'" not in literal and '\\' not in literal:
+        return literal
+    return re.sub(r"''|\\(.)", lambda m: "'" if m.group(1) is None else _STRING_ESCAPES.get(m.group(1), m.group(1)),
+                  literal, flags=re.S)
+
+
+def sql_statements(path: str) -> Iterator[str]:
+    """Instructions d'un script SQL (sans les commentaires), lues ligne à ligne"""
+    parts: List[str] = []
+    buffer = ''
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            buffer += line
+            pos = 0
+            while pos < len(buffer):
+                match = _SQL_SCAN.match(buffer, pos)
+                if match is None:
+                    # Chaîne ou commentaire pas encore terminé : ligne suivante
+                    break
+                pos = match.end()
+                if match.lastgroup == 'end':
+                    statement = ''.join(parts).strip()
+                    parts = []
+                    if statement:
+                        yield statement
+                elif match.lastgroup != 'comment':
+                    parts.append(match.group())
+                else:
+                    parts.append(' ')
+            buffer = buffer[pos:]
+    statement = (''.join(parts) + buffer).strip()
+    if statement and not statement.startswith(('--', '#')):
+        yield statement
+
+
+def parse_insert_values(values: str) -> Iterator[Tuple]:
+    """Lignes d'une liste `(1, 'a', NULL), (2, 'b', TRUE)` (SQLValuesError si non reconnue)"""
+    pos = 0
+    row: Optional[List[Any]] = None
+    expect_value = False
+    while pos < len(values):
+        match = _VALUE_TOKEN.match(values, pos)
+        if match is None:
+            if values[pos:].strip():
+                raise SQLValuesError(values[pos:pos + 40])
+            break
+        pos = match.end()
+        kind = match.lastgroup
+        token = match.group(kind)
+        if kind == 'punct':
+            if token == '(' and row is None:
+                row, expect_value = [], True
+            elif token == ',' and row is not None and not expect_value:
+                expect_value = True
+            elif token == ')' and row is not None and not expect_value:
+                yield tuple(row)
+                row = None
+            elif token == ',' and row is None:
+                continue
+            else:
+                raise SQLValuesError(values[match.start():match.start() + 40])
+            continue
+        if row is None or not expect_value:
+            raise SQLValuesError(values[match.start():match.start() + 40])
+        if kind == 'string':
+            row.append(_unescape(token))
+        elif kind == 'number':
+            row.append(int(token) if re.fullmatch(r'[-+]?\d+', token) else Decimal(token))
+        elif token.upper() in _WORDS:
+            row.append(_WORDS[token.upper()])
+        else:
+            raise SQLValuesError(token)
+        expect_value = False
+    if row is not None:
+        raise SQLValuesError("Ligne non terminée")
+
+
+def read_sql(path: str) -> Iterator[Operation]:
+    """Script SQL : INSERT ... VALUES en lignes, le reste (DDL, vues, index) tel quel"""
+    for statement in sql_statements(path):
+        match = _INSERT.match(statement)
+        if match is None:
+            yield ('sql', statement)
+            continue
+        try:
+            # Lignes décodées avant d'insérer : une liste non reconnue part en une seule instruction
+            rows = list(parse_insert_values(statement[match.end():]))
+        except SQLValuesError:
+            yield ('sql', statement)
+            continue
+        columns = ()
+        if match.group('columns'):
+            columns = [column.strip().strip('`') for column in match.group('columns').split(',')]
+        yield ('rows', match.group('table'), columns, iter(rows))
+
+
+def read_csv(path: str, table: str) -> Iterator[Operation]:
+    """CSV avec ligne d'en-tête (noms des colonnes) ; `\\N` = NULL"""
+    def rows():
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for row in reader:
+                yield tuple(None if value == '\\N' else value for value in row)
+
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        columns = next(csv.reader(f), [])
+    yield ('rows', table, [column.strip() for column in columns], rows())
+
+
+def _json_values(f, chunk_size: int = 1 << 16) -> Iterator[Tuple[Optional[str], Any]]:
+    """
+    Éléments d'un tableau JSON `[...]` ou d'un objet de tableaux `{"table": [...], ...}`,
+    décodés un par un : (nom du tableau ou None, élément)
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        chunk = f.read(chunk_size)
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        eof = not chunk
+        return bool(chunk)
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return
+
+    def expect(chars: str) -> str:
+        nonlocal pos
+        skip_ws()
+        if pos >= len(buffer) or buffer[pos] not in chars:
+            raise ValueError(f"JSON invalide : '{chars}' attendu")
+        pos += 1
+        return buffer[pos - 1]
+
+    def decode() -> Any:
+        nonlocal pos
+        skip_ws()
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # Un nombre en fin de tampon peut être tronqué (« 3. » lu comme 3) : la valeur n'est
+                # complète que suivie d'un séparateur
+                if (end < len(buffer) and buffer[end] not in '.eE+-0123456789') or eof:
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill()
+
+    def array(name: Optional[str]):
+        nonlocal pos
+        expect('[')
+        skip_ws()
+        if buffer[pos:pos + 1] == ']':
+            pos += 1
+            return
+        while True:
+            yield name, decode()
+            if expect(',]') == ']':
+                return
+
+    skip_ws()
+    if buffer[pos:pos + 1] == '[':
+        yield from array(None)
+        return
+    expect('{')
+    skip_ws()
+    if buffer[pos:pos + 1] == '}':
+        return
+    while True:
+        name = decode()
+        expect(':')
+        yield from array(name)
+        if expect(',}') == '}':
+            return
+
+
+def read_json(path: str, table: Optional[str] = None) -> Iterator[Operation]:
+    """
+    JSON : `{"table": [{...}, ...], ...}` (une opération par tableau), tableau `[{...}, ...]`
+    ou NDJSON (.ndjson / .jsonl, un objet par ligne) pour la table `table`
+    """
+    if path.endswith(('.ndjson', '.jsonl')):
+        def lines():
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        yield ('rows', table, None, lines())
+        return
+
+    with open(path, 'r', encoding='utf-8') as f:
+        values = _json_values(f)
+        following = next(values, None)
+        while following is not None:
+            name, first = following
+            following = None
+
+            def rows(name=name, first=first):
+                nonlocal following
+                yield first
+                for item in values:
+                    if item[0] != name:
+                        # Premier élément du tableau suivant
+                        following = item
+                        return
+                    yield item[1]
+
+            table_rows = rows()
+            yield ('rows', name or table, None, table_rows)
+            # Lignes non consommées (opération sautée à la reprise) : lues jusqu'au tableau suivant
+            for _ in table_rows:
+                pass
+
+
+class BulkImporter:
+    """
+    Chargement MySQL en flux : lignes insérées par executemany (`batch_size` lignes par appel),
+    validées toutes les `chunk_size` lignes, point de reprise écrit après chaque validation.
+
+    Au-delà de `index_min_rows` lignes pour une table, ses index secondaires non uniques sont
+    supprimés puis reconstruits en une passe à la fin du chargement de cette table.
+    """
+
+    def __init__(self, connection, batch_size: int = BULK_IMPORT_BATCH_SIZE,
+                 chunk_size: int = BULK_IMPORT_CHUNK_SIZE, index_min_rows: Optional[int] = BULK_IMPORT_INDEX_MIN_ROWS,
+                 checkpoint_path: Optional[str] = None):
+        self.connection = connection
+        self.batch_size = batch_size
+        self.chunk_size = max(chunk_size, batch_size)
+        self.index_min_rows = index_min_rows
+        self.checkpoint_path = checkpoint_path
+        self._columns: Dict[str, List[str]] = {}
+        # Index supprimés pendant le chargement : table -> [(nom, définition)], gardés dans le point de reprise
+        self._dropped_indexes: Dict[str, List[Tuple[str, str]]] = {}
+        self._position = (0, 0)
+        self._started_at = 0.0
+        self._table_rows = 0
+        self._reported_rows = 0
+        self.rows_loaded = 0
+
+    # ------------------------------------------------------------------ point de reprise
+
+    def _load_checkpoint(self, source: str) -> Tuple[int, int]:
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0, 0
+        with open(self.checkpoint_path, 'r', encoding='utf-8') as f:
+            checkpoint = json.load(f)
+        if checkpoint.get('source') != source:
+            raise ValueError(f"Point de reprise d'un autre import ({checkpoint.get('source')}) : {self.checkpoint_path}")
+        self._dropped_indexes = {table: [tuple(index) for index in indexes]
+                                 for table, indexes in checkpoint.get('dropped_indexes', {}).items()}
+        return checkpoint['operation'], checkpoint['row']
+
+    def _save_checkpoint(self, source: str):
+        if not self.checkpoint_path:
+            return
+        checkpoint = {
+            'source': source,
+            'operation': self._position[0],
+            'row': self._position[1],
+            'dropped_indexes': self._dropped_indexes
+        }
+        temporary = self.checkpoint_path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump(checkpoint, f)
+        # Remplacement atomique : le fichier décrit toujours un état validé
+        os.replace(temporary, self.checkpoint_path)
+
+    def _commit(self, source: str):
+        self.connection.commit()
+        self._save_checkpoint(source)
+
+    # ------------------------------------------------------------------ index secondaires
+
+    def _table_columns(self, table: str) -> List[str]:
+        if table not in self._columns:
+            cursor = self.connection.cursor()
+            try:
+                cursor.execute("""
+                    SELECT COLUMN_NAME FROM information_schema.COLUMNS
+                    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                    ORDER BY ORDINAL_POSITION
+                """, (table,))
+                self._columns[table] = [row[0] for row in cursor.fetchall()]
+            finally:
+                cursor.close()
+        return self._columns[table]
+
+    def _secondary_indexes(self, table: str) -> List[Tuple[str, str]]:
+        """Index non uniques d'une table et leur définition pour ALTER TABLE ... ADD"""
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute("""
+                SELECT INDEX_NAME, INDEX_TYPE, COLUMN_NAME, SUB_PART
+                FROM information_schema.STATISTICS
+                WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s
+                  AND INDEX_NAME <> 'PRIMARY' AND NON_UNIQUE = 1
+                ORDER BY INDEX_NAME, SEQ_IN_INDEX
+            """, (table,))
+            rows = cursor.fetchall()
+        finally:
+            cursor.close()
+
+        columns: Dict[str, List[str]] = {}
+        kinds: Dict[str, str] = {}
+        for name, index_type, column, sub_part in rows:
+            columns.setdefault(name, []).append(f"`{column}`" + (f"({sub_part})" if sub_part else ''))
+            kinds[name] = 'FULLTEXT INDEX' if index_type == 'FULLTEXT' else 'INDEX'
+        return [(name, f"{kinds[name]} `{name}` ({', '.join(parts)})") for name, parts in columns.items()]
+
+    def _drop_indexes(self, table: str, source: str):
+        if table in self._dropped_indexes:
+            return
+        indexes = self._secondary_indexes(table)
+        self._dropped_indexes[table] = []
+        cursor = self.connection.cursor()
+        try:
+            for name, definition in indexes:
+                # Consigné avant la suppression : une reprise saura le reconstruire
+                self._dropped_indexes[table].append((name, definition))
+                self._save_checkpoint(source)
+                try:
+                    cursor.execute(f"ALTER TABLE `{table}` DROP INDEX `{name}`")
+                except Error as e:
+                    if e.errno != errorcode.ER_DROP_INDEX_FK:
+                        raise
+                    # Index nécessaire à une clé étrangère : conservé
+                    self._dropped_indexes[table].pop()
+                    self._save_checkpoint(source)
+        finally:
+            cursor.close()
+        if indexes:
+            print(f"🔧 {table}: {len(self._dropped_indexes[table])} index secondaire(s) suspendu(s)")
+
+    def _rebuild_indexes(self, source: str, tables: Optional[Iterable[str]] = None):
+        """Reconstruit les index supprimés (une seule passe par table)"""
+        for table in list(tables if tables is not None else self._dropped_indexes):
+            # Après une interruption, un index consigné peut ne pas avoir été supprimé
+            existing = {name for name, _ in self._secondary_indexes(table)} if table in self._dropped_indexes else set()
+            indexes = [index for index in self._dropped_indexes.get(table, []) if index[0] not in existing]
+            if indexes:
+                started_at = time.time()
+                cursor = self.connection.cursor()
+                try:
+                    cursor.execute(f"ALTER TABLE `{table}` " + ', '.join(f"ADD {definition}" for _, definition in indexes))
+                finally:
+                    cursor.close()
+                print(f"🔧 {table}: {len(indexes)} index reconstruit(s) en {time.time() - started_at:.1f}s")
+            self._dropped_indexes.pop(table, None)
+            self._save_checkpoint(source)
+
+    # ------------------------------------------------------------------ chargement
+
+    def _progress(self, table: str):
+        self._reported_rows = self._table_rows
+        elapsed = max(time.time() - self._started_at, 1e-6)
+        print(f"📥 {table}: {self._table_rows} lignes - total {self.rows_loaded} "
+              f"({self.rows_loaded / elapsed:.0f} lignes/s)")
+
+    def _execute_sql(self, statement: str):
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(statement)
+        except Error as e:
+            if e.errno not in _ALREADY_APPLIED_ERRORS:
+                raise
+        finally:
+            cursor.close()
+
+    def _load_rows(self, index: int, table: str, columns: Optional[Sequence[str]], rows: Iterator,
+                   skip: int, source: str, pending: int) -> int:
+        """Insère les lignes d'une opération ; renvoie le nombre de lignes non encore validées"""
+        if not table:
+            raise ValueError("Table cible inconnue (préciser la table pour ce fichier)")
+        if columns is None:
+            # Lignes en dictionnaires : colonnes de chaque ligne (clé absente = valeur par défaut)
+            rows = self._dict_rows(table, rows)
+        else:
+            columns = tuple(columns or self._table_columns(table))
+            if not columns:
+                raise ValueError(f"Aucune colonne de la table {table} dans les données")
+            rows = ((columns, row) for row in rows)
+
+        rows = islice(rows, skip, None)
+        position = skip
+        cursor = self.connection.cursor()
+        try:
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                if (self.index_min_rows is not None and self._table_rows + len(batch) >= self.index_min_rows
+                        and table not in self._dropped_indexes):
+                    # Gros chargement : index mis à jour une fois à la fin plutôt qu'à chaque ligne
+                    self._position = (index, position)
+                    self._commit(source)
+                    pending = 0
+                    self._drop_indexes(table, source)
+                # Lignes consécutives aux mêmes colonnes : un executemany par série
+                start = 0
+                while start < len(batch):
+                    run_columns = batch[start][0]
+                    end = start + 1
+                    while end < len(batch) and batch[end][0] == run_columns:
+                        end += 1
+                    cursor.executemany(_insert_query(table, run_columns), [row for _, row in batch[start:end]])
+                    start = end
+                position += len(batch)
+                pending += len(batch)
+                self._table_rows += len(batch)
+                self.rows_loaded += len(batch)
+                if pending >= self.chunk_size:
+                    self._position = (index, position)
+                    self._commit(source)
+                    pending = 0
+                    self._progress(table)
+        finally:
+            cursor.close()
+        return pending
+
+    def _dict_rows(self, table: str, rows: Iterator[Dict]) -> Iterator[Tuple[Tuple[str, ...], Tuple]]:
+        """
+        (colonnes, valeurs) de lignes en dictionnaires : colonnes de la table présentes dans
+        chaque ligne, dans l'ordre de la table. Les clés hors de la table (champs joints d'un
+        export, ex. city_name) sont ignorées et signalées une fois.
+        """
+        table_columns = self._table_columns(table)
+        known = set(table_columns)
+        ignored = set()
+        for row in rows:
+            columns = tuple(column for column in table_columns if column in row)
+            if not columns:
+                raise ValueError(f"Aucune colonne de la table {table} dans la ligne {row!r:.80}")
+            extra = row.keys() - known - ignored
+            if extra:
+                ignored |= extra
+                print(f"⚠️ {table}: champs ignorés (hors de la table) : {', '.join(sorted(extra))}")
+            yield columns, tuple(row[column] for column in columns)
+
+    def _end_table(self, table: Optional[str], source: str):
+        """Fin du chargement d'une table : validation, bilan, reconstruction de ses index"""
+        self._commit(source)
+        if table is not None:
+            if self._table_rows != self._reported_rows:
+                self._progress(table)
+            self._rebuild_indexes(source, [table])
+        self._table_rows = self._reported_rows = 0
+
+    def run(self, operations: Iterable[Operation], source: str) -> int:
+        """Exécute les opérations d'une source ; reprend au point de reprise s'il existe"""
+        start_operation, start_row = self._load_checkpoint(source)
+        if start_operation or start_row:
+            print(f"↩️ Reprise à l'opération {start_operation + 1}, ligne {start_row}")
+        self._started_at = time.time()
+        self.rows_loaded = 0
+
+        cursor = self.connection.cursor()
+        # Contrôles d'unicité et de clés étrangères suspendus pendant le chargement (comme mysqldump)
+        cursor.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+        cursor.close()
+        pending = 0
+        current_table = None
+        try:
+            for index, operation in enumerate(operations):
+                if index < start_operation:
+                    continue
+                skip = start_row if index == start_operation else 0
+                if operation[0] == 'rows':
+                    _, table, columns, rows = operation
+                    if table != current_table:
+                        self._position = (index, skip)
+                        self._end_table(current_table, source)
+                        pending = 0
+                        current_table = table
+                    pending = self._load_rows(index, table, columns, rows, skip, source, pending)
+                else:
+                    # Le DDL valide implicitement : les lignes en attente sont validées avant
+                    self._position = (index, 0)
+                    self._end_table(current_table, source)
+                    pending = 0
+                    current_table = None
+                    self._rebuild_indexes(source)
+                    self._execute_sql(operation[1])
+                    self.connection.commit()
+                self._position = (index + 1, 0)
+            self._end_table(current_table, source)
+            self._rebuild_indexes(source)
+        finally:
+            cursor = self.connection.cursor()
+            cursor.execute("SET SESSION unique_checks = 1, foreign_key_checks = 1")
+            cursor.close()
+
+        # Import terminé : plus rien à reprendre
+        if self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            os.remove(self.checkpoint_path)
+        elapsed = max(time.time() - self._started_at, 1e-6)
+        print(f"✅ {self.rows_loaded} lignes importées en {elapsed:.1f}s ({self.rows_loaded / elapsed:.0f} lignes/s)")
+        return self.rows_loaded
+
+
+def _insert_query(table: str, columns: Sequence[str]) -> str:
+    return (f"INSERT INTO `{table}` ({', '.join(f'`{column}`' for column in columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))})")
+
+
+def read_source(path: str, table: Optional[str] = None) -> Iterator[Operation]:
+    """Lecteur adapté à l'extension du fichier (.sql, .csv, .json, .ndjson / .jsonl)"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.sql':
+        return read_sql(path)
+    if extension == '.csv':
+        return read_csv(path, table or os.path.splitext(os.path.basename(path))[0])
+    if extension in ('.json', '.ndjson', '.jsonl'):
+        return read_json(path, table)
+    raise ValueError(f"Format non pris en charge: {path}")
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Cache
+Cache mémoire (TTL + éviction LRU) pour les données du catalogue
+"""
+
+import hmac
+import json
+import threading
+import time
+import urllib.request
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from config import CACHE_INVALIDATION_SECRET
+
+# Clés du catalogue partagées par les deux gestionnaires de base de données
+CACHE_KEY_SCHOOLS = 'schools:all'
+CACHE_KEY_CITIES = 'cities'
+CACHE_KEY_SCHOOL_TYPES = 'school_types'
+CACHE_KEY_EVENTS = 'events'
+CACHE_KEY_MAP_GRID = 'map:grid'
+CACHE_KEY_FACETS = 'facets'
+CATALOG_CACHE_KEYS = (CACHE_KEY_SCHOOLS, CACHE_KEY_CITIES, CACHE_KEY_SCHOOL_TYPES, CACHE_KEY_EVENTS, CACHE_KEY_MAP_GRID,
+                      CACHE_KEY_FACETS)
+
+CACHE_INVALIDATION_HEADER = 'X-Cache-Invalidation-Secret'
+
+_MISSING = object()
+
+
+class _Load:
+    """Chargement en cours d'une clé, attendu par les autres appelants"""
+
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache:
+    """
+    Cache thread-safe : chaque entrée expire après `ttl` secondes et, au-delà de
+    `max_entries`, l'entrée la moins récemment utilisée est évincée.
+
+    Les valeurs sont partagées entre les appelants : elles ne doivent pas être modifiées.
+
+    get_or_load() charge une clé absente une seule fois (les appelants simultanés attendent
+    ce chargement) ; une invalidation pendant le chargement empêche d'en garder le résultat.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()  # clé -> (expiration, valeur)
+        self._lock = threading.Lock()
+        # Chargements en cours et génération de chaque clé (incrémentée par invalidate)
+        self._loading: Dict[str, _Load] = {}
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Retourne la valeur en cache, ou `default` si absente ou expirée"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Ajoute ou remplace une entrée"""
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def _store(self, key: str, value: Any, ttl: Optional[float] = None):
+        """Ajoute ou remplace une entrée (verrou tenu par l'appelant)"""
+        self._entries[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _generation(self, key: str) -> Tuple[int, int]:
+        return self._epoch, self._generations.get(key, 0)
+
+    def get_or_load(self, key: str, loader: Callable[[], Any]) -> Any:
+        """Retourne la valeur en cache ou la calcule ; un résultat None (erreur) n'est pas mis en cache"""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            load = self._loading.get(key)
+            loading = load is None
+            if loading:
+                load = self._loading[key] = _Load()
+                generation = self._generation(key)
+        if not loading:
+            # Un autre appelant lit déjà la base pour cette clé : on attend son résultat
+            load.done.wait()
+            if load.error is not None:
+                raise load.error
+            return load.value
+
+        try:
+            load.value = loader()
+        except BaseException as e:
+            load.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._loading.get(key) is load:
+                    del self._loading[key]
+                # Invalidée pendant le chargement : la valeur lue peut précéder l'écriture, non gardée
+                if load.error is None and load.value is not None and generation == self._generation(key):
+                    self._store(key, load.value)
+            load.done.set()
+        return load.value
+
+    def invalidate(self, *keys: str):
+        """Supprime les entrées indiquées ; les chargements en cours de ces clés ne seront pas gardés"""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+                self._generations[key] = self._generations.get(key, 0) + 1
+                # Les appelants suivants relisent la base plutôt que d'attendre un chargement périmé
+                self._loading.pop(key, None)
+
+    def clear(self):
+        """Vide le cache"""
+        with self._lock:
+            self._entries.clear()
+            self._epoch += 1
+            self._loading.clear()
+
+    def stats(self) -> Dict:
+        """Retourne les statistiques du cache"""
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'hits': self.hits,
+                'misses': self.misses
+            }
+
+
+def check_invalidation_secret(secret: Optional[str]) -> bool:
+    """Vrai si le secret reçu est CACHE_INVALIDATION_SECRET (comparaison à temps constant)"""
+    return secret is not None and hmac.compare_digest(secret.encode('utf-8'), CACHE_INVALIDATION_SECRET.encode('utf-8'))
+
+
+def parse_invalidation_keys(data: Any) -> List[str]:
+    """
+    Clés à invalider du corps JSON {"keys": [...]} : liste de clés du catalogue, toutes si absente.
+    Lève ValueError pour une valeur qui n'est pas une liste ou une clé inconnue.
+    """
+    keys = data.get('keys') if isinstance(data, dict) else None
+    if keys is None:
+        return []
+    if not isinstance(keys, list):
+        raise ValueError("keys doit être une liste de clés du cache")
+    unknown = [key for key in keys if key not in CATALOG_CACHE_KEYS]
+    if unknown:
+        raise ValueError(f"Clés de cache inconnues: {unknown} (valides : {', '.join(CATALOG_CACHE_KEYS)})")
+    return keys
+
+
+def notify_cache_invalidation(url: str, keys: Iterable[str] = CATALOG_CACHE_KEYS, timeout: float = 2.0) -> bool:
+    """
+    Demande au serveur API en cours d'exécution d'invalider des clés de son cache.
+    Utilisé par les scripts d'import, qui tournent dans un autre processus.
+    Sans serveur démarré, rien à invalider : l'échec est silencieux.
+    """
+    payload = json.dumps({'keys': list(keys)}).encode('utf-8')
+    req = urllib.request.Request(url, data=payload, method='POST',
+                                 headers={'Content-Type': 'application/json',
+                                          CACHE_INVALIDATION_HEADER: CACHE_INVALIDATION_SECRET})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            return response.status == 200
+    except OSError:
+        return False
@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Compression
+Compression gzip / Brotli des réponses négociée avec Accept-Encoding
+"""
+
+import gzip
+from typing import Optional
+
+from flask import Flask, Response, request
+
+from config import (COMPRESSION_MIN_SIZE, COMPRESSION_GZIP_LEVEL, COMPRESSION_BROTLI_QUALITY,
+                    COMPRESSION_MIMETYPES)
+
+try:
+    import brotli
+except ImportError:  # Brotli est optionnel : sans lui, seul gzip est proposé
+    brotli = None
+
+# Encodages proposés, par ordre de préférence à qualité égale côté client
+SUPPORTED_ENCODINGS = ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding() -> Optional[str]:
+    """Meilleur encodage accepté par le client pour la requête courante (None = aucun)"""
+    return request.accept_encodings.best_match(SUPPORTED_ENCODINGS)
+
+
+def compress(body: bytes, encoding: str, best: bool = False) -> bytes:
+    """
+    Compresse `body` ; `best` choisit le niveau maximal (réponses figées, compressées une fois)
+    plutôt qu'un niveau rapide adapté aux réponses calculées à chaque requête.
+    """
+    if encoding == 'br':
+        return brotli.compress(body, quality=11 if best else COMPRESSION_BROTLI_QUALITY)
+    if encoding == 'gzip':
+        # mtime=0 : même contenu -> mêmes octets
+        return gzip.compress(body, compresslevel=9 if best else COMPRESSION_GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Encodage non supporté: {encoding}")
+
+
+def is_compressible(response: Response) -> bool:
+    """Réponse complète, réussie, textuelle et pas déjà encodée"""
+    return (
+        200 <= response.status_code < 300
+        and response.status_code != 204
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and 'Content-Encoding' not in response.headers
+        and response.mimetype in COMPRESSION_MIMETYPES
+    )
+
+
+def compress_response(response: Response) -> Response:
+    """after_request : compresse le corps si le client l'accepte et s'il est assez gros"""
+    if not is_compressible(response):
+        return response
+
+    # La représentation dépend d'Accept-Encoding, même lorsqu'elle n'est pas compressée
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return response
+    encoding = negotiate_encoding()
+    if encoding is None:
+        return response
+
+    response.set_data(compress(body, encoding))
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        # Un ETag fort identifie des octets précis : chaque encodage a le sien
+        response.set_etag(f"{etag}-{encoding}", weak)
+    return response
+
+
+def init_compression(app: Flask):
+    """Active la compression des réponses d'une application Flask"""
+    app.after_request(compress_response)
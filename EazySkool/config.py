@@ -19,11 +19,54 @@ PROJECT_ROOT = Path(__file__).parent
 DATABASE_PATH = PROJECT_ROOT / "eazyskool.db"
 DATABASE_SQL_PATH = PROJECT_ROOT / "database.sql"
 
+# Connexions SQLite persistantes (une connexion par thread)
+SQLITE_BUSY_TIMEOUT = 5.0  # secondes d'attente si la base est verrouillée
+SQLITE_CACHE_SIZE_KB = 16 * 1024  # cache de pages par connexion
+SQLITE_MMAP_SIZE = 64 * 1024 * 1024  # lecture via mmap (octets)
+
+# Pool de connexions MySQL (mysql_pool.py)
+MYSQL_POOL_MIN_SIZE = 2
+MYSQL_POOL_MAX_SIZE = 10
+MYSQL_POOL_TIMEOUT = 5.0  # secondes d'attente maximale pour obtenir une connexion
+MYSQL_POOL_MAX_USES = 1000  # recyclage après N emprunts
+MYSQL_POOL_MAX_LIFETIME = 1800.0  # recyclage après T secondes
+MYSQL_POOL_PING_AFTER_IDLE = 1.0  # ping avant prêt si inactive depuis plus de N secondes
+
+# Audit des plans d'exécution au démarrage des serveurs API (query_audit.py) : exécute toutes les
+# sondes, chargements complets compris ; à activer en développement ou en CI (QUERY_AUDIT_ON_STARTUP=true)
+QUERY_AUDIT_ON_STARTUP = os.environ.get('QUERY_AUDIT_ON_STARTUP', 'False').lower() == 'true'
+
+# Cache mémoire du catalogue (cache.py)
+CACHE_TTL = 300.0  # secondes ; borne la fraîcheur si une écriture vient d'un autre processus
+CACHE_MAX_ENTRIES = 256
+
 # Serveur API
 API_HOST = "0.0.0.0"
 API_PORT = 5000
 API_DEBUG = True
 
+# Compression des réponses (compression.py) ; Brotli si le module `brotli` est installé
+COMPRESSION_MIN_SIZE = 1024  # octets : en dessous, l'en-tête coûte plus qu'il ne rapporte
+COMPRESSION_GZIP_LEVEL = 6
+COMPRESSION_BROTLI_QUALITY = 5
+COMPRESSION_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+# Endpoint appelé par les scripts d'import pour invalider le cache du serveur
+CACHE_INVALIDATION_URL = f"http://127.0.0.1:{API_PORT}/api/cache/invalidate"
+# Secret partagé envoyé par les scripts d'import (en-tête X-Cache-Invalidation-Secret) :
+# derrière un proxy, l'adresse du client ne suffit pas à reconnaître la machine locale
+CACHE_INVALIDATION_SECRET = os.environ.get('CACHE_INVALIDATION_SECRET', 'eazyskool-dev-cache-secret-change-in-production')
+
+# Import en flux (bulk_import.py) : lignes par executemany, lignes par transaction,
+# et taille de chargement à partir de laquelle les index secondaires sont reconstruits à la fin
+BULK_IMPORT_BATCH_SIZE = 1000
+BULK_IMPORT_CHUNK_SIZE = 50000
+BULK_IMPORT_INDEX_MIN_ROWS = 100000
+
+# Export en flux (export_stream.py) : lignes lues par fetchmany, octets regroupés par écriture
+EXPORT_FETCH_SIZE = 1000
+EXPORT_BUFFER_SIZE = 64 * 1024
+
 # Configuration CORS
 CORS_ORIGINS = [
     "http://localhost:3000",
@@ -43,14 +86,66 @@ SECRET_KEY = os.environ.get('SECRET_KEY', 'eazyskool-dev-secret-key-change-in-pr
 # Configuration bcrypt
 BCRYPT_ROUNDS = 12
 
+# Pool de processus dédié aux calculs bcrypt (password_hashing.py) : nombre de processus
+# (0 = calcul dans le thread de la requête), calculs en cours ou en attente au plus, délai (s)
+PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', min(4, os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = 32
+PASSWORD_HASH_TIMEOUT = 5.0
+
+# Jetons signés (auth_tokens.py) : durée de vie en secondes du jeton d'accès et du jeton de rafraîchissement
+ACCESS_TOKEN_TTL = 15 * 60
+REFRESH_TOKEN_TTL = 30 * 24 * 3600
+# Accepte encore `user_id` dans la requête des clients sans jeton (transition, non vérifié)
+AUTH_ALLOW_LEGACY_USER_ID = os.environ.get('AUTH_ALLOW_LEGACY_USER_ID', 'False').lower() == 'true'
+
+# Limitation des tentatives (rate_limit.py) : (nombre de tentatives, période en secondes)
+LOGIN_LIMIT_PER_IP = (20, 60)
+LOGIN_LIMIT_PER_EMAIL = (5, 300)
+REGISTER_LIMIT_PER_IP = (10, 3600)
+# Connexions / inscriptions traitées simultanément par processus : au-delà, 429 immédiat
+AUTH_MAX_CONCURRENT = int(os.environ.get('AUTH_MAX_CONCURRENT', 2 * PASSWORD_HASH_WORKERS or 4))
+# Compteurs partagés entre serveurs (Redis, optionnel) ; sinon en mémoire de chaque processus
+RATE_LIMIT_REDIS_URL = os.environ.get('RATE_LIMIT_REDIS_URL')
+
 # =================================================================================
 # CONFIGURATION DES DONNÉES
 # =================================================================================
 
 # Limites par défaut
 DEFAULT_SCHOOLS_PER_PAGE = 6
+MAX_SCHOOLS_PER_PAGE = 100
+# Nombre maximal d'écoles demandées par identifiant en une requête (ids=1,4,9 / POST batch)
+MAX_SCHOOL_IDS_PER_REQUEST = 500
 DEFAULT_EVENTS_LIMIT = 10
+MAX_EVENTS_LIMIT = 100
+# Événements antérieurs de plus de N jours déplacés dans events_archive (archive-events)
+EVENTS_ARCHIVE_AFTER_DAYS = 30
 DEFAULT_REVIEWS_LIMIT = 50
+MAX_REVIEWS_LIMIT = 100
+# Note initiale d'une école sans avis (MySQL : pas de nombre d'avis dans le jeu de données) :
+# note a priori pesant N avis dans la moyenne, pour que le premier avis ne la remplace pas
+# (non comptée dans total_reviews)
+SEEDED_RATING_WEIGHT = 10
+# Recherche par proximité (/api/schools/nearby) : rayon en km et nombre d'écoles
+NEARBY_DEFAULT_RADIUS_KM = 10
+NEARBY_MAX_RADIUS_KM = 200
+DEFAULT_NEARBY_LIMIT = 20
+MAX_NEARBY_LIMIT = 100
+# Carte (/api/schools/map) : jusqu'à ce zoom, groupes d'écoles par cellule de 256 / 2^shift pixels ;
+# au-delà, écoles une par une, au plus MAP_MAX_SCHOOLS par fenêtre
+MAP_CLUSTER_MAX_ZOOM = 12
+MAP_CLUSTER_CELL_SHIFT = 2
+MAP_MAX_ZOOM = 22
+MAP_MAX_SCHOOLS = 500
+# Autocomplétion (/api/autocomplete) : nombre de suggestions et profondeur de l'arbre des préfixes
+# (au-delà, les suggestions du nœud le plus profond sont filtrées)
+DEFAULT_AUTOCOMPLETE_LIMIT = 8
+MAX_AUTOCOMPLETE_LIMIT = 20
+AUTOCOMPLETE_MAX_DEPTH = 16
+# Recherche tolérante aux fautes (fuzzy) : part minimale des trigrammes de la recherche
+# présents dans l'école, et nombre maximal de résultats
+FUZZY_MIN_SIMILARITY = 0.5
+FUZZY_MAX_RESULTS = 20
 
 # Types d'écoles supportés
 SCHOOL_TYPES = [
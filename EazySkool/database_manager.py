@@ -7,16 +7,253 @@ Gestionnaire de base de données pour la plateforme EazySkool
 
 import sqlite3
 import os
-import json
-from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+import sys
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Tuple
 import hashlib
-import bcrypt
+from config import (SQLITE_BUSY_TIMEOUT, SQLITE_CACHE_SIZE_KB, SQLITE_MMAP_SIZE, CACHE_TTL, CACHE_MAX_ENTRIES,
+                    DEFAULT_SCHOOLS_PER_PAGE, DEFAULT_REVIEWS_LIMIT, EXPORT_FETCH_SIZE, DEFAULT_NEARBY_LIMIT,
+                    MAP_CLUSTER_MAX_ZOOM, MAP_MAX_SCHOOLS, DEFAULT_EVENTS_LIMIT, EVENTS_ARCHIVE_AFTER_DAYS)
+from cache import (TTLCache, CACHE_KEY_SCHOOLS, CACHE_KEY_CITIES, CACHE_KEY_SCHOOL_TYPES, CACHE_KEY_EVENTS,
+                   CACHE_KEY_MAP_GRID, CACHE_KEY_FACETS, CATALOG_CACHE_KEYS)
+from pagination import encode_cursor, decode_cursor
+from search import fts5_match_expression
+from query_audit import AuditProbe, sqlite_full_scans
+from password_hashing import password_hasher
+from export_stream import ExportRecord, json_document_chunks, ndjson_chunks, write_chunks
+from geo import bounding_box, haversine_km
+from map_clusters import BoundingBox, ClusterGrid, map_point
+from facets import FACETS, FacetIndex, ids_bitmap
+from autocomplete import EntryRow
+from fuzzy import FuzzyRow
+
+# Champs d'une école exposés par l'API : nom -> expression SQL
+SCHOOL_FIELDS = {
+    'id': 's.id',
+    'name': 's.name',
+    'description': 's.description',
+    'website': 's.website',
+    'email': 's.email',
+    'phone': 's.phone',
+    'address': 's.address',
+    'latitude': 's.latitude',
+    'longitude': 's.longitude',
+    'average_rating': 's.average_rating',
+    'total_reviews': 's.total_reviews',
+    'type_name': 'st.name',
+    'city_name': 'c.name',
+    'region': 'c.region',
+    # Sous-requête corrélée : évaluée uniquement pour les lignes de la page
+    'specializations': """(SELECT GROUP_CONCAT(sp.name)
+                           FROM school_specializations ss
+                           JOIN specializations sp ON ss.specialization_id = sp.id
+                           WHERE ss.school_id = s.id)"""
+}
+
+# Tris disponibles : nom -> (colonne indexée, sens par défaut)
+# `relevance` (score BM25 de la recherche, plus petit = plus pertinent) exige une recherche
+SCHOOL_SORTS = {
+    'rating': ('s.average_rating', 'DESC'),
+    'name': ('s.name', 'ASC'),
+    'relevance': ('h.score', 'ASC')
+}
+
+# Relations qu'une fiche d'école peut inclure (include=images,reviews,...)
+SCHOOL_INCLUDES = ('images', 'reviews', 'events', 'specializations')
+
+# Requêtes de l'export en flux, dans l'ordre de la clé primaire (aucun tri en mémoire)
+EXPORT_QUERIES = [
+    ('schools', f"""
+        SELECT {', '.join(f'{expression} AS {name}' for name, expression in SCHOOL_FIELDS.items())}
+        FROM schools s
+        JOIN school_types st ON s.type_id = st.id
+        JOIN cities c ON s.city_id = c.id
+        ORDER BY s.id
+    """),
+    ('cities', "SELECT id, name, region FROM cities ORDER BY id"),
+    ('school_types', "SELECT id, name, description FROM school_types ORDER BY id"),
+    ('events', """
+        SELECT e.id, e.title, e.description, e.event_date, e.event_time, e.location, e.is_online,
+               e.school_id, s.name AS school_name
+        FROM events e
+        LEFT JOIN schools s ON e.school_id = s.id
+        ORDER BY e.id
+    """)
+]
+
+# Poids BM25 des colonnes de schools_fts : nom, description, ville
+FTS_WEIGHTS = (10.0, 1.0, 5.0)
+
+# Migrations de schéma appliquées au démarrage, dans l'ordre, une seule fois chacune
+SCHEMA_MIGRATIONS = [
+    ('004_schools_sort_indexes', """
+        -- idx_schools_rating (average_rating) couvre déjà le tri par note (+ rowid)
+        CREATE INDEX IF NOT EXISTS idx_schools_name ON schools(name);
+    """),
+    ('005_schools_fulltext', """
+        -- Index plein texte : accents ignorés (é/è/ç), index de préfixes pour la saisie partielle
+        CREATE VIRTUAL TABLE IF NOT EXISTS schools_fts USING fts5(
+            name, description, city_name,
+            tokenize = 'unicode61 remove_diacritics 2',
+            prefix = '2 3'
+        );
+        INSERT INTO schools_fts (rowid, name, description, city_name)
+            SELECT s.id, s.name, s.description, c.name
+            FROM schools s LEFT JOIN cities c ON s.city_id = c.id;
+        
+        -- Synchronisation par triggers : l'index suit toutes les écritures, imports compris
+        CREATE TRIGGER IF NOT EXISTS schools_fts_insert AFTER INSERT ON schools BEGIN
+            INSERT INTO schools_fts (rowid, name, description, city_name)
+            VALUES (new.id, new.name, new.description, (SELECT name FROM cities WHERE id = new.city_id));
+        END;
+        CREATE TRIGGER IF NOT EXISTS schools_fts_delete AFTER DELETE ON schools BEGIN
+            DELETE FROM schools_fts WHERE rowid = old.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS schools_fts_update AFTER UPDATE OF name, description, city_id ON schools BEGIN
+            DELETE FROM schools_fts WHERE rowid = old.id;
+            INSERT INTO schools_fts (rowid, name, description, city_name)
+            VALUES (new.id, new.name, new.description, (SELECT name FROM cities WHERE id = new.city_id));
+        END;
+        CREATE TRIGGER IF NOT EXISTS schools_fts_city_rename AFTER UPDATE OF name ON cities BEGIN
+            UPDATE schools_fts SET city_name = new.name
+            WHERE rowid IN (SELECT id FROM schools WHERE city_id = new.id);
+        END;
+    """),
+    ('006_schools_rating_sum', """
+        -- Somme des notes : la moyenne se met à jour en O(1) à chaque avis
+        ALTER TABLE schools ADD COLUMN rating_sum REAL NOT NULL DEFAULT 0;
+        UPDATE schools SET rating_sum = ROUND(COALESCE(average_rating, 0) * COALESCE(total_reviews, 0), 2);
+    """),
+    ('007_secondary_indexes', """
+        -- Images d'une école, principale d'abord (get_school_images)
+        CREATE INDEX IF NOT EXISTS idx_school_images_school ON school_images(school_id, is_primary, id);
+        -- Écoles d'une spécialité : la clé primaire commence par school_id
+        CREATE INDEX IF NOT EXISTS idx_school_specializations_spec ON school_specializations(specialization_id, school_id);
+        -- Avis d'une école et favoris d'un utilisateur, du plus récent au plus ancien
+        CREATE INDEX IF NOT EXISTS idx_reviews_school_created ON reviews(school_id, created_at);
+        DROP INDEX IF EXISTS idx_reviews_school;
+        CREATE INDEX IF NOT EXISTS idx_favorites_user_created ON favorites(user_id, created_at);
+        DROP INDEX IF EXISTS idx_favorites_user;
+        -- Filtres ville / type par nom, puis tri par note dans la ville ou le type
+        CREATE INDEX IF NOT EXISTS idx_cities_name ON cities(name);
+        CREATE INDEX IF NOT EXISTS idx_school_types_name ON school_types(name);
+        CREATE INDEX IF NOT EXISTS idx_schools_city_rating ON schools(city_id, average_rating);
+        DROP INDEX IF EXISTS idx_schools_city;
+        CREATE INDEX IF NOT EXISTS idx_schools_type_rating ON schools(type_id, average_rating);
+        DROP INDEX IF EXISTS idx_schools_type;
+        -- Doublon de l'index implicite de la contrainte UNIQUE sur users.email
+        DROP INDEX IF EXISTS idx_users_email;
+    """),
+    ('008_events_school_index', """
+        -- Événements à venir d'une école (fiche détaillée)
+        CREATE INDEX IF NOT EXISTS idx_events_school_date ON events(school_id, event_date);
+    """),
+    # Histogramme des notes par école, tenu à jour par add_review : le résumé des avis
+    # se lit en 5 lignes au plus, quel que soit le nombre d'avis
+    ('009_school_rating_counts', """
+        CREATE TABLE IF NOT EXISTS school_rating_counts (
+            school_id INTEGER NOT NULL,
+            rating INTEGER NOT NULL,
+            review_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (school_id, rating)
+        ) WITHOUT ROWID;
+        INSERT OR REPLACE INTO school_rating_counts (school_id, rating, review_count)
+        SELECT school_id, rating, COUNT(*) FROM reviews GROUP BY school_id, rating;
+    """),
+    ('010_schools_rtree', """
+        -- Index spatial R*Tree des écoles géolocalisées : un point = une boîte de taille nulle
+        CREATE VIRTUAL TABLE IF NOT EXISTS schools_rtree USING rtree(id, min_lat, max_lat, min_lon, max_lon);
+        INSERT OR REPLACE INTO schools_rtree (id, min_lat, max_lat, min_lon, max_lon)
+            SELECT id, latitude, latitude, longitude, longitude
+            FROM schools WHERE latitude IS NOT NULL AND longitude IS NOT NULL;
+        
+        -- Synchronisation par triggers, comme schools_fts
+        CREATE TRIGGER IF NOT EXISTS schools_rtree_insert AFTER INSERT ON schools
+        WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+            INSERT INTO schools_rtree (id, min_lat, max_lat, min_lon, max_lon)
+            VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude);
+        END;
+        CREATE TRIGGER IF NOT EXISTS schools_rtree_delete AFTER DELETE ON schools BEGIN
+            DELETE FROM schools_rtree WHERE id = old.id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS schools_rtree_update AFTER UPDATE OF latitude, longitude ON schools BEGIN
+            DELETE FROM schools_rtree WHERE id = old.id;
+            INSERT INTO schools_rtree (id, min_lat, max_lat, min_lon, max_lon)
+            SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude
+            WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+        END;
+    """),
+    ('011_events_calendar', """
+        -- Calendrier (/api/events) : fenêtre de dates lue dans l'ordre (date, heure, id), sans tri,
+        -- globalement ou pour une école
+        CREATE INDEX IF NOT EXISTS idx_events_date_time ON events(event_date, event_time, id);
+        DROP INDEX IF EXISTS idx_events_date;
+        CREATE INDEX IF NOT EXISTS idx_events_school_date_time ON events(school_id, event_date, event_time, id);
+        DROP INDEX IF EXISTS idx_events_school_date;
+        
+        -- Événements passés sortis de la table lue par l'API (archive_past_events)
+        CREATE TABLE IF NOT EXISTS events_archive (
+            id INTEGER PRIMARY KEY,
+            title VARCHAR(255) NOT NULL,
+            description TEXT,
+            event_date DATE NOT NULL,
+            event_time TIME,
+            location VARCHAR(255),
+            school_id INTEGER,
+            is_online BOOLEAN DEFAULT 0,
+            created_at TIMESTAMP,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+    """),
+    ('012_favorite_versions', """
+        -- Version des favoris de chaque utilisateur, incrémentée à chaque modification :
+        -- la synchronisation sait si l'ensemble envoyé par un client est à jour
+        CREATE TABLE IF NOT EXISTS favorite_versions (
+            user_id INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL DEFAULT 0
+        );
+    """),
+]
+
+
+def rating_summary(counts: Iterable[Tuple[int, int]], count: Optional[int] = None,
+                   average: Optional[float] = None) -> Dict:
+    """
+    Résumé des avis : nombre et moyenne de l'école (`count`, `average`, ceux affichés dans le
+    catalogue), histogramme 1 à 5 des avis écrits à partir de (note, nombre d'avis) et leur
+    nombre (`written_count`). Sans nombre fourni, nombre et moyenne viennent de l'histogramme.
+    """
+    histogram = {rating: 0 for rating in range(1, 6)}
+    for rating, review_count in counts:
+        histogram[int(rating)] = int(review_count)
+    written = sum(histogram.values())
+    if count is None:
+        count = written
+        average = sum(rating * n for rating, n in histogram.items()) / written if written else None
+    return {
+        'count': int(count),
+        'average': round(float(average), 2) if average is not None else None,
+        'histogram': histogram,
+        'written_count': written
+    }
+
 
 class EazySkoolDB:
     def __init__(self, db_path: str = "eazyskool.db"):
         """Initialise la connexion à la base de données"""
         self.db_path = db_path
+        # Une connexion persistante par thread (sqlite3 interdit le partage entre threads)
+        self._local = threading.local()
+        # Catalogue en mémoire, invalidé explicitement par les écritures
+        self.cache = TTLCache(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL)
+        # Fonctions appelées avec les clés invalidées (ex. réponses HTTP en cache du serveur)
+        self._invalidation_listeners = []
+        # Recherche plein texte FTS5 (sinon repli sur LIKE), déterminé après les migrations
+        self.fts_enabled = False
+        # Index spatial R*Tree (sinon repli sur un filtre des coordonnées), idem
+        self.rtree_enabled = False
         self.init_database()
     
     def init_database(self):
@@ -26,6 +263,9 @@ class EazySkoolDB:
             self.create_database()
         else:
             print("Base de données existante trouvée.")
+        self.apply_migrations()
+        self.fts_enabled = self._table_exists('schools_fts')
+        self.rtree_enabled = self._table_exists('schools_rtree')
     
     def create_database(self):
         """Crée la base de données et insère les données initiales"""
@@ -42,12 +282,127 @@ class EazySkoolDB:
         conn.close()
         print("Base de données créée avec succès !")
     
-    def get_connection(self):
-        """Retourne une connexion à la base de données"""
-        return sqlite3.connect(self.db_path)
+    def apply_migrations(self):
+        """Applique les migrations de SCHEMA_MIGRATIONS qui ne l'ont pas encore été"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                name VARCHAR(255) PRIMARY KEY,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        conn.commit()
+        
+        cursor.execute("SELECT name FROM schema_migrations")
+        applied = {row[0] for row in cursor.fetchall()}
+        
+        for name, sql in SCHEMA_MIGRATIONS:
+            if name in applied:
+                continue
+            # Une migration et son enregistrement forment une seule transaction
+            escaped_name = name.replace("'", "''")
+            try:
+                cursor.executescript(
+                    f"BEGIN; {sql}; INSERT INTO schema_migrations (name) VALUES ('{escaped_name}'); COMMIT;"
+                )
+            except sqlite3.OperationalError as e:
+                # Ex. SQLite compilé sans FTS5 : la migration sera retentée au prochain démarrage
+                if conn.in_transaction:
+                    conn.rollback()
+                print(f"Migration non appliquée: {name} ({e})")
+                continue
+            print(f"Migration appliquée: {name}")
+    
+    def _table_exists(self, name: str) -> bool:
+        """Indique si une table (ou table virtuelle) existe"""
+        cursor = self.get_connection().cursor()
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,))
+        return cursor.fetchone() is not None
+    
+    def _search_hits(self, query: str) -> Tuple[str, List]:
+        """
+        Sous-requête (id, score) des écoles correspondant à la recherche : index FTS5
+        classé par BM25 si disponible, sinon LIKE sur le nom et la description (score nul).
+        """
+        match = fts5_match_expression(query) if self.fts_enabled else None
+        if match:
+            weights = ", ".join(str(weight) for weight in FTS_WEIGHTS)
+            # LIMIT -1 force la matérialisation : bm25() n'est utilisable que dans la requête FTS
+            return (f"(SELECT rowid AS id, bm25(schools_fts, {weights}) AS score "
+                    f"FROM schools_fts WHERE schools_fts MATCH ? LIMIT -1)", [match])
+        return ("(SELECT id, 0 AS score FROM schools WHERE name LIKE ? OR description LIKE ?)",
+                [f"%{query}%", f"%{query}%"])
+    
+    def get_connection(self) -> sqlite3.Connection:
+        """Retourne la connexion du thread courant, ouverte au premier appel puis réutilisée"""
+        conn = getattr(self._local, 'connection', None)
+        if conn is None:
+            conn = self._open_connection()
+            self._local.connection = conn
+        return conn
+    
+    def _open_connection(self) -> sqlite3.Connection:
+        """Ouvre une connexion configurée pour les accès concurrents (WAL, mmap, cache)"""
+        conn = sqlite3.connect(self.db_path, timeout=SQLITE_BUSY_TIMEOUT)
+        cursor = conn.cursor()
+        
+        # WAL : les lecteurs ne bloquent plus les écritures (et inversement)
+        cursor.execute("PRAGMA journal_mode=WAL")
+        # NORMAL suffit en WAL : pas de fsync à chaque commit, pas de risque de corruption
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA cache_size=-{int(SQLITE_CACHE_SIZE_KB)}")
+        cursor.execute(f"PRAGMA mmap_size={int(SQLITE_MMAP_SIZE)}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        
+        cursor.close()
+        # Distance en km utilisable dans les requêtes (recherche par proximité)
+        conn.create_function('haversine_km', 4, haversine_km, deterministic=True)
+        return conn
+    
+    @contextmanager
+    def read_transaction(self):
+        """
+        Transaction de lecture sur la connexion du thread : les requêtes exécutées dans le
+        bloc (par toutes les méthodes du gestionnaire) voient le même état de la base.
+        """
+        conn = self.get_connection()
+        if conn.in_transaction:
+            # Déjà dans une transaction : on la réutilise
+            yield conn
+            return
+        # BEGIN différé : l'instantané est pris à la première lecture
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.commit()
+
+    def close_connection(self):
+        """Ferme la connexion du thread courant (elle sera rouverte au prochain appel)"""
+        conn = getattr(self._local, 'connection', None)
+        if conn is not None:
+            conn.close()
+            self._local.connection = None
+    
+    def invalidate_cache(self, *keys: str):
+        """Invalide les clés indiquées du cache (tout le catalogue si aucune clé)"""
+        keys = keys or CATALOG_CACHE_KEYS
+        self.cache.invalidate(*keys)
+        for listener in self._invalidation_listeners:
+            listener(*keys)
+    
+    def add_invalidation_listener(self, listener: Callable[..., None]):
+        """Enregistre une fonction appelée avec les clés à chaque invalidation du cache"""
+        self._invalidation_listeners.append(listener)
     
     def get_all_schools(self) -> List[Dict]:
-        """Récupère toutes les écoles avec leurs informations complètes"""
+        """Récupère toutes les écoles avec leurs informations complètes (mises en cache)"""
+        return self.cache.get_or_load(CACHE_KEY_SCHOOLS, self._load_all_schools)
+    
+    def _load_all_schools(self) -> List[Dict]:
+        """Charge toutes les écoles depuis la base"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -101,7 +456,6 @@ class EazySkoolDB:
             }
             schools.append(school)
         
-        conn.close()
         return schools
     
     def get_school_by_id(self, school_id: int) -> Optional[Dict]:
@@ -156,12 +510,106 @@ class EazySkoolDB:
                 'region': row[13],
                 'specializations': row[14].split(',') if row[14] else []
             }
-            conn.close()
             return school
         
-        conn.close()
         return None
     
+    def list_schools(self, query: str = None, city: str = None, school_type: str = None,
+                     sort: str = None, order: str = None, page: int = 1, per_page: int = DEFAULT_SCHOOLS_PER_PAGE,
+                     after: str = None, fields: List[str] = None) -> Dict:
+        """
+        Liste paginée des écoles, triée et filtrée en SQL (ORDER BY indexé + LIMIT).
+        
+        `after` est le curseur `next_cursor` de la page précédente (pagination par clé,
+        prioritaire sur `page`) ; `fields` restreint les colonnes renvoyées.
+        Par défaut, une recherche est triée par pertinence et une liste par note.
+        """
+        if not query and sort in (None, 'relevance'):
+            sort = 'rating'
+        sort = sort or 'relevance'
+        if sort not in SCHOOL_SORTS:
+            raise ValueError(f"Tri inconnu: {sort}")
+        sort_column, direction = SCHOOL_SORTS[sort]
+        if order:
+            direction = 'DESC' if order.lower() == 'desc' else 'ASC'
+        fields = fields or list(SCHOOL_FIELDS)
+        
+        conditions = []
+        params = []
+        joins = ""
+        
+        if query:
+            hits, params = self._search_hits(query)
+            joins += f" JOIN {hits} h ON h.id = s.id"
+        
+        if city:
+            joins += " JOIN cities c ON s.city_id = c.id"
+            conditions.append("c.name = ?")
+            params.append(city)
+        
+        if school_type:
+            joins += " JOIN school_types st ON s.type_id = st.id"
+            conditions.append("st.name = ?")
+            params.append(school_type)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        filter_clause = " AND ".join(conditions) if conditions else "1=1"
+        cursor.execute(f"SELECT COUNT(*) FROM schools s{joins} WHERE {filter_clause}", params)
+        total = cursor.fetchone()[0]
+        
+        page_conditions = list(conditions)
+        page_params = list(params)
+        offset = 0
+        if after:
+            last_value, last_id = decode_cursor(after)
+            comparison = '<' if direction == 'DESC' else '>'
+            page_conditions.append(f"({sort_column}, s.id) {comparison} (?, ?)")
+            page_params.extend([last_value, last_id])
+        else:
+            offset = (page - 1) * per_page
+        
+        page_clause = " AND ".join(page_conditions) if page_conditions else "1=1"
+        columns = ", ".join(f"{SCHOOL_FIELDS[field]} AS {field}" for field in fields)
+        
+        # La sous-requête choisit les identifiants de la page via l'index de tri ;
+        # les jointures et les spécialités ne sont calculées que pour ces lignes.
+        # Une ligne de plus que demandé indique s'il existe une page suivante.
+        cursor.execute(f"""
+            SELECT {columns}, page.sort_value, page.id
+            FROM (
+                SELECT s.id AS id, {sort_column} AS sort_value
+                FROM schools s{joins}
+                WHERE {page_clause}
+                ORDER BY {sort_column} {direction}, s.id {direction}
+                LIMIT ? OFFSET ?
+            ) page
+            JOIN schools s ON s.id = page.id
+            JOIN school_types st ON s.type_id = st.id
+            JOIN cities c ON s.city_id = c.id
+            ORDER BY page.sort_value {direction}, page.id {direction}
+        """, page_params + [per_page + 1, offset])
+        rows = cursor.fetchall()
+        
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        
+        schools = []
+        for row in rows:
+            school = dict(zip(fields, row))
+            if 'specializations' in school:
+                school['specializations'] = school['specializations'].split(',') if school['specializations'] else []
+            schools.append(school)
+        
+        return {
+            'data': schools,
+            'total': total,
+            'page': None if after else page,
+            'per_page': per_page,
+            'next_cursor': encode_cursor(rows[-1][-2:]) if has_more else None
+        }
+    
     def search_schools(self, query: str, city: str = None, school_type: str = None) -> List[Dict]:
         """Recherche des écoles selon différents critères"""
         conn = self.get_connection()
@@ -169,10 +617,14 @@ class EazySkoolDB:
         
         sql_conditions = []
         params = []
+        joins = ""
+        order_by = "s.average_rating DESC"
         
         if query:
-            sql_conditions.append("(s.name LIKE ? OR s.description LIKE ?)")
-            params.extend([f"%{query}%", f"%{query}%"])
+            # Les résultats les plus pertinents d'abord, puis les mieux notés
+            hits, params = self._search_hits(query)
+            joins = f"JOIN {hits} h ON h.id = s.id"
+            order_by = "h.score ASC, s.average_rating DESC"
         
         if city:
             sql_conditions.append("c.name = ?")
@@ -206,9 +658,10 @@ class EazySkoolDB:
         JOIN cities c ON s.city_id = c.id
         LEFT JOIN school_specializations ss ON s.id = ss.school_id
         LEFT JOIN specializations sp ON ss.specialization_id = sp.id
+        {joins}
         WHERE {where_clause}
         GROUP BY s.id
-        ORDER BY s.average_rating DESC
+        ORDER BY {order_by}
         """
         
         cursor.execute(query_sql, params)
@@ -235,11 +688,81 @@ class EazySkoolDB:
             }
             schools.append(school)
         
-        conn.close()
         return schools
     
+    def _load_facet_index(self) -> FacetIndex:
+        """Construit les listes d'écoles de chaque ville, région, type et spécialisation"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT s.id AS school_id, 'city' AS facet, c.name AS value
+            FROM schools s LEFT JOIN cities c ON s.city_id = c.id
+            UNION ALL
+            SELECT s.id, 'region', c.region FROM schools s LEFT JOIN cities c ON s.city_id = c.id
+            UNION ALL
+            SELECT s.id, 'type', st.name FROM schools s LEFT JOIN school_types st ON s.type_id = st.id
+            UNION ALL
+            SELECT ss.school_id, 'specialization', sp.name
+            FROM school_specializations ss JOIN specializations sp ON ss.specialization_id = sp.id
+        """)
+        return FacetIndex(cursor)
+    
+    def get_search_facets(self, query: str = None, city: str = None, school_type: str = None,
+                          facets: Iterable[str] = FACETS) -> Dict[str, List[Dict]]:
+        """
+        Comptes par facette (city, type, region, specialization) des résultats de search_schools
+        avec les mêmes critères : intersections de l'index des facettes (en cache, invalidé avec
+        le catalogue) et des écoles trouvées par la recherche, lues en une requête.
+        """
+        index = self.cache.get_or_load(CACHE_KEY_FACETS, self._load_facet_index)
+        hits = self._search_hits_bitmap(query) if query else None
+        filters = {'city': [city] if city else [], 'type': [school_type] if school_type else []}
+        return index.counts(filters, hits, facets)
+    
+    def _search_hits_bitmap(self, query: str) -> int:
+        """Bitmap des écoles trouvées par la recherche (seule requête de get_search_facets une fois l'index en cache)"""
+        hits_query, params = self._search_hits(query)
+        cursor = self.get_connection().cursor()
+        cursor.execute(f"SELECT h.id FROM {hits_query} h", params)
+        return ids_bitmap(row[0] for row in cursor)
+    
+    def get_autocomplete_entries(self) -> List[EntryRow]:
+        """Entrées de l'autocomplétion : écoles (note moyenne), villes et spécialisations (moyenne de leurs écoles)"""
+        cursor = self.get_connection().cursor()
+        cursor.execute("""
+            SELECT 'school' AS kind, s.id AS id, s.name AS label, s.average_rating AS score FROM schools s
+            UNION ALL
+            SELECT 'city', c.id, c.name, AVG(s.average_rating) FROM cities c
+            LEFT JOIN schools s ON s.city_id = c.id GROUP BY c.id, c.name
+            UNION ALL
+            SELECT 'specialization', sp.id, sp.name, AVG(s.average_rating) FROM specializations sp
+            LEFT JOIN school_specializations ss ON ss.specialization_id = sp.id
+            LEFT JOIN schools s ON s.id = ss.school_id GROUP BY sp.id, sp.name
+        """)
+        return cursor.fetchall()
+    
+    def get_fuzzy_entries(self) -> List[FuzzyRow]:
+        """Écoles pour la recherche tolérante aux fautes : nom, ville, type, spécialisations et note"""
+        cursor = self.get_connection().cursor()
+        cursor.execute("""
+            SELECT s.id, s.name, c.name, st.name,
+                   (SELECT GROUP_CONCAT(sp.name, ' ')
+                    FROM school_specializations ss
+                    JOIN specializations sp ON ss.specialization_id = sp.id
+                    WHERE ss.school_id = s.id),
+                   s.average_rating
+            FROM schools s
+            LEFT JOIN cities c ON s.city_id = c.id
+            LEFT JOIN school_types st ON s.type_id = st.id
+        """)
+        return cursor.fetchall()
+    
     def get_cities(self) -> List[Dict]:
-        """Récupère toutes les villes"""
+        """Récupère toutes les villes (mises en cache)"""
+        return self.cache.get_or_load(CACHE_KEY_CITIES, self._load_cities)
+    
+    def _load_cities(self) -> List[Dict]:
+        """Charge les villes depuis la base"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -248,11 +771,14 @@ class EazySkoolDB:
         
         cities = [{'id': row[0], 'name': row[1], 'region': row[2]} for row in rows]
         
-        conn.close()
         return cities
     
     def get_school_types(self) -> List[Dict]:
-        """Récupère tous les types d'écoles"""
+        """Récupère tous les types d'écoles (mis en cache)"""
+        return self.cache.get_or_load(CACHE_KEY_SCHOOL_TYPES, self._load_school_types)
+    
+    def _load_school_types(self) -> List[Dict]:
+        """Charge les types d'écoles depuis la base"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -261,7 +787,6 @@ class EazySkoolDB:
         
         types = [{'id': row[0], 'name': row[1], 'description': row[2]} for row in rows]
         
-        conn.close()
         return types
     
     def get_school_images(self, school_id: int) -> List[Dict]:
@@ -279,24 +804,39 @@ class EazySkoolDB:
         rows = cursor.fetchall()
         images = [{'id': row[0], 'path': row[1], 'is_primary': bool(row[2])} for row in rows]
         
-        conn.close()
         return images
     
-    def get_school_reviews(self, school_id: int) -> List[Dict]:
-        """Récupère les avis d'une école"""
-        conn = self.get_connection()
-        cursor = conn.cursor()
+    def list_school_reviews(self, school_id: int, limit: int = DEFAULT_REVIEWS_LIMIT, after: str = None) -> Dict:
+        """
+        Page d'avis d'une école, du plus récent au plus ancien, avec le résumé des notes.
         
-        cursor.execute("""
-            SELECT r.id, r.rating, r.comment, r.created_at,
-                   u.first_name, u.last_name, u.city
-            FROM reviews r
-            JOIN users u ON r.user_id = u.id
-            WHERE r.school_id = ?
-            ORDER BY r.created_at DESC
-        """, (school_id,))
+        `after` est le curseur `next_cursor` de la page précédente : pagination par clé sur
+        (created_at, id), servie par l'index (school_id, created_at) dont id est la fin implicite.
+        """
+        conditions = ["r.school_id = ?"]
+        params = [school_id]
+        if after:
+            last_created_at, last_id = decode_cursor(after)
+            conditions.append("(r.created_at, r.id) < (?, ?)")
+            params.extend([last_created_at, last_id])
         
-        rows = cursor.fetchall()
+        with self.read_transaction() as conn:
+            cursor = conn.cursor()
+            # Une ligne de plus que demandé indique s'il existe une page suivante
+            cursor.execute(f"""
+                SELECT r.id, r.rating, r.comment, r.created_at,
+                       u.first_name, u.last_name, u.city
+                FROM reviews r
+                JOIN users u ON r.user_id = u.id
+                WHERE {" AND ".join(conditions)}
+                ORDER BY r.created_at DESC, r.id DESC
+                LIMIT ?
+            """, params + [limit + 1])
+            rows = cursor.fetchall()
+            summary = self.get_review_summary(school_id)
+        
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         reviews = []
         for row in rows:
             review = {
@@ -309,13 +849,241 @@ class EazySkoolDB:
             }
             reviews.append(review)
         
-        conn.close()
-        return reviews
+        return {
+            'data': reviews,
+            'summary': summary,
+            'next_cursor': encode_cursor([rows[-1][3], rows[-1][0]]) if has_more else None
+        }
+    
+    def get_review_summary(self, school_id: int) -> Dict:
+        """Nombre d'avis et note moyenne de l'école, histogramme des notes des avis écrits"""
+        cursor = self.get_connection().cursor()
+        cursor.execute("SELECT total_reviews, average_rating FROM schools WHERE id = ?", (school_id,))
+        school = cursor.fetchone()
+        cursor.execute("SELECT rating, review_count FROM school_rating_counts WHERE school_id = ?", (school_id,))
+        if school is None or school[0] is None:
+            return rating_summary(cursor.fetchall())
+        return rating_summary(cursor.fetchall(), school[0], school[1])
+    
+    def get_school_events(self, school_id: int) -> List[Dict]:
+        """Récupère les événements à venir d'une école"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT id, title, description, event_date, event_time, location, is_online
+            FROM events
+            WHERE school_id = ? AND event_date >= date('now')
+            ORDER BY event_date ASC, event_time ASC
+        """, (school_id,))
+        
+        rows = cursor.fetchall()
+        events = []
+        for row in rows:
+            event = {
+                'id': row[0],
+                'title': row[1],
+                'description': row[2],
+                'event_date': row[3],
+                'event_time': row[4],
+                'location': row[5],
+                'is_online': bool(row[6])
+            }
+            events.append(event)
+        
+        return events
+    
+    def get_school_specializations(self, school_id: int) -> List[Dict]:
+        """Récupère les spécialités d'une école (nom, description, catégorie)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        cursor.execute("""
+            SELECT sp.id, sp.name, sp.description, sp.category
+            FROM school_specializations ss
+            JOIN specializations sp ON ss.specialization_id = sp.id
+            WHERE ss.school_id = ?
+            ORDER BY sp.name
+        """, (school_id,))
+        
+        rows = cursor.fetchall()
+        return [{'id': row[0], 'name': row[1], 'description': row[2], 'category': row[3]} for row in rows]
+    
+    def get_school_detail(self, school_id: int, include: Iterable[str] = ()) -> Optional[Dict]:
+        """
+        Fiche d'une école avec les relations demandées (voir SCHOOL_INCLUDES), lues dans une
+        seule transaction : toutes les requêtes voient le même état de la base.
+        `specializations` remplace la liste des noms par les spécialités complètes.
+        """
+        loaders = {
+            'images': self.get_school_images,
+            'events': self.get_school_events,
+            'specializations': self.get_school_specializations
+        }
+        with self.read_transaction():
+            school = self.get_school_by_id(school_id)
+            if school is not None:
+                for name in include:
+                    if name == 'reviews':
+                        # Première page d'avis, avec le résumé des notes et le curseur de la suite
+                        page = self.list_school_reviews(school_id)
+                        school['reviews'] = page['data']
+                        school['reviews_summary'] = page['summary']
+                        school['reviews_next_cursor'] = page['next_cursor']
+                    else:
+                        school[name] = loaders[name](school_id)
+        
+        return school
+    
+    def get_schools_by_ids(self, ids: List[int], fields: List[str] = None) -> List[Dict]:
+        """
+        Écoles dont l'identifiant figure dans `ids`, dans l'ordre demandé (les absentes sont
+        ignorées), avec leurs images. Trois requêtes quel que soit le nombre d'identifiants :
+        les écoles, leurs spécialités et leurs images (WHERE ... IN).
+        """
+        if not ids:
+            return []
+        fields = fields or list(SCHOOL_FIELDS)
+        base_fields = [field for field in fields if field != 'specializations']
+        columns = ", ".join(f"{SCHOOL_FIELDS[field]} AS {field}" for field in base_fields)
+        
+        with self.read_transaction() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {columns}
+                FROM schools s
+                JOIN school_types st ON s.type_id = st.id
+                JOIN cities c ON s.city_id = c.id
+                WHERE s.id IN ({", ".join("?" * len(ids))})
+            """, list(ids))
+            schools = {}
+            for row in cursor.fetchall():
+                school = dict(zip(base_fields, row))
+                school['images'] = []
+                if 'specializations' in fields:
+                    school['specializations'] = []
+                schools[school['id']] = school
+            
+            found = list(schools)
+            placeholders = ", ".join("?" * len(found))
+            if found and 'specializations' in fields:
+                cursor.execute(f"""
+                    SELECT ss.school_id, sp.name
+                    FROM school_specializations ss
+                    JOIN specializations sp ON ss.specialization_id = sp.id
+                    WHERE ss.school_id IN ({placeholders})
+                    ORDER BY ss.school_id, ss.specialization_id
+                """, found)
+                for school_id, name in cursor.fetchall():
+                    schools[school_id]['specializations'].append(name)
+            
+            if found:
+                cursor.execute(f"""
+                    SELECT school_id, id, image_path, is_primary
+                    FROM school_images
+                    WHERE school_id IN ({placeholders})
+                    ORDER BY school_id, is_primary DESC, id
+                """, found)
+                for school_id, image_id, path, is_primary in cursor.fetchall():
+                    schools[school_id]['images'].append({'id': image_id, 'path': path, 'is_primary': bool(is_primary)})
+        
+        return [schools[school_id] for school_id in ids if school_id in schools]
+    
+    def _bbox_candidates(self, bbox: BoundingBox) -> Tuple[str, List]:
+        """
+        Sous-requête (id, latitude, longitude) des écoles de la boîte (lat min, lat max, lon min, lon max) :
+        index R*Tree si disponible, sinon filtre des coordonnées de schools.
+        """
+        min_lat, max_lat, min_lon, max_lon = bbox
+        if self.rtree_enabled:
+            return ("(SELECT s.id, s.latitude, s.longitude FROM schools_rtree r JOIN schools s ON s.id = r.id "
+                    "WHERE r.min_lat >= ? AND r.max_lat <= ? AND r.min_lon >= ? AND r.max_lon <= ?)",
+                    [min_lat, max_lat, min_lon, max_lon])
+        return ("(SELECT id, latitude, longitude FROM schools "
+                "WHERE latitude BETWEEN ? AND ? AND longitude BETWEEN ? AND ?)",
+                [min_lat, max_lat, min_lon, max_lon])
+    
+    def get_nearby_schools(self, lat: float, lon: float, radius_km: float,
+                           limit: int = DEFAULT_NEARBY_LIMIT) -> List[Dict]:
+        """
+        Écoles à moins de `radius_km` km du point (lat, lon), de la plus proche à la plus
+        éloignée (`distance_km`). Seules les écoles de la boîte englobante, trouvées par
+        l'index spatial, sont mesurées ; les champs sont lus pour les `limit` retenues.
+        """
+        candidates, params = self._bbox_candidates(bounding_box(lat, lon, radius_km))
+        columns = ", ".join(f"{expression} AS {name}" for name, expression in SCHOOL_FIELDS.items())
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            WITH nearby AS (
+                SELECT id, distance_km FROM (
+                    SELECT b.id, haversine_km(?, ?, b.latitude, b.longitude) AS distance_km
+                    FROM {candidates} b
+                )
+                WHERE distance_km <= ?
+                ORDER BY distance_km, id
+                LIMIT ?
+            )
+            SELECT {columns}, n.distance_km
+            FROM nearby n
+            JOIN schools s ON s.id = n.id
+            JOIN school_types st ON s.type_id = st.id
+            JOIN cities c ON s.city_id = c.id
+            ORDER BY n.distance_km, s.id
+        """, [lat, lon] + params + [radius_km, limit])
+        
+        names = list(SCHOOL_FIELDS) + ['distance_km']
+        schools = []
+        for row in cursor.fetchall():
+            school = dict(zip(names, row))
+            school['specializations'] = school['specializations'].split(',') if school['specializations'] else []
+            school['distance_km'] = round(school['distance_km'], 2)
+            schools.append(school)
+        
+        return schools
+    
+    def _load_map_grid(self) -> ClusterGrid:
+        """Construit la grille de regroupement de la carte à partir des coordonnées des écoles"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT id, name, latitude, longitude FROM schools
+            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+        """)
+        return ClusterGrid(cursor)
+    
+    def get_map_schools(self, bbox: BoundingBox, zoom: int, limit: int = MAP_MAX_SCHOOLS) -> Dict:
+        """
+        Contenu de la carte pour la fenêtre `bbox` : jusqu'à MAP_CLUSTER_MAX_ZOOM, les groupes de la
+        grille précalculée (en cache, invalidée avec le catalogue) ; au-delà, les écoles de la
+        fenêtre trouvées par l'index spatial, au plus `limit` (`truncated` si d'autres existent).
+        """
+        if zoom <= MAP_CLUSTER_MAX_ZOOM:
+            grid = self.cache.get_or_load(CACHE_KEY_MAP_GRID, self._load_map_grid)
+            return {'clustered': True, 'data': grid.clusters(bbox, zoom), 'truncated': False}
+        
+        candidates, params = self._bbox_candidates(bbox)
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT s.id, s.name, b.latitude, b.longitude
+            FROM {candidates} b
+            JOIN schools s ON s.id = b.id
+            ORDER BY s.id
+            LIMIT ?
+        """, params + [limit + 1])
+        rows = cursor.fetchall()
+        return {
+            'clustered': False,
+            'data': [map_point(*row) for row in rows[:limit]],
+            'truncated': len(rows) > limit
+        }
     
     def add_review(self, school_id: int, user_id: int, rating: int, comment: str = None) -> bool:
         """Ajoute un avis pour une école"""
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
             
             # Insère l'avis
@@ -324,37 +1092,73 @@ class EazySkoolDB:
                 VALUES (?, ?, ?, ?)
             """, (school_id, user_id, rating, comment))
             
-            # Met à jour la note moyenne de l'école
+            # Met à jour la note moyenne de l'école à partir de la somme et du nombre d'avis
+            # (dans la même transaction, sans relire tous les avis de l'école)
             cursor.execute("""
                 UPDATE schools 
-                SET average_rating = (
-                    SELECT AVG(rating) 
-                    FROM reviews 
-                    WHERE school_id = ?
-                ),
-                total_reviews = (
-                    SELECT COUNT(*) 
-                    FROM reviews 
-                    WHERE school_id = ?
-                )
+                SET average_rating = (rating_sum + ?) / (total_reviews + 1),
+                    rating_sum = rating_sum + ?,
+                    total_reviews = total_reviews + 1
                 WHERE id = ?
-            """, (school_id, school_id, school_id))
+            """, (rating, rating, school_id))
+            cursor.execute("""
+                INSERT INTO school_rating_counts (school_id, rating, review_count)
+                VALUES (?, ?, 1)
+                ON CONFLICT (school_id, rating) DO UPDATE SET review_count = review_count + 1
+            """, (school_id, rating))
             
             conn.commit()
-            conn.close()
+            # La note et le nombre d'avis changent : seule la liste des écoles est périmée
+            self.invalidate_cache(CACHE_KEY_SCHOOLS)
             return True
         except Exception as e:
+            conn.rollback()
             print(f"Erreur lors de l'ajout de l'avis: {e}")
             return False
     
-    def create_user(self, email: str, password: str, first_name: str = None, last_name: str = None, city: str = None) -> Optional[int]:
-        """Crée un nouvel utilisateur"""
+    def recompute_rating_aggregates(self) -> int:
+        """
+        Recalcule note moyenne, somme, nombre d'avis et histogramme des notes de toutes les
+        écoles depuis la table reviews (maintenance/réparation). Une école sans avis garde sa
+        note. Retourne le nombre d'écoles mises à jour.
+        """
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
             
-            # Hash du mot de passe
-            password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            cursor.execute("""
+                UPDATE schools
+                SET total_reviews = (SELECT COUNT(*) FROM reviews r WHERE r.school_id = schools.id),
+                    rating_sum = (SELECT COALESCE(SUM(r.rating), 0) FROM reviews r WHERE r.school_id = schools.id),
+                    average_rating = COALESCE(
+                        (SELECT AVG(r.rating) FROM reviews r WHERE r.school_id = schools.id),
+                        average_rating
+                    )
+            """)
+            updated = cursor.rowcount
+            
+            cursor.execute("DELETE FROM school_rating_counts")
+            cursor.execute("""
+                INSERT INTO school_rating_counts (school_id, rating, review_count)
+                SELECT school_id, rating, COUNT(*) FROM reviews GROUP BY school_id, rating
+            """)
+            
+            conn.commit()
+            self.invalidate_cache(CACHE_KEY_SCHOOLS)
+            return updated
+        except Exception as e:
+            conn.rollback()
+            print(f"Erreur lors du recalcul des notes: {e}")
+            return 0
+    
+    def create_user(self, email: str, password: str, first_name: str = None, last_name: str = None, city: str = None) -> Optional[int]:
+        """Crée un nouvel utilisateur (PasswordHasherBusy si le pool bcrypt est saturé)"""
+        # Hash du mot de passe, calculé par le pool bcrypt avant d'ouvrir la transaction
+        password_hash = password_hasher.hash_password(password)
+        
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
             
             cursor.execute("""
                 INSERT INTO users (email, password_hash, first_name, last_name, city)
@@ -363,17 +1167,18 @@ class EazySkoolDB:
             
             user_id = cursor.lastrowid
             conn.commit()
-            conn.close()
             return user_id
         except sqlite3.IntegrityError:
+            conn.rollback()
             print("Un utilisateur avec cet email existe déjà.")
             return None
         except Exception as e:
+            conn.rollback()
             print(f"Erreur lors de la création de l'utilisateur: {e}")
             return None
     
     def authenticate_user(self, email: str, password: str) -> Optional[Dict]:
-        """Authentifie un utilisateur"""
+        """Authentifie un utilisateur (PasswordHasherBusy si le pool bcrypt est saturé)"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -384,9 +1189,8 @@ class EazySkoolDB:
         """, (email,))
         
         row = cursor.fetchone()
-        conn.close()
         
-        if row and bcrypt.checkpw(password.encode('utf-8'), row[2].encode('utf-8')):
+        if row and password_hasher.check_password(password, row[2]):
             return {
                 'id': row[0],
                 'email': row[1],
@@ -426,64 +1230,171 @@ class EazySkoolDB:
             }
             favorites.append(favorite)
         
-        conn.close()
         return favorites
     
     def add_favorite(self, user_id: int, school_id: int) -> bool:
         """Ajoute une école aux favoris"""
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
             
             cursor.execute("""
                 INSERT INTO favorites (user_id, school_id)
                 VALUES (?, ?)
             """, (user_id, school_id))
+            self._bump_favorites_version(cursor, user_id)
             
             conn.commit()
-            conn.close()
             return True
         except sqlite3.IntegrityError:
+            conn.rollback()
             print("Cette école est déjà dans vos favoris.")
             return False
         except Exception as e:
+            conn.rollback()
             print(f"Erreur lors de l'ajout aux favoris: {e}")
             return False
     
     def remove_favorite(self, user_id: int, school_id: int) -> bool:
         """Retire une école des favoris"""
+        conn = self.get_connection()
         try:
-            conn = self.get_connection()
             cursor = conn.cursor()
             
             cursor.execute("""
                 DELETE FROM favorites 
                 WHERE user_id = ? AND school_id = ?
             """, (user_id, school_id))
+            if cursor.rowcount:
+                self._bump_favorites_version(cursor, user_id)
             
             conn.commit()
-            conn.close()
             return True
         except Exception as e:
+            conn.rollback()
             print(f"Erreur lors de la suppression des favoris: {e}")
             return False
     
-    def get_events(self, limit: int = 10) -> List[Dict]:
-        """Récupère les événements à venir"""
+    @staticmethod
+    def _bump_favorites_version(cursor: sqlite3.Cursor, user_id: int) -> int:
+        """Incrémente la version des favoris de l'utilisateur (dans la transaction en cours)"""
+        cursor.execute("""
+            INSERT INTO favorite_versions (user_id, version) VALUES (?, 1)
+            ON CONFLICT (user_id) DO UPDATE SET version = version + 1
+        """, (user_id,))
+        cursor.execute("SELECT version FROM favorite_versions WHERE user_id = ?", (user_id,))
+        return cursor.fetchone()[0]
+    
+    def sync_favorites(self, user_id: int, school_ids: List[int], version: Optional[int] = None) -> Optional[Dict]:
+        """
+        Fusionne l'ensemble complet des favoris d'un client avec ceux de la base, en une transaction.
+        
+        `version` est celle renvoyée au client par sa dernière synchronisation : si elle est à jour,
+        l'ensemble du client fait foi (ajouts et retraits) ; périmée ou absente (nouvel appareil),
+        les deux ensembles sont réunis sans rien retirer. Les écoles inconnues sont ignorées.
+        Retourne {'school_ids', 'version', 'added', 'removed'}, ou None en cas d'erreur.
+        """
         conn = self.get_connection()
-        cursor = conn.cursor()
+        try:
+            cursor = conn.cursor()
+            # Verrou d'écriture pris dès la lecture : deux synchronisations ne s'entrelacent pas
+            cursor.execute("BEGIN IMMEDIATE")
+            
+            cursor.execute("SELECT version FROM favorite_versions WHERE user_id = ?", (user_id,))
+            row = cursor.fetchone()
+            current_version = row[0] if row else 0
+            cursor.execute("SELECT school_id FROM favorites WHERE user_id = ?", (user_id,))
+            current = {row[0] for row in cursor.fetchall()}
+            
+            known = set()
+            if school_ids:
+                cursor.execute(f"SELECT id FROM schools WHERE id IN ({', '.join('?' * len(school_ids))})",
+                               list(school_ids))
+                known = {row[0] for row in cursor.fetchall()}
+            added = [school_id for school_id in school_ids if school_id in known and school_id not in current]
+            removed = []
+            if version == current_version:
+                wanted = set(school_ids)
+                removed = [school_id for school_id in current if school_id not in wanted]
+            
+            cursor.executemany("INSERT INTO favorites (user_id, school_id) VALUES (?, ?)",
+                               [(user_id, school_id) for school_id in added])
+            cursor.executemany("DELETE FROM favorites WHERE user_id = ? AND school_id = ?",
+                               [(user_id, school_id) for school_id in removed])
+            if added or removed:
+                current_version = self._bump_favorites_version(cursor, user_id)
+            
+            cursor.execute("""
+                SELECT school_id FROM favorites
+                WHERE user_id = ?
+                ORDER BY created_at DESC, id DESC
+            """, (user_id,))
+            merged = [row[0] for row in cursor.fetchall()]
+            
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Erreur lors de la synchronisation des favoris: {e}")
+            return None
         
-        cursor.execute("""
+        return {
+            'school_ids': merged,
+            'version': current_version,
+            'added': len(added),
+            'removed': len(removed)
+        }
+    
+    def list_events(self, date_from: str, date_to: str = None, school_id: int = None, city: str = None,
+                    limit: int = DEFAULT_EVENTS_LIMIT, after: str = None) -> Dict:
+        """
+        Page d'événements du `date_from` au `date_to` inclus (AAAA-MM-JJ), dans l'ordre
+        (date, heure, id), éventuellement d'une école ou d'une ville.
+        
+        `after` est le curseur `next_cursor` de la page précédente : la lecture reprend dans
+        l'index (event_date, event_time, id) à partir de sa date, sans relire les pages servies
+        ni les événements passés, quel que soit l'historique du calendrier.
+        """
+        conditions = ["e.event_date >= ?"]
+        params = [date_from]
+        if after:
+            last_date, last_time, last_id = decode_cursor(after)
+            # La date du curseur borne la plage lue ; l'heure et l'id départagent ce jour-là
+            # (heure absente = NULL, classée en premier)
+            params[0] = max(date_from, last_date)
+            if last_time is None:
+                conditions.append("(e.event_date > ? OR e.event_time IS NOT NULL OR e.id > ?)")
+                params.extend([last_date, last_id])
+            else:
+                conditions.append("(e.event_date, e.event_time, e.id) > (?, ?, ?)")
+                params.extend([last_date, last_time, last_id])
+        if date_to:
+            conditions.append("e.event_date <= ?")
+            params.append(date_to)
+        if school_id is not None:
+            conditions.append("e.school_id = ?")
+            params.append(school_id)
+        if city:
+            conditions.append("""e.school_id IN (
+                SELECT s2.id FROM schools s2 JOIN cities c ON s2.city_id = c.id WHERE c.name = ?
+            )""")
+            params.append(city)
+        
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        # Une ligne de plus que demandé indique s'il existe une page suivante
+        cursor.execute(f"""
             SELECT e.id, e.title, e.description, e.event_date, e.event_time,
-                   e.location, e.is_online, s.name as school_name
+                   e.location, e.is_online, e.school_id, s.name as school_name
             FROM events e
             LEFT JOIN schools s ON e.school_id = s.id
-            WHERE e.event_date >= date('now')
-            ORDER BY e.event_date ASC
+            WHERE {" AND ".join(conditions)}
+            ORDER BY e.event_date ASC, e.event_time ASC, e.id ASC
             LIMIT ?
-        """, (limit,))
+        """, params + [limit + 1])
         
         rows = cursor.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
         events = []
         for row in rows:
             event = {
@@ -494,24 +1405,149 @@ class EazySkoolDB:
                 'event_time': row[4],
                 'location': row[5],
                 'is_online': bool(row[6]),
-                'school_name': row[7]
+                'school_id': row[7],
+                'school_name': row[8]
             }
             events.append(event)
         
-        conn.close()
-        return events
-    
-    def export_to_json(self, filename: str = "schools_data.json"):
-        """Exporte toutes les données en JSON"""
-        data = {
-            'schools': self.get_all_schools(),
-            'cities': self.get_cities(),
-            'school_types': self.get_school_types(),
-            'events': self.get_events(20)
+        return {
+            'data': events,
+            'next_cursor': encode_cursor([rows[-1][3], rows[-1][4], rows[-1][0]]) if has_more else None
         }
+    
+    def archive_past_events(self, before: str = None) -> int:
+        """
+        Déplace dans events_archive les événements antérieurs à `before` (AAAA-MM-JJ, par défaut
+        il y a EVENTS_ARCHIVE_AFTER_DAYS jours) : la table events ne garde que le calendrier
+        utile. Retourne le nombre d'événements archivés.
+        """
+        if before is None:
+            before = (date.today() - timedelta(days=EVENTS_ARCHIVE_AFTER_DAYS)).isoformat()
+        conn = self.get_connection()
+        try:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                INSERT INTO events_archive (id, title, description, event_date, event_time,
+                                            location, school_id, is_online, created_at)
+                SELECT id, title, description, event_date, event_time,
+                       location, school_id, is_online, created_at
+                FROM events
+                WHERE event_date < ?
+            """, (before,))
+            cursor.execute("DELETE FROM events WHERE event_date < ?", (before,))
+            archived = cursor.rowcount
+            
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            print(f"Erreur lors de l'archivage des événements: {e}")
+            return 0
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        if archived:
+            self.invalidate_cache(CACHE_KEY_EVENTS)
+        return archived
+    
+    def _audit_probes(self) -> List[AuditProbe]:
+        """Appels représentatifs de chaque requête de lecture, pour l'audit des plans"""
+        return [
+            ('get_all_schools', self._load_all_schools, True),
+            ('get_cities', self._load_cities, True),
+            ('get_school_types', self._load_school_types, True),
+            ('get_map_schools (grille)', self._load_map_grid, True),
+            ('get_search_facets (index)', self._load_facet_index, True),
+            # L'index (lecture complète, en cache) a sa propre sonde : ici, la requête de chaque recherche
+            ('get_search_facets', lambda: self._search_hits_bitmap('ecole'), False),
+            ('get_autocomplete_entries', self.get_autocomplete_entries, True),
+            ('get_fuzzy_entries', self.get_fuzzy_entries, True),
+            ('get_school_by_id', lambda: self.get_school_by_id(1), False),
+            ('list_schools', lambda: self.list_schools(), False),
+            ('list_schools (curseur)', lambda: self.list_schools(after=encode_cursor([5, 1])), False),
+            ('list_schools (ville, type)', lambda: self.list_schools(city='Strasbourg', school_type='Université'), False),
+            ('list_schools (recherche)', lambda: self.list_schools('ecole'), False),
+            ('search_schools', lambda: self.search_schools('ecole', 'Strasbourg'), False),
+            ('get_school_images', lambda: self.get_school_images(1), False),
+            ('list_school_reviews', lambda: self.list_school_reviews(1), False),
+            ('list_school_reviews (curseur)',
+             lambda: self.list_school_reviews(1, after=encode_cursor(['2024-01-01 00:00:00', 1])), False),
+            ('get_school_detail', lambda: self.get_school_detail(1, SCHOOL_INCLUDES), False),
+            ('get_schools_by_ids', lambda: self.get_schools_by_ids([1, 2, 3]), False),
+            ('get_nearby_schools', lambda: self.get_nearby_schools(48.58, 7.75, 10), False),
+            ('get_map_schools', lambda: self.get_map_schools((48.5, 48.7, 7.6, 7.9), MAP_CLUSTER_MAX_ZOOM + 2), False),
+            ('authenticate_user', lambda: self.authenticate_user('audit@eazyskool.invalid', ''), False),
+            ('get_user_favorites', lambda: self.get_user_favorites(1), False),
+            ('list_events', lambda: self.list_events(date.today().isoformat()), False),
+            ('list_events (curseur)',
+             lambda: self.list_events('2024-01-01', after=encode_cursor(['2024-09-27', '14:00:00', 1])), False),
+            ('list_events (école)', lambda: self.list_events('2024-01-01', school_id=1), False),
+            ('list_events (ville)', lambda: self.list_events('2024-01-01', city='Strasbourg'), False),
+        ]
+    
+    def audit_query_plans(self) -> List[Dict]:
+        """
+        Exécute chaque sonde en traçant ses requêtes, puis passe chaque SELECT dans
+        EXPLAIN QUERY PLAN pour signaler les parcours complets de table.
+        """
+        conn = self.get_connection()
+        report = []
+        
+        for name, probe, full_scan_expected in self._audit_probes():
+            statements = []
+            conn.set_trace_callback(statements.append)
+            try:
+                probe()
+            finally:
+                conn.set_trace_callback(None)
+            
+            scans = []
+            for statement in statements:
+                if statement.lstrip().upper().startswith('SELECT'):
+                    scans.extend(sqlite_full_scans(conn, statement))
+            
+            report.append({
+                'name': name,
+                'queries': len(statements),
+                'scans': scans,
+                'full_scan_expected': full_scan_expected
+            })
+        
+        return report
+    
+    def iter_export(self, fetch_size: int = EXPORT_FETCH_SIZE) -> Iterator[ExportRecord]:
+        """
+        Parcourt les données exportées, (table, ligne), lues par lots de `fetch_size` lignes
+        dans une seule transaction de lecture : la mémoire utilisée ne dépend pas du volume.
+        """
+        with self.read_transaction() as conn:
+            for table, query in EXPORT_QUERIES:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute(query)
+                    columns = [column[0] for column in cursor.description]
+                    while True:
+                        rows = cursor.fetchmany(fetch_size)
+                        if not rows:
+                            break
+                        for row in rows:
+                            record = dict(zip(columns, row))
+                            if table == 'schools':
+                                record['specializations'] = (record['specializations'].split(',')
+                                                             if record['specializations'] else [])
+                            elif table == 'events':
+                                record['is_online'] = bool(record['is_online'])
+                            yield table, record
+                finally:
+                    cursor.close()
+    
+    def export_ndjson(self, filename: str = "schools_data.ndjson") -> int:
+        """Exporte toutes les données en NDJSON (gzip si le nom finit par .gz), en flux"""
+        written = write_chunks(filename, ndjson_chunks(self.iter_export()))
+        print(f"Données exportées vers {filename}")
+        return written
+    
+    def export_to_json(self, filename: str = "schools_data.json"):
+        """Exporte toutes les données en JSON (un tableau par table), écrit au fil de la lecture"""
+        write_chunks(filename, json_document_chunks(self.iter_export()))
         
         print(f"Données exportées vers {filename}")
 
@@ -539,4 +1575,13 @@ def main():
     print("Tests terminés avec succès !")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    if len(sys.argv) > 1 and sys.argv[1] == 'recompute-ratings':
+        # python database_manager.py recompute-ratings
+        updated = EazySkoolDB().recompute_rating_aggregates()
+        print(f"Notes recalculées pour {updated} écoles")
+    elif len(sys.argv) > 1 and sys.argv[1] == 'archive-events':
+        # python database_manager.py archive-events [AAAA-MM-JJ]
+        archived = EazySkoolDB().archive_past_events(sys.argv[2] if len(sys.argv) > 2 else None)
+        print(f"{archived} événements archivés")
+    else:
+        main() 
\ No newline at end of file
@@ -26,7 +26,9 @@ CREATE TABLE school_types (
 CREATE TABLE cities (
     id INT AUTO_INCREMENT PRIMARY KEY,
     name VARCHAR(100) NOT NULL,
-    region VARCHAR(100)
+    region VARCHAR(100),
+    latitude DECIMAL(10, 8),
+    longitude DECIMAL(11, 8)
 );
 
 -- Table des écoles
@@ -42,6 +44,8 @@ CREATE TABLE schools (
     school_type_id INT,
     rating DECIMAL(3,2) DEFAULT 0.00,
     price_range VARCHAR(50),
+    latitude DECIMAL(10, 8),
+    longitude DECIMAL(11, 8),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     FOREIGN KEY (city_id) REFERENCES cities(id),
@@ -122,13 +126,13 @@ INSERT INTO school_types (name, description) VALUES
 ('École de droit', 'Formation en droit et sciences juridiques');
 
 -- Villes
-INSERT INTO cities (name, region) VALUES
-('Strasbourg', 'Grand Est'),
-('Nancy', 'Grand Est'),
-('Metz', 'Grand Est'),
-('Reims', 'Grand Est'),
-('Troyes', 'Grand Est'),
-('Châlons-en-Champagne', 'Grand Est');
+INSERT INTO cities (name, region, latitude, longitude) VALUES
+('Strasbourg', 'Grand Est', 48.5839, 7.7455),
+('Nancy', 'Grand Est', 48.6921, 6.1844),
+('Metz', 'Grand Est', 49.1193, 6.1757),
+('Reims', 'Grand Est', 49.2583, 4.0317),
+('Troyes', 'Grand Est', 48.2973, 4.0744),
+('Châlons-en-Champagne', 'Grand Est', 48.9566, 4.3631);
 
 -- Spécialisations
 INSERT INTO specializations (name, description) VALUES
@@ -142,15 +146,15 @@ INSERT INTO specializations (name, description) VALUES
 ('Droit', 'Formation en droit et législation');
 
 -- Écoles
-INSERT INTO schools (name, description, address, phone, email, website, city_id, school_type_id, rating, price_range) VALUES
-('EM Strasbourg', 'École de management de Strasbourg', '61 Avenue de la Forêt-Noire, 67085 Strasbourg', '03 88 41 77 77', 'contact@em-strasbourg.eu', 'https://www.em-strasbourg.eu', 1, 1, 4.5, '8000-12000€'),
-('INSA Strasbourg', 'Institut National des Sciences Appliquées', '24 Boulevard de la Victoire, 67084 Strasbourg', '03 88 14 47 00', 'contact@insa-strasbourg.fr', 'https://www.insa-strasbourg.fr', 1, 2, 4.3, '600€'),
-('ESAD Strasbourg', 'École Supérieure d\'Art Dramatique', '7 Rue de l\'Académie, 67000 Strasbourg', '03 88 25 69 74', 'contact@esad-stg.fr', 'https://www.esad-stg.fr', 1, 3, 4.1, '400€'),
-('ICN Business School', 'École de commerce à Nancy', '86 Rue du Sergent Blandan, 54003 Nancy', '03 54 50 25 00', 'contact@icn-artem.com', 'https://www.icn-artem.com', 2, 1, 4.2, '9000-11000€'),
-('CentraleSupélec Metz', 'École d\'ingénieur', '2 Rue Édouard Belin, 57070 Metz', '03 87 34 69 00', 'contact@centralesupelec.fr', 'https://www.centralesupelec.fr', 3, 2, 4.4, '600€'),
-('NEOMA Business School', 'École de commerce à Reims', '59 Rue Pierre Taittinger, 51100 Reims', '03 26 77 46 00', 'contact@neoma-bs.fr', 'https://www.neoma-bs.fr', 4, 1, 4.0, '8500-11500€'),
-('UTT Troyes', 'Université de Technologie de Troyes', '12 Rue Marie Curie, 10004 Troyes', '03 25 71 76 00', 'contact@utt.fr', 'https://www.utt.fr', 5, 2, 4.2, '600€'),
-('ESC Troyes', 'École Supérieure de Commerce', '217 Avenue Pierre Brossolette, 10000 Troyes', '03 25 49 49 49', 'contact@esctroyes.fr', 'https://www.esctroyes.fr', 5, 1, 3.9, '7500-9500€');
+INSERT INTO schools (name, description, address, phone, email, website, city_id, school_type_id, rating, price_range, latitude, longitude) VALUES
+('EM Strasbourg', 'École de management de Strasbourg', '61 Avenue de la Forêt-Noire, 67085 Strasbourg', '03 88 41 77 77', 'contact@em-strasbourg.eu', 'https://www.em-strasbourg.eu', 1, 1, 4.5, '8000-12000€', 48.5794, 7.7659),
+('INSA Strasbourg', 'Institut National des Sciences Appliquées', '24 Boulevard de la Victoire, 67084 Strasbourg', '03 88 14 47 00', 'contact@insa-strasbourg.fr', 'https://www.insa-strasbourg.fr', 1, 2, 4.3, '600€', 48.5853, 7.7618),
+('ESAD Strasbourg', 'École Supérieure d\'Art Dramatique', '7 Rue de l\'Académie, 67000 Strasbourg', '03 88 25 69 74', 'contact@esad-stg.fr', 'https://www.esad-stg.fr', 1, 3, 4.1, '400€', 48.5866, 7.7554),
+('ICN Business School', 'École de commerce à Nancy', '86 Rue du Sergent Blandan, 54003 Nancy', '03 54 50 25 00', 'contact@icn-artem.com', 'https://www.icn-artem.com', 2, 1, 4.2, '9000-11000€', 48.6826, 6.1626),
+('CentraleSupélec Metz', 'École d\'ingénieur', '2 Rue Édouard Belin, 57070 Metz', '03 87 34 69 00', 'contact@centralesupelec.fr', 'https://www.centralesupelec.fr', 3, 2, 4.4, '600€', 49.104, 6.2196),
+('NEOMA Business School', 'École de commerce à Reims', '59 Rue Pierre Taittinger, 51100 Reims', '03 26 77 46 00', 'contact@neoma-bs.fr', 'https://www.neoma-bs.fr', 4, 1, 4.0, '8500-11500€', 49.2388, 4.0648),
+('UTT Troyes', 'Université de Technologie de Troyes', '12 Rue Marie Curie, 10004 Troyes', '03 25 71 76 00', 'contact@utt.fr', 'https://www.utt.fr', 5, 2, 4.2, '600€', 48.2693, 4.0667),
+('ESC Troyes', 'École Supérieure de Commerce', '217 Avenue Pierre Brossolette, 10000 Troyes', '03 25 49 49 49', 'contact@esctroyes.fr', 'https://www.esctroyes.fr', 5, 1, 3.9, '7500-9500€', 48.2877, 4.0797);
 
 -- Images d'écoles
 INSERT INTO school_images (school_id, image_url, is_primary) VALUES
@@ -212,6 +216,7 @@ JOIN schools s ON r.school_id = s.id;
 -- Création des index pour les performances
 CREATE INDEX idx_schools_city ON schools(city_id);
 CREATE INDEX idx_schools_type ON schools(school_type_id);
+CREATE INDEX idx_schools_location ON schools(latitude, longitude);
 CREATE INDEX idx_reviews_school ON reviews(school_id);
 CREATE INDEX idx_favorites_user ON favorites(user_id);
 CREATE INDEX idx_events_school ON events(school_id); 
\ No newline at end of file
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Export
+Export des données en flux : NDJSON (une ligne JSON par enregistrement), gzip en option,
+produit par morceaux à partir des lignes lues par lots, sans charger le catalogue en mémoire
+"""
+
+import zlib
+from itertools import chain
+from typing import Dict, Iterable, Iterator, Tuple
+
+from flask import Response, request
+
+from config import EXPORT_BUFFER_SIZE, COMPRESSION_GZIP_LEVEL
+from json_provider import dumps_bytes
+
+# Enregistrement produit par iter_export() des gestionnaires : (table, ligne)
+ExportRecord = Tuple[str, Dict]
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def _buffered(parts: Iterable[bytes], buffer_size: int) -> Iterator[bytes]:
+    """Regroupe les petits morceaux en blocs d'environ `buffer_size` octets"""
+    buffer = []
+    size = 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= buffer_size:
+            yield b''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield b''.join(buffer)
+
+
+def ndjson_chunks(records: Iterable[ExportRecord], buffer_size: int = EXPORT_BUFFER_SIZE) -> Iterator[bytes]:
+    """Lignes `{"table": ..., "row": {...}}` regroupées en blocs d'octets"""
+    return _buffered((dumps_bytes({'table': table, 'row': row}) + b'\n' for table, row in records), buffer_size)
+
+
+def json_document_chunks(records: Iterable[ExportRecord], buffer_size: int = EXPORT_BUFFER_SIZE) -> Iterator[bytes]:
+    """
+    Document `{"table": [ligne, ...], ...}` (format de schools_data.json) écrit au fil des lignes :
+    les enregistrements arrivent groupés par table
+    """
+    def parts():
+        current = None
+        yield b'{'
+        for table, row in records:
+            if table != current:
+                if current is not None:
+                    yield b'\n],'
+                yield b'\n' + dumps_bytes(table) + b': [\n' + dumps_bytes(row)
+                current = table
+            else:
+                yield b',\n' + dumps_bytes(row)
+        if current is not None:
+            yield b'\n]'
+        yield b'\n}\n'
+
+    return _buffered(parts(), buffer_size)
+
+
+def gzip_chunks(chunks: Iterable[bytes], level: int = COMPRESSION_GZIP_LEVEL) -> Iterator[bytes]:
+    """Compresse un flux d'octets au format gzip, morceau par morceau"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def write_chunks(filename: str, chunks: Iterable[bytes]) -> int:
+    """Écrit un flux d'octets dans un fichier (compressé en gzip si son nom finit par .gz)"""
+    if filename.endswith('.gz'):
+        chunks = gzip_chunks(chunks)
+    written = 0
+    with open(filename, 'wb') as f:
+        for chunk in chunks:
+            f.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def ndjson_response(records: Iterable[ExportRecord], filename: str = 'eazyskool_export.ndjson') -> Response:
+    """
+    Réponse HTTP en flux (transfert par morceaux), compressée en gzip si le client l'accepte.
+    Le premier bloc est produit avant l'envoi des en-têtes : une base indisponible donne
+    encore une réponse d'erreur à l'appelant.
+    """
+    chunks = ndjson_chunks(records)
+    chunks = chain([next(chunks, b'')], chunks)
+    encoding = request.accept_encodings.best_match(('gzip',))
+    if encoding:
+        chunks = gzip_chunks(chunks)
+
+    response = Response(chunks, mimetype=NDJSON_MIMETYPE)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
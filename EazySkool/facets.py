@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Facets
+Comptes par ville, type, région et spécialisation des résultats d'une recherche, calculés
+à partir de listes d'écoles précalculées pour chaque valeur (bitmaps : bit n = école n)
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Facettes exposées par l'API, dans l'ordre de la réponse
+FACETS = ('city', 'type', 'region', 'specialization')
+
+# Ligne de construction de l'index : (id de l'école, facette, valeur)
+FacetRow = Tuple[int, str, Optional[str]]
+
+
+def ids_bitmap(ids: Iterable[int]) -> int:
+    """Bitmap des identifiants donnés (construit octet par octet : un OR par id recopierait tout l'entier)"""
+    buffer = bytearray()
+    for school_id in ids:
+        index = school_id >> 3
+        if index >= len(buffer):
+            buffer.extend(bytes(index + 1 - len(buffer)))
+        buffer[index] |= 1 << (school_id & 7)
+    return int.from_bytes(buffer, 'little')
+
+
+class FacetIndex:
+    """
+    Pour chaque facette, valeur -> bitmap des écoles qui la portent. Les comptes d'une recherche
+    sont des intersections de bitmaps, sans requête GROUP BY par facette.
+
+    Construit une fois, ensuite lu sans verrou : il ne doit pas être modifié.
+    """
+
+    def __init__(self, rows: Iterable[FacetRow]):
+        ids: Dict[str, Dict[str, List[int]]] = {facet: {} for facet in FACETS}
+        all_ids = set()
+        for school_id, facet, value in rows:
+            all_ids.add(school_id)
+            if value is not None and facet in ids:
+                ids[facet].setdefault(value, []).append(school_id)
+        self.all = ids_bitmap(all_ids)
+        self.postings: Dict[str, Dict[str, int]] = {
+            facet: {value: ids_bitmap(value_ids) for value, value_ids in values.items()}
+            for facet, values in ids.items()
+        }
+
+    def _selection(self, facet: str, values: Iterable[str]) -> int:
+        """Écoles portant l'une des valeurs choisies (0 si aucune ne les porte)"""
+        postings = self.postings[facet]
+        bitmap = 0
+        for value in values:
+            bitmap |= postings.get(value, 0)
+        return bitmap
+
+    def counts(self, filters: Dict[str, List[str]], hits: Optional[int] = None,
+               facets: Iterable[str] = FACETS) -> Dict[str, List[Dict]]:
+        """
+        Comptes de chaque valeur des `facets` pour les écoles de `hits` (toutes si None) qui
+        respectent `filters` (facette -> valeurs acceptées). Les facettes sont disjonctives :
+        les comptes d'une facette ignorent son propre filtre, ce qui donne le nombre de
+        résultats obtenus en choisissant une autre valeur.
+        """
+        base = self.all if hits is None else hits & self.all
+        selections = {facet: self._selection(facet, values)
+                      for facet, values in filters.items() if facet in self.postings and values}
+
+        result = {}
+        for facet in facets:
+            scope = base
+            for other, selection in selections.items():
+                if other != facet:
+                    scope &= selection
+            chosen = set(filters.get(facet) or ())
+            values = []
+            for value, posting in self.postings[facet].items():
+                count = (posting & scope).bit_count()
+                if count or value in chosen:
+                    values.append({'value': value, 'count': count, 'selected': value in chosen})
+            # Valeur choisie qu'aucune école ne porte : rendue quand même, pour pouvoir la désélectionner
+            values.extend({'value': value, 'count': 0, 'selected': True}
+                          for value in chosen if value not in self.postings[facet])
+            values.sort(key=lambda item: (-item['count'], item['value']))
+            result[facet] = values
+        return result
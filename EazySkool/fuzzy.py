@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Fuzzy Search
+Recherche tolérante aux fautes de frappe : index de trigrammes en mémoire sur le nom, la ville,
+le type et les spécialisations des écoles (« Univeristé de Strasbourg », « Science Po »)
+"""
+
+import heapq
+import math
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from config import FUZZY_MIN_SIMILARITY, FUZZY_MAX_RESULTS
+from facets import ids_bitmap
+from live_index import LiveIndex
+from search import fold_text
+
+# Ligne fournie par les gestionnaires : (id, nom, ville, type, spécialisations séparées par des espaces, note)
+FuzzyRow = Tuple[int, str, Optional[str], Optional[str], Optional[str], Optional[float]]
+
+
+def trigrams(text: Optional[str]) -> FrozenSet[str]:
+    """Trigrammes des mots du texte replié, chaque mot bordé d'espaces (« ab » -> "  a", " ab", "ab ")"""
+    result = set()
+    for word in fold_text(text).split():
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(result)
+
+
+class _Document:
+    __slots__ = ('trigrams', 'city', 'school_type', 'order')
+
+    def __init__(self, row: FuzzyRow):
+        school_id, name, city, school_type, specializations, rating = row
+        self.trigrams = trigrams(' '.join(filter(None, (name, city, school_type, specializations))))
+        self.city = city
+        self.school_type = school_type
+        # À part égale de la recherche : la plus proche en taille (Jaccard), puis la mieux notée
+        self.order = (len(self.trigrams), -float(rating or 0), school_id)
+
+
+def _add_to_counter(slices: List[int], bitmap: int):
+    """Ajoute 1 au compteur de chaque école de `bitmap` (compteurs en tranches de bits, bit de poids faible d'abord)"""
+    carry = bitmap
+    for i, current in enumerate(slices):
+        slices[i] = current ^ carry
+        carry &= current
+        if not carry:
+            return
+    slices.append(carry)
+
+
+def _at_least(slices: List[int], universe: int, threshold: int) -> int:
+    """Bitmap des écoles dont le compteur vaut au moins `threshold`"""
+    if threshold >= 1 << len(slices):
+        return 0
+    greater, equal = 0, universe
+    for i in range(len(slices) - 1, -1, -1):
+        if threshold >> i & 1:
+            equal &= slices[i]
+        else:
+            greater |= equal & slices[i]
+            equal ^= equal & slices[i]
+    return greater | equal
+
+
+def _bitmap_ids(bitmap: int) -> List[int]:
+    """Identifiants des bits à 1"""
+    ids = []
+    for index, byte in enumerate(bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')):
+        while byte:
+            low = byte & -byte
+            ids.append(index * 8 + low.bit_length() - 1)
+            byte ^= low
+    return ids
+
+
+class TrigramIndex:
+    """
+    Bitmap des écoles de chaque trigramme (bit n = école n). Une recherche additionne les
+    bitmaps de ses trigrammes dans des compteurs en tranches de bits (quelques opérations sur
+    de grands entiers par trigramme, quel que soit le nombre d'écoles), puis lit les écoles
+    du meilleur niveau de similarité au plus faible jusqu'à en avoir assez.
+    """
+
+    def __init__(self):
+        self.postings: Dict[str, int] = {}
+        self.documents: Dict[int, _Document] = {}
+        self._cities: Dict[str, int] = {}
+        self._types: Dict[str, int] = {}
+
+    @classmethod
+    def build(cls, rows: Iterable[FuzzyRow]) -> 'TrigramIndex':
+        """Index complet : les bitmaps sont construits une fois à partir des listes d'identifiants"""
+        index = cls()
+        postings: Dict[str, List[int]] = {}
+        cities: Dict[str, List[int]] = {}
+        types: Dict[str, List[int]] = {}
+        for row in rows:
+            school_id = row[0]
+            document = index.documents[school_id] = _Document(row)
+            for trigram in document.trigrams:
+                postings.setdefault(trigram, []).append(school_id)
+            cities.setdefault(document.city, []).append(school_id)
+            types.setdefault(document.school_type, []).append(school_id)
+        index.postings = {trigram: ids_bitmap(ids) for trigram, ids in postings.items()}
+        index._cities = {city: ids_bitmap(ids) for city, ids in cities.items()}
+        index._types = {school_type: ids_bitmap(ids) for school_type, ids in types.items()}
+        return index
+
+    @staticmethod
+    def _toggle(bitmaps: Dict, key, bit: int):
+        bitmap = bitmaps.get(key, 0) ^ bit
+        if bitmap:
+            bitmaps[key] = bitmap
+        else:
+            bitmaps.pop(key, None)
+
+    def add(self, row: FuzzyRow):
+        school_id = row[0]
+        self.remove(school_id)
+        document = self.documents[school_id] = _Document(row)
+        bit = 1 << school_id
+        for trigram in document.trigrams:
+            self._toggle(self.postings, trigram, bit)
+        self._toggle(self._cities, document.city, bit)
+        self._toggle(self._types, document.school_type, bit)
+
+    def remove(self, school_id: int):
+        document = self.documents.pop(school_id, None)
+        if document is None:
+            return
+        bit = 1 << school_id
+        for trigram in document.trigrams:
+            self._toggle(self.postings, trigram, bit)
+        self._toggle(self._cities, document.city, bit)
+        self._toggle(self._types, document.school_type, bit)
+
+    def search(self, query: str, city: str = None, school_type: str = None,
+               limit: int = FUZZY_MAX_RESULTS, min_similarity: float = FUZZY_MIN_SIMILARITY) -> List[Tuple[int, float]]:
+        """
+        (id, similarité) des écoles les plus proches : part des trigrammes de la recherche
+        présents dans l'école (au moins `min_similarity`), puis similarité de Jaccard et note
+        pour départager
+        """
+        wanted = trigrams(query)
+        if not wanted:
+            return []
+        required = max(1, math.ceil(min_similarity * len(wanted)))
+        slices: List[int] = []
+        universe = 0
+        for trigram in wanted:
+            posting = self.postings.get(trigram, 0)
+            if posting:
+                _add_to_counter(slices, posting)
+                universe |= posting
+        if city:
+            universe &= self._cities.get(city, 0)
+        if school_type:
+            universe &= self._types.get(school_type, 0)
+
+        result = []
+        above = 0
+        for shared in range(len(wanted), required - 1, -1):
+            at_least = _at_least(slices, universe, shared)
+            level = at_least ^ above
+            above = at_least
+            if not level:
+                continue
+            similarity = round(shared / len(wanted), 3)
+            orders = heapq.nsmallest(limit - len(result), (self.documents[school_id].order
+                                                           for school_id in _bitmap_ids(level)))
+            result.extend((order[-1], similarity) for order in orders)
+            if len(result) >= limit:
+                break
+        return result
+
+
+class FuzzySearcher(LiveIndex):
+    """Index de trigrammes tenu à jour depuis les écoles de la base (get_fuzzy_entries)"""
+
+    def row_key(self, row: FuzzyRow) -> int:
+        return row[0]
+
+    def build(self, rows: Iterable[FuzzyRow]) -> TrigramIndex:
+        return TrigramIndex.build(rows)
+
+    def apply(self, index: TrigramIndex, removed: List[int], changed: List[FuzzyRow]):
+        for school_id in removed:
+            index.remove(school_id)
+        for row in changed:
+            index.add(row)
+
+    def search(self, query: str, city: str = None, school_type: str = None,
+               limit: int = FUZZY_MAX_RESULTS) -> List[Tuple[int, float]]:
+        return self.read(lambda index: index.search(query, city, school_type, limit), [])
@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Geo
+Distances à vol d'oiseau (haversine) et boîtes englobantes pour la recherche par proximité
+"""
+
+import math
+from typing import Optional, Tuple
+
+# Rayon moyen de la Terre (km)
+EARTH_RADIUS_KM = 6371.0088
+# Longueur d'un degré de latitude (km)
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def haversine_km(lat1: Optional[float], lon1: Optional[float],
+                 lat2: Optional[float], lon2: Optional[float]) -> Optional[float]:
+    """Distance en km entre deux points (None si une coordonnée manque)"""
+    if lat1 is None or lon1 is None or lat2 is None or lon2 is None:
+        return None
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """
+    (lat min, lat max, lon min, lon max) contenant le cercle de rayon `radius_km` : filtre
+    par index, la distance exacte départage ensuite. Près d'un pôle ou de l'antiméridien,
+    toutes les longitudes sont gardées.
+    """
+    dlat = radius_km / KM_PER_DEGREE
+    min_lat, max_lat = max(-90.0, lat - dlat), min(90.0, lat + dlat)
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat <= 1e-9:
+        return min_lat, max_lat, -180.0, 180.0
+    dlon = radius_km / (KM_PER_DEGREE * cos_lat)
+    if lon - dlon < -180 or lon + dlon > 180:
+        return min_lat, max_lat, -180.0, 180.0
+    return min_lat, max_lat, lon - dlon, lon + dlon
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool HTTP Cache
+Réponses du catalogue sérialisées une fois par version des données, servies avec ETag / 304
+"""
+
+import hashlib
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Hashable, Tuple
+
+from flask import Response, current_app, request
+
+from compression import compress, negotiate_encoding
+from config import COMPRESSION_MIN_SIZE
+
+
+class Snapshot:
+    """Corps JSON figé d'une réponse, ses validateurs HTTP et ses versions compressées"""
+
+    __slots__ = ('body', 'etag', 'last_modified', 'expires_at', '_encoded')
+
+    def __init__(self, body: bytes, etag: str, last_modified: datetime, expires_at: float):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.expires_at = expires_at
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: str) -> bytes:
+        """Corps compressé (niveau maximal), calculé une seule fois par encodage"""
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = compress(self.body, encoding, best=True)
+            self._encoded[encoding] = body
+        return body
+
+
+class SnapshotStore:
+    """
+    Réponses JSON du catalogue, par clé de cache (cache.py) et variante (ex. limite).
+
+    - une invalidation de la clé (écriture, import) fait reconstruire la réponse ;
+    - le TTL borne la fraîcheur si la base est modifiée sans invalidation ;
+    - l'ETag est un hash du contenu : une reconstruction identique garde le même ETag
+      (et la même date Last-Modified), les clients continuent de recevoir des 304 ;
+    - à chaque mise en cache, les réponses périmées des autres variantes de la clé sont
+      supprimées (ex. calendrier des jours passés) : le nombre d'entrées reste borné.
+    """
+
+    def __init__(self, ttl: float = 300.0):
+        self.ttl = ttl
+        self._snapshots: Dict[Tuple[str, Hashable], Snapshot] = {}
+        # Version du catalogue : incrémentée à chaque invalidation
+        self.version = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str, build: Callable[[], Any], variant: Hashable = None) -> Snapshot:
+        """
+        Retourne la réponse en cache, ou la construit (build() -> objet JSON) et la met en cache.
+        Une réponse vide est gardée comme les autres : en cas d'erreur, build() lève une exception.
+        """
+        now = time.monotonic()
+        with self._lock:
+            snapshot = self._snapshots.get((key, variant))
+            version = self.version
+        if snapshot is not None and snapshot.expires_at > now:
+            return snapshot
+
+        payload = build()
+        body = current_app.json.dumps(payload).encode('utf-8')
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        if snapshot is not None and snapshot.etag == etag:
+            last_modified = snapshot.last_modified
+        else:
+            last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        fresh = Snapshot(body, etag, last_modified, now + self.ttl)
+
+        with self._lock:
+            # Une invalidation pendant la construction rend cette réponse douteuse : servie, pas gardée
+            if version == self.version:
+                self._snapshots[(key, variant)] = fresh
+                stale = [snapshot_key for snapshot_key, snapshot in self._snapshots.items()
+                         if snapshot_key[0] == key and snapshot_key[1] != variant and snapshot.expires_at <= now]
+                for snapshot_key in stale:
+                    del self._snapshots[snapshot_key]
+        return fresh
+
+    def invalidate(self, *keys: str):
+        """Périme les réponses des clés indiquées (toutes si aucune clé)"""
+        with self._lock:
+            self.version += 1
+            for snapshot_key, snapshot in self._snapshots.items():
+                if not keys or snapshot_key[0] in keys:
+                    # Conservée périmée : la reconstruction compare son ETag à l'ancien
+                    snapshot.expires_at = 0.0
+
+
+def snapshot_response(snapshot: Snapshot) -> Response:
+    """
+    Réponse JSON avec ETag fort et Last-Modified ; 304 sans corps si le client est à jour.
+    Le corps est servi précompressé si le client accepte gzip ou Brotli.
+    """
+    encoding = negotiate_encoding() if len(snapshot.body) >= COMPRESSION_MIN_SIZE else None
+    if encoding:
+        response = Response(snapshot.encoded(encoding), mimetype='application/json')
+        response.headers['Content-Encoding'] = encoding
+        response.set_etag(f"{snapshot.etag}-{encoding}")
+    else:
+        response = Response(snapshot.body, mimetype='application/json')
+        response.set_etag(snapshot.etag)
+    response.vary.add('Accept-Encoding')
+    response.last_modified = snapshot.last_modified
+    # Le navigateur peut garder la réponse mais doit la revalider (If-None-Match) à chaque fois
+    response.cache_control.public = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
@@ -6,6 +6,8 @@ Script corrigé pour importer les tables MySQL
 import mysql.connector
 from mysql.connector import Error
 import os
+from cache import notify_cache_invalidation
+from config import CACHE_INVALIDATION_URL
 
 def create_database_and_tables():
     """Crée la base de données et les tables"""
@@ -66,7 +68,9 @@ def create_database_and_tables():
                 CREATE TABLE IF NOT EXISTS cities (
                     id INT AUTO_INCREMENT PRIMARY KEY,
                     name VARCHAR(100) NOT NULL,
-                    region VARCHAR(100)
+                    region VARCHAR(100),
+                    latitude DECIMAL(10, 8),
+                    longitude DECIMAL(11, 8)
                 )
             """)
             print("✅ Table 'cities' créée")
@@ -85,6 +89,8 @@ def create_database_and_tables():
                     school_type_id INT,
                     rating DECIMAL(3,2) DEFAULT 0.00,
                     price_range VARCHAR(50),
+                    latitude DECIMAL(10, 8),
+                    longitude DECIMAL(11, 8),
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
                     FOREIGN KEY (city_id) REFERENCES cities(id),
@@ -192,16 +198,16 @@ def create_database_and_tables():
             
             # Villes
             cities_data = [
-                ("Strasbourg", "Grand Est"),
-                ("Nancy", "Grand Est"),
-                ("Metz", "Grand Est"),
-                ("Reims", "Grand Est"),
-                ("Troyes", "Grand Est"),
-                ("Chalons-en-Champagne", "Grand Est")
+                ("Strasbourg", "Grand Est", 48.5839, 7.7455),
+                ("Nancy", "Grand Est", 48.6921, 6.1844),
+                ("Metz", "Grand Est", 49.1193, 6.1757),
+                ("Reims", "Grand Est", 49.2583, 4.0317),
+                ("Troyes", "Grand Est", 48.2973, 4.0744),
+                ("Chalons-en-Champagne", "Grand Est", 48.9566, 4.3631)
             ]
             
-            for name, region in cities_data:
-                cursor.execute("INSERT IGNORE INTO cities (name, region) VALUES (%s, %s)", (name, region))
+            for city in cities_data:
+                cursor.execute("INSERT IGNORE INTO cities (name, region, latitude, longitude) VALUES (%s, %s, %s, %s)", city)
             print("✅ Villes insérées")
             
             # Spécialisations
@@ -222,20 +228,20 @@ def create_database_and_tables():
             
             # Écoles
             schools_data = [
-                ("EM Strasbourg", "Ecole de management de Strasbourg", "61 Avenue de la Foret-Noire, 67085 Strasbourg", "03 88 41 77 77", "contact@em-strasbourg.eu", "https://www.em-strasbourg.eu", 1, 1, 4.5, "8000-12000€"),
-                ("INSA Strasbourg", "Institut National des Sciences Appliquees", "24 Boulevard de la Victoire, 67084 Strasbourg", "03 88 14 47 00", "contact@insa-strasbourg.fr", "https://www.insa-strasbourg.fr", 1, 2, 4.3, "600€"),
-                ("ESAD Strasbourg", "Ecole Superieure d'Art Dramatique", "7 Rue de l'Academie, 67000 Strasbourg", "03 88 25 69 74", "contact@esad-stg.fr", "https://www.esad-stg.fr", 1, 3, 4.1, "400€"),
-                ("ICN Business School", "Ecole de commerce a Nancy", "86 Rue du Sergent Blandan, 54003 Nancy", "03 54 50 25 00", "contact@icn-artem.com", "https://www.icn-artem.com", 2, 1, 4.2, "9000-11000€"),
-                ("CentraleSupelec Metz", "Ecole d'ingenieur", "2 Rue Edouard Belin, 57070 Metz", "03 87 34 69 00", "contact@centralesupelec.fr", "https://www.centralesupelec.fr", 3, 2, 4.4, "600€"),
-                ("NEOMA Business School", "Ecole de commerce a Reims", "59 Rue Pierre Taittinger, 51100 Reims", "03 26 77 46 00", "contact@neoma-bs.fr", "https://www.neoma-bs.fr", 4, 1, 4.0, "8500-11500€"),
-                ("UTT Troyes", "Universite de Technologie de Troyes", "12 Rue Marie Curie, 10004 Troyes", "03 25 71 76 00", "contact@utt.fr", "https://www.utt.fr", 5, 2, 4.2, "600€"),
-                ("ESC Troyes", "Ecole Superieure de Commerce", "217 Avenue Pierre Brossolette, 10000 Troyes", "03 25 49 49 49", "contact@esctroyes.fr", "https://www.esctroyes.fr", 5, 1, 3.9, "7500-9500€")
+                ("EM Strasbourg", "Ecole de management de Strasbourg", "61 Avenue de la Foret-Noire, 67085 Strasbourg", "03 88 41 77 77", "contact@em-strasbourg.eu", "https://www.em-strasbourg.eu", 1, 1, 4.5, "8000-12000€", 48.5794, 7.7659),
+                ("INSA Strasbourg", "Institut National des Sciences Appliquees", "24 Boulevard de la Victoire, 67084 Strasbourg", "03 88 14 47 00", "contact@insa-strasbourg.fr", "https://www.insa-strasbourg.fr", 1, 2, 4.3, "600€", 48.5853, 7.7618),
+                ("ESAD Strasbourg", "Ecole Superieure d'Art Dramatique", "7 Rue de l'Academie, 67000 Strasbourg", "03 88 25 69 74", "contact@esad-stg.fr", "https://www.esad-stg.fr", 1, 3, 4.1, "400€", 48.5866, 7.7554),
+                ("ICN Business School", "Ecole de commerce a Nancy", "86 Rue du Sergent Blandan, 54003 Nancy", "03 54 50 25 00", "contact@icn-artem.com", "https://www.icn-artem.com", 2, 1, 4.2, "9000-11000€", 48.6826, 6.1626),
+                ("CentraleSupelec Metz", "Ecole d'ingenieur", "2 Rue Edouard Belin, 57070 Metz", "03 87 34 69 00", "contact@centralesupelec.fr", "https://www.centralesupelec.fr", 3, 2, 4.4, "600€", 49.104, 6.2196),
+                ("NEOMA Business School", "Ecole de commerce a Reims", "59 Rue Pierre Taittinger, 51100 Reims", "03 26 77 46 00", "contact@neoma-bs.fr", "https://www.neoma-bs.fr", 4, 1, 4.0, "8500-11500€", 49.2388, 4.0648),
+                ("UTT Troyes", "Universite de Technologie de Troyes", "12 Rue Marie Curie, 10004 Troyes", "03 25 71 76 00", "contact@utt.fr", "https://www.utt.fr", 5, 2, 4.2, "600€", 48.2693, 4.0667),
+                ("ESC Troyes", "Ecole Superieure de Commerce", "217 Avenue Pierre Brossolette, 10000 Troyes", "03 25 49 49 49", "contact@esctroyes.fr", "https://www.esctroyes.fr", 5, 1, 3.9, "7500-9500€", 48.2877, 4.0797)
             ]
             
             for school in schools_data:
                 cursor.execute("""
-                    INSERT IGNORE INTO schools (name, description, address, phone, email, website, city_id, school_type_id, rating, price_range) 
-                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    INSERT IGNORE INTO schools (name, description, address, phone, email, website, city_id, school_type_id, rating, price_range, latitude, longitude) 
+                    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 """, school)
             print("✅ Écoles insérées")
             
@@ -305,6 +311,10 @@ def create_database_and_tables():
             cursor.close()
             connection.close()
             
+            # Le serveur API éventuellement démarré doit oublier l'ancien catalogue
+            if notify_cache_invalidation(CACHE_INVALIDATION_URL):
+                print("🔄 Cache du serveur API invalidé")
+            
             print("\n🎉 Base de données créée avec succès!")
             print("🌐 Accès phpMyAdmin: http://localhost/phpmyadmin")
             print("📊 Base de données: eazyskool")
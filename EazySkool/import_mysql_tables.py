@@ -1,14 +1,24 @@
 #!/usr/bin/env python3
 """
 Script pour importer automatiquement les tables MySQL pour EazySkool
+
+Usage : python import_mysql_tables.py [fichier.sql|.csv|.json|.ndjson ...] [--table TABLE]
+        [--batch-size N] [--chunk-size N] [--no-index-rebuild] [--restart]
+Un import interrompu reprend au dernier lot validé (fichier <source>.checkpoint.json).
 """
 
+import argparse
 import mysql.connector
 from mysql.connector import Error
 import os
+from bulk_import import BulkImporter, read_source
+from cache import notify_cache_invalidation
+from mysql_database_manager import FILL_SCHOOL_COORDINATES
+from config import CACHE_INVALIDATION_URL, BULK_IMPORT_BATCH_SIZE, BULK_IMPORT_CHUNK_SIZE, BULK_IMPORT_INDEX_MIN_ROWS
 
-def import_mysql_tables():
-    """Importe les tables MySQL depuis le fichier SQL"""
+def import_mysql_tables(sources=('eazyskool_mysql.sql',), table=None, batch_size=BULK_IMPORT_BATCH_SIZE,
+                        chunk_size=BULK_IMPORT_CHUNK_SIZE, rebuild_indexes=True, restart=False):
+    """Importe les tables MySQL depuis des fichiers SQL, CSV ou JSON (lus en flux, par lots)"""
     print("🗄️ Import des tables MySQL pour EazySkool")
     print("=" * 50)
     
@@ -42,36 +52,35 @@ def import_mysql_tables():
             # Sélectionner la base de données
             cursor.execute(f"USE {database}")
             
-            # Lire le fichier SQL
-            sql_file = 'eazyskool_mysql.sql'
-            if not os.path.exists(sql_file):
-                print(f"❌ Fichier {sql_file} non trouvé!")
-                return False
-            
-            print(f"📖 Lecture du fichier {sql_file}...")
-            with open(sql_file, 'r', encoding='utf-8') as f:
-                sql_script = f.read()
-            
-            # Exécuter le script SQL
-            print("🚀 Exécution du script SQL...")
-            
-            # Diviser le script en commandes individuelles
-            commands = sql_script.split(';')
-            
-            for i, command in enumerate(commands):
-                command = command.strip()
-                if command and not command.startswith('--'):
-                    try:
-                        cursor.execute(command)
-                        print(f"✅ Commande {i+1} exécutée")
-                    except Error as e:
-                        if "already exists" not in str(e).lower():
-                            print(f"⚠️ Commande {i+1}: {e}")
-            
-            # Valider les changements
-            connection.commit()
+            for source in sources:
+                if not os.path.exists(source):
+                    print(f"❌ Fichier {source} non trouvé!")
+                    return False
+            
+            for source in sources:
+                checkpoint_path = f"{source}.checkpoint.json"
+                if restart and os.path.exists(checkpoint_path):
+                    os.remove(checkpoint_path)
+                
+                # Lecture en flux : instructions et lignes insérées par lots, validées par tranches
+                print(f"🚀 Import de {source}...")
+                importer = BulkImporter(
+                    connection,
+                    batch_size=batch_size,
+                    chunk_size=chunk_size,
+                    index_min_rows=BULK_IMPORT_INDEX_MIN_ROWS if rebuild_indexes else None,
+                    checkpoint_path=checkpoint_path
+                )
+                importer.run(read_source(source, table), os.path.abspath(source))
+            
             print("✅ Toutes les tables ont été créées avec succès!")
             
+            # Écoles importées sans coordonnées : centre de leur ville (proximité et carte)
+            cursor.execute(FILL_SCHOOL_COORDINATES)
+            connection.commit()
+            if cursor.rowcount:
+                print(f"📍 {cursor.rowcount} écoles placées au centre de leur ville")
+            
             # Vérifier les tables créées
             cursor.execute("SHOW TABLES")
             tables = cursor.fetchall()
@@ -103,6 +112,10 @@ def import_mysql_tables():
             cursor.close()
             connection.close()
             
+            # Le serveur API éventuellement démarré doit oublier l'ancien catalogue
+            if notify_cache_invalidation(CACHE_INVALIDATION_URL):
+                print("🔄 Cache du serveur API invalidé")
+            
             print("\n🎉 Import terminé avec succès!")
             print("🌐 Accès phpMyAdmin: http://localhost/phpmyadmin")
             print("📊 Base de données: eazyskool")
@@ -133,11 +146,23 @@ def test_connection_after_import():
         return False
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import des tables MySQL pour EazySkool")
+    parser.add_argument('sources', nargs='*', default=['eazyskool_mysql.sql'],
+                        help="Fichiers .sql, .csv (table = nom du fichier), .json ou .ndjson")
+    parser.add_argument('--table', help="Table cible d'un fichier CSV / NDJSON / tableau JSON")
+    parser.add_argument('--batch-size', type=int, default=BULK_IMPORT_BATCH_SIZE, help="Lignes par executemany")
+    parser.add_argument('--chunk-size', type=int, default=BULK_IMPORT_CHUNK_SIZE, help="Lignes par transaction")
+    parser.add_argument('--no-index-rebuild', action='store_true',
+                        help="Conserver les index secondaires pendant les gros chargements")
+    parser.add_argument('--restart', action='store_true', help="Ignorer le point de reprise et tout réimporter")
+    args = parser.parse_args()
+    
     print("🎓 EazySkool - Import des tables MySQL")
     print("=" * 50)
     
     # Importer les tables
-    if import_mysql_tables():
+    if import_mysql_tables(args.sources, args.table, args.batch_size, args.chunk_size,
+                           not args.no_index_rebuild, args.restart):
         # Tester la connexion
         test_connection_after_import()
         
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool JSON
+Sérialisation JSON rapide (orjson si installé, sinon json) des types renvoyés par les bases
+"""
+
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # orjson est optionnel : repli sur le module json standard
+    orjson = None
+
+
+def json_default(obj: Any) -> Any:
+    """Types hors JSON renvoyés par SQLite / MySQL (DECIMAL, DATE, DATETIME, TIME)"""
+    if isinstance(obj, Decimal):
+        return float(obj)
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, timedelta):
+        # mysql-connector renvoie les colonnes TIME en timedelta : « 14:00:00 »
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Type non sérialisable en JSON: {type(obj).__name__}")
+
+
+def _orjson_options(indent: bool) -> int:
+    option = orjson.OPT_NON_STR_KEYS
+    if indent:
+        option |= orjson.OPT_INDENT_2
+    return option
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """JSON compact en UTF-8 (orjson si disponible), pour les exports écrits ligne à ligne"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, ensure_ascii=False, default=json_default, separators=(',', ':')).encode('utf-8')
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    Fournisseur JSON de Flask : orjson (dates natives, DECIMAL via json_default) si disponible,
+    sinon json avec json_default. Les lignes des bases sont sérialisées sans conversion préalable.
+    """
+
+    ensure_ascii = False
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is not None:
+            return orjson.dumps(obj, default=json_default,
+                                option=_orjson_options(bool(kwargs.get('indent')))).decode('utf-8')
+        kwargs.setdefault('default', json_default)
+        kwargs.setdefault('ensure_ascii', self.ensure_ascii)
+        kwargs.setdefault('sort_keys', self.sort_keys)
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args: Any, **kwargs: Any):
+        """jsonify() : avec orjson, les octets produits sont envoyés sans passer par str"""
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        body = orjson.dumps(obj, default=json_default, option=_orjson_options(indent))
+        return self._app.response_class(body, mimetype=self.mimetype)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Live Index
+Index en mémoire construits à partir de lignes lues en base, puis corrigés en arrière-plan après
+chaque invalidation du catalogue : seules les lignes modifiées sont retirées ou ajoutées
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, TypeVar
+
+from cache import CACHE_KEY_SCHOOLS, CACHE_KEY_CITIES
+
+T = TypeVar('T')
+
+
+class LiveIndex:
+    """
+    Base des index tenus à jour depuis `loader` (lignes de la base, None en cas d'erreur) :
+    construit à la première lecture, puis corrigé par un fil d'arrière-plan quand une clé de
+    `watched_keys` est invalidée, sans faire attendre les lectures.
+
+    Les sous-classes définissent row_key(), build() et apply().
+    """
+
+    # Clés de cache dont l'invalidation périme l'index
+    watched_keys = (CACHE_KEY_SCHOOLS, CACHE_KEY_CITIES)
+
+    def __init__(self, loader: Callable[[], Optional[Iterable[Sequence]]]):
+        self.loader = loader
+        self.index: Any = None
+        # Lignes indexées, comparées telles quelles à chaque relecture
+        self._rows: Dict[Hashable, tuple] = {}
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.RLock()
+        self._stale = threading.Event()
+        # Fil de mise à jour, démarré à la première invalidation et réveillé par les suivantes
+        self._refresher: Optional[threading.Thread] = None
+
+    def row_key(self, row: tuple) -> Hashable:
+        """Identifiant d'une ligne"""
+        raise NotImplementedError
+
+    def build(self, rows: Iterable[tuple]) -> Any:
+        """Index complet construit à partir des lignes"""
+        raise NotImplementedError
+
+    def apply(self, index: Any, removed: List[Hashable], changed: List[tuple]):
+        """Retire les lignes `removed` (clés) et ajoute ou remplace les lignes `changed`"""
+        raise NotImplementedError
+
+    def read(self, reader: Callable[[Any], T], default: T) -> T:
+        """Résultat de `reader(index)`, ou `default` si l'index n'a pas pu être construit"""
+        if self.index is None:
+            self.refresh()
+        with self._lock:
+            return reader(self.index) if self.index is not None else default
+
+    def refresh(self) -> bool:
+        """Relit les lignes et applique les différences à l'index (False si la lecture a échoué)"""
+        with self._refresh_lock:
+            self._stale.clear()
+            rows = self.loader()
+            if rows is None:
+                return False
+            current = {}
+            for row in rows:
+                row = tuple(row)
+                current[self.row_key(row)] = row
+            if self.index is None:
+                self.index = self.build(current.values())
+                self._rows = current
+                return True
+            # Seul refresh() modifie l'index : les différences se calculent hors du verrou des lectures
+            removed = [key for key in self._rows if key not in current]
+            changed = [row for key, row in current.items() if self._rows.get(key) != row]
+            self._rows = current
+            if removed or changed:
+                with self._lock:
+                    self.apply(self.index, removed, changed)
+            return True
+
+    def invalidate(self, *keys: str):
+        """Écouteur d'invalidation du cache : corrige l'index en arrière-plan si ses données changent"""
+        if keys and not set(self.watched_keys) & set(keys):
+            return
+        self._stale.set()
+        if self._refresher is None:
+            with self._refresh_lock:
+                if self._refresher is None:
+                    self._refresher = threading.Thread(target=self._refresh_loop, daemon=True)
+                    self._refresher.start()
+
+    def _refresh_loop(self):
+        # Plusieurs invalidations pendant une relecture : une seule relecture de plus ensuite
+        while True:
+            self._stale.wait()
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Erreur lors de la mise à jour de l'index {type(self).__name__}: {e}")
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Map Clusters
+Regroupement des écoles pour la carte : grille de cellules de tuiles Web Mercator précalculée
+pour chaque niveau de zoom, qui renvoie aux petites échelles un groupe par cellule visible
+plutôt que chaque école (réponse de taille bornée par la fenêtre, pas par le catalogue)
+"""
+
+import math
+from typing import Dict, Iterable, List, Tuple
+
+from config import MAP_CLUSTER_MAX_ZOOM, MAP_CLUSTER_CELL_SHIFT
+
+# Latitude limite de la projection Web Mercator (tuiles carrées)
+MAX_MERCATOR_LAT = 85.05112878
+
+# Point de la grille : (id, nom, latitude, longitude)
+MapPoint = Tuple[int, str, float, float]
+# Boîte de la fenêtre : (lat min, lat max, lon min, lon max)
+BoundingBox = Tuple[float, float, float, float]
+
+
+def cell_xy(lat: float, lon: float, level: int) -> Tuple[int, int]:
+    """Cellule (x, y) contenant le point dans la grille de 2^level x 2^level cellules"""
+    size = 1 << level
+    lat = max(-MAX_MERCATOR_LAT, min(MAX_MERCATOR_LAT, lat))
+    x = (lon + 180.0) / 360.0
+    y = (1.0 - math.asinh(math.tan(math.radians(lat))) / math.pi) / 2.0
+    return min(size - 1, max(0, int(x * size))), min(size - 1, max(0, int(y * size)))
+
+
+def map_point(school_id: int, name: str, lat: float, lon: float) -> Dict:
+    """Élément de réponse d'une école isolée, au même format qu'un groupe d'une école"""
+    return {
+        'id': school_id,
+        'name': name,
+        'latitude': lat,
+        'longitude': lon,
+        'count': 1
+    }
+
+
+class ClusterGrid:
+    """
+    Grille en quadtree : chaque école est placée une fois dans la cellule la plus fine, les
+    cellules des niveaux supérieurs s'en déduisent par décalage de bits. Une cellule garde
+    le nombre d'écoles, la somme de leurs coordonnées (centre du groupe) et une école
+    représentante (affichée telle quelle si elle est seule).
+
+    Construite une fois, ensuite lue sans verrou : elle ne doit pas être modifiée.
+    """
+
+    def __init__(self, points: Iterable[MapPoint], max_zoom: int = MAP_CLUSTER_MAX_ZOOM,
+                 cell_shift: int = MAP_CLUSTER_CELL_SHIFT):
+        self.max_zoom = max_zoom
+        self.cell_shift = cell_shift
+        deepest = max_zoom + cell_shift
+        # zoom -> {(x, y): [nombre, somme des latitudes, somme des longitudes, id, nom]}
+        self._levels: List[Dict[Tuple[int, int], list]] = [{} for _ in range(max_zoom + 1)]
+        self.size = 0
+        finest = self._levels[max_zoom]
+        for school_id, name, lat, lon in points:
+            if lat is None or lon is None:
+                continue
+            self._add(finest, cell_xy(lat, lon, deepest), [1, lat, lon, school_id, name])
+            self.size += 1
+        # Chaque niveau regroupe les cellules du niveau plus fin par quatre
+        for zoom in range(max_zoom - 1, -1, -1):
+            cells = self._levels[zoom]
+            for (x, y), cell in self._levels[zoom + 1].items():
+                self._add(cells, (x >> 1, y >> 1), list(cell))
+
+    @staticmethod
+    def _add(cells: Dict[Tuple[int, int], list], key: Tuple[int, int], cell: list):
+        current = cells.get(key)
+        if current is None:
+            cells[key] = cell
+        else:
+            current[0] += cell[0]
+            current[1] += cell[1]
+            current[2] += cell[2]
+
+    def clusters(self, bbox: BoundingBox, zoom: int) -> List[Dict]:
+        """
+        Groupes des cellules qui recoupent la fenêtre au zoom demandé (plafonné à max_zoom) :
+        `count`, `latitude`/`longitude` du centre, et `id`/`name` pour une école seule
+        """
+        zoom = max(0, min(zoom, self.max_zoom))
+        cells = self._levels[zoom]
+        min_lat, max_lat, min_lon, max_lon = bbox
+        level = zoom + self.cell_shift
+        min_x, min_y = cell_xy(max_lat, min_lon, level)
+        max_x, max_y = cell_xy(min_lat, max_lon, level)
+
+        if (max_x - min_x + 1) * (max_y - min_y + 1) <= len(cells):
+            # Fenêtre petite devant la grille : lecture des seules cellules visibles
+            visible = ((key, cells.get(key)) for key in
+                       ((x, y) for y in range(min_y, max_y + 1) for x in range(min_x, max_x + 1)))
+            visible = [(key, cell) for key, cell in visible if cell is not None]
+        else:
+            visible = [(key, cell) for key, cell in cells.items()
+                       if min_x <= key[0] <= max_x and min_y <= key[1] <= max_y]
+
+        result = []
+        for _, (count, lat_sum, lon_sum, school_id, name) in sorted(visible):
+            if count == 1:
+                result.append(map_point(school_id, name, lat_sum, lon_sum))
+            else:
+                result.append({
+                    'latitude': round(lat_sum / count, 6),
+                    'longitude': round(lon_sum / count, 6),
+                    'count': count
+                })
+        return result
+
@@ -1,15 +1,122 @@
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, g
 from flask_cors import CORS
-from mysql_database_manager import EazySkoolMySQLDB
+from mysql_database_manager import EazySkoolMySQLDB, SCHOOL_FIELDS, SCHOOL_SORTS, SCHOOL_INCLUDES
+from facets import FACETS
+from autocomplete import Autocompleter
+from fuzzy import FuzzySearcher
+from pagination import (wants_pagination, parse_list_args, parse_fields, parse_include, parse_ids, parse_limit,
+                        parse_location, parse_map_view, parse_facets, parse_fuzzy, parse_event_filters)
+from query_audit import print_audit_report
+from http_cache import SnapshotStore, snapshot_response
+from compression import init_compression
+from json_provider import FastJSONProvider
+from password_hashing import PasswordHasherBusy
+from auth_tokens import issue_tokens, verify_refresh_token, require_auth, TokenError
+from rate_limit import AuthGuard, RateLimited, rate_limited_response
+from export_stream import ndjson_response
+from cache import (CACHE_KEY_SCHOOLS, CACHE_KEY_CITIES, CACHE_KEY_SCHOOL_TYPES, CACHE_KEY_EVENTS,
+                   CACHE_INVALIDATION_HEADER, check_invalidation_secret, parse_invalidation_keys)
+from config import (QUERY_AUDIT_ON_STARTUP, CACHE_TTL, DEFAULT_REVIEWS_LIMIT, MAX_REVIEWS_LIMIT,
+                    NEARBY_DEFAULT_RADIUS_KM, NEARBY_MAX_RADIUS_KM, DEFAULT_NEARBY_LIMIT, MAX_NEARBY_LIMIT,
+                    MAP_MAX_ZOOM, DEFAULT_AUTOCOMPLETE_LIMIT, MAX_AUTOCOMPLETE_LIMIT,
+                    DEFAULT_EVENTS_LIMIT, MAX_EVENTS_LIMIT)
 import json
-from datetime import datetime
+from datetime import date, datetime
 
 app = Flask(__name__)
+app.json = FastJSONProvider(app)  # orjson si disponible ; dates et DECIMAL sans conversion préalable
 CORS(app)
+init_compression(app)  # gzip / Brotli selon Accept-Encoding
 
 # Initialisation de la base de données MySQL
 db = EazySkoolMySQLDB()
 
+# Réponses du catalogue sérialisées une fois par version (ETag / 304), périmées avec le cache
+snapshots = SnapshotStore(ttl=CACHE_TTL)
+db.add_invalidation_listener(snapshots.invalidate)
+
+# Suggestions de recherche en mémoire, corrigées après chaque modification des écoles
+autocompleter = Autocompleter(lambda: db.get_autocomplete_entries())
+db.add_invalidation_listener(autocompleter.invalidate)
+fuzzy_searcher = FuzzySearcher(lambda: db.get_fuzzy_entries())
+db.add_invalidation_listener(fuzzy_searcher.invalidate)
+
+# Admission des connexions / inscriptions (par IP, par email, vérifications simultanées)
+auth_guard = AuthGuard()
+
+def paginated_schools(query=None, city=None, school_type=None, facets=None, fuzzy='0'):
+    """
+    Réponse paginée (page/per_page ou curseur after, sort, order, fields) pour les listes d'écoles,
+    avec les comptes par facette s'ils sont fournis. Avec `fuzzy` (voir search_schools), les
+    résultats approchants sont découpés par page (pas de curseur : ils sont peu nombreux).
+    """
+    try:
+        options = parse_list_args(request.args, SCHOOL_SORTS)
+        fields = parse_fields(request.args.get('fields'), SCHOOL_FIELDS)
+        result = None
+        if fuzzy != '1' or not query:
+            result = db.list_schools(query, city, school_type, fields=fields, **options)
+        used_fuzzy = bool(query) and (result is None or (fuzzy == 'auto' and not result['total']))
+        if used_fuzzy:
+            matches = fuzzy_schools(query, city, school_type, fields)
+            start = (options['page'] - 1) * options['per_page']
+            result = {
+                'data': matches[start:start + options['per_page']],
+                'page': options['page'],
+                'per_page': options['per_page'],
+                'total': len(matches),
+                'next_cursor': None
+            }
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    payload = {
+        'success': True,
+        'data': result['data'],
+        'count': len(result['data']),
+        'fuzzy': used_fuzzy,
+        'pagination': {
+            'page': result['page'],
+            'per_page': result['per_page'],
+            'total': result['total'],
+            'next_cursor': result['next_cursor']
+        }
+    }
+    if facets is not None:
+        payload['facets'] = facets
+    return jsonify(payload)
+
+def schools_by_ids(raw_ids):
+    """Réponse des écoles demandées par identifiant (ids=1,4,9 ou corps JSON {"ids": [...]})"""
+    try:
+        ids = parse_ids(raw_ids)
+        fields = parse_fields(request.args.get('fields'), SCHOOL_FIELDS)
+        schools = db.get_schools_by_ids(ids, fields)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    found = {school['id'] for school in schools}
+    return jsonify({
+        'success': True,
+        'data': schools,
+        'count': len(schools),
+        'missing': [school_id for school_id in ids if school_id not in found]
+    })
+
+def fuzzy_schools(query, city=None, school_type=None, fields=None):
+    """Écoles proches de la recherche malgré les fautes de frappe, de la plus semblable à la moins semblable"""
+    similarity = dict(fuzzy_searcher.search(query, city, school_type))
+    schools = db.get_schools_by_ids(list(similarity), fields)
+    for school in schools:
+        school['similarity'] = similarity[school['id']]
+    return schools
+
 @app.route('/')
 def home():
     """Page d'accueil de l'API"""
@@ -23,14 +130,92 @@ def home():
 # Endpoints pour les écoles
 @app.route('/api/schools', methods=['GET'])
 def get_schools():
-    """Récupère toutes les écoles"""
+    """
+    Récupère toutes les écoles (paginées si page, per_page, after, sort, order ou fields sont fournis,
+    ou seulement celles de ids=1,4,9)
+    """
     try:
-        schools = db.get_all_schools()
+        if 'ids' in request.args:
+            return schools_by_ids(request.args.get('ids'))
+        if wants_pagination(request.args):
+            return paginated_schools()
+        
+        def build():
+            schools = db.get_all_schools()
+            return {
+                'success': True,
+                'data': schools,
+                'count': len(schools)
+            }
+        
+        return snapshot_response(snapshots.get(CACHE_KEY_SCHOOLS, build))
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/schools/batch', methods=['POST'])
+def get_schools_batch():
+    """Récupère plusieurs écoles par identifiant : {"ids": [1, 4, 9]} (listes trop longues pour l'URL)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        return schools_by_ids(data.get('ids'))
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/schools/nearby', methods=['GET'])
+def get_nearby_schools():
+    """Écoles autour d'un point : lat, lon, radius_km (km) et limit, de la plus proche à la plus éloignée"""
+    try:
+        lat, lon, radius_km = parse_location(request.args, NEARBY_DEFAULT_RADIUS_KM, NEARBY_MAX_RADIUS_KM)
+        limit = parse_limit(request.args, DEFAULT_NEARBY_LIMIT, MAX_NEARBY_LIMIT)
+        schools = db.get_nearby_schools(lat, lon, radius_km, limit)
         return jsonify({
             'success': True,
             'data': schools,
-            'count': len(schools)
+            'count': len(schools),
+            'center': {'lat': lat, 'lon': lon},
+            'radius_km': radius_km
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/schools/map', methods=['GET'])
+def get_map_schools():
+    """
+    Écoles de la fenêtre de carte : bbox=lon_min,lat_min,lon_max,lat_max et zoom. Aux petites
+    échelles, groupes précalculés (`count` écoles autour de latitude/longitude) plutôt que chaque école.
+    """
+    try:
+        bbox, zoom = parse_map_view(request.args, MAP_MAX_ZOOM)
+        result = db.get_map_schools(bbox, zoom)
+        min_lat, max_lat, min_lon, max_lon = bbox
+        return jsonify({
+            'success': True,
+            'data': result['data'],
+            'count': len(result['data']),
+            'clustered': result['clustered'],
+            'truncated': result['truncated'],
+            'zoom': zoom,
+            'bbox': [min_lon, min_lat, max_lon, max_lat]
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -39,9 +224,13 @@ def get_schools():
 
 @app.route('/api/schools/<int:school_id>', methods=['GET'])
 def get_school(school_id):
-    """Récupère une école par ID"""
+    """
+    Récupère une école par ID, avec les relations de `include`
+    (images, reviews, events, specializations) lues dans la même transaction
+    """
     try:
-        school = db.get_school_by_id(school_id)
+        include = parse_include(request.args.get('include'), SCHOOL_INCLUDES) or []
+        school = db.get_school_detail(school_id, include)
         if school:
             return jsonify({
                 'success': True,
@@ -52,6 +241,11 @@ def get_school(school_id):
                 'success': False,
                 'error': 'École non trouvée'
             }), 404
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -60,7 +254,11 @@ def get_school(school_id):
 
 @app.route('/api/schools/search', methods=['GET'])
 def search_schools():
-    """Recherche des écoles"""
+    """
+    Recherche des écoles (avec facets=1 ou facets=city,type,... : comptes par facette des résultats).
+    fuzzy=auto (par défaut) répond par la recherche tolérante aux fautes si la recherche exacte
+    ne trouve rien ; fuzzy=1 l'utilise toujours, fuzzy=0 jamais.
+    """
     query = request.args.get('q', '')
     if not query:
         return jsonify({
@@ -69,13 +267,57 @@ def search_schools():
         }), 400
     
     try:
-        schools = db.search_schools(query)
-        return jsonify({
+        fuzzy = parse_fuzzy(request.args)
+        facet_names = parse_facets(request.args.get('facets'), FACETS)
+        if wants_pagination(request.args):
+            city, school_type = request.args.get('city'), request.args.get('type')
+            facets = db.get_search_facets(query, city, school_type, facet_names) if facet_names else None
+            return paginated_schools(query, city, school_type, facets, fuzzy)
+        
+        # Sans pagination, la recherche ne filtre ni par ville ni par type : les facettes non plus
+        schools = db.search_schools(query) if fuzzy != '1' else []
+        used_fuzzy = fuzzy == '1' or (fuzzy == 'auto' and not schools)
+        if used_fuzzy:
+            schools = fuzzy_schools(query)
+        response = {
             'success': True,
             'data': schools,
             'count': len(schools),
+            'fuzzy': used_fuzzy,
+            'query': query
+        }
+        if facet_names:
+            response['facets'] = db.get_search_facets(query, facets=facet_names)
+        return jsonify(response)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/autocomplete', methods=['GET'])
+def autocomplete():
+    """Suggestions à la frappe : écoles, villes et spécialisations dont un mot commence par q"""
+    try:
+        query = request.args.get('q', '')
+        limit = parse_limit(request.args, DEFAULT_AUTOCOMPLETE_LIMIT, MAX_AUTOCOMPLETE_LIMIT)
+        suggestions = autocompleter.suggest(query, limit)
+        return jsonify({
+            'success': True,
+            'data': suggestions,
+            'count': len(suggestions),
             'query': query
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -87,11 +329,11 @@ def search_schools():
 def get_cities():
     """Récupère toutes les villes"""
     try:
-        cities = db.get_cities()
-        return jsonify({
+        snapshot = snapshots.get(CACHE_KEY_CITIES, lambda: {
             'success': True,
-            'data': cities
+            'data': db.get_cities()
         })
+        return snapshot_response(snapshot)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -102,11 +344,11 @@ def get_cities():
 def get_school_types():
     """Récupère tous les types d'écoles"""
     try:
-        types = db.get_school_types()
-        return jsonify({
+        snapshot = snapshots.get(CACHE_KEY_SCHOOL_TYPES, lambda: {
             'success': True,
-            'data': types
+            'data': db.get_school_types()
         })
+        return snapshot_response(snapshot)
     except Exception as e:
         return jsonify({
             'success': False,
@@ -132,13 +374,25 @@ def get_school_images(school_id):
 # Endpoints pour les avis
 @app.route('/api/schools/<int:school_id>/reviews', methods=['GET'])
 def get_school_reviews(school_id):
-    """Récupère les avis d'une école"""
+    """Avis d'une école, du plus récent au plus ancien : `limit`, curseur `after` et résumé des notes"""
     try:
-        reviews = db.get_school_reviews(school_id)
+        limit = parse_limit(request.args, DEFAULT_REVIEWS_LIMIT, MAX_REVIEWS_LIMIT)
+        result = db.list_school_reviews(school_id, limit, request.args.get('after') or None)
         return jsonify({
             'success': True,
-            'data': reviews
+            'data': result['data'],
+            'count': len(result['data']),
+            'summary': result['summary'],
+            'pagination': {
+                'limit': limit,
+                'next_cursor': result['next_cursor']
+            }
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -146,11 +400,12 @@ def get_school_reviews(school_id):
         }), 500
 
 @app.route('/api/reviews', methods=['POST'])
+@require_auth
 def add_review():
-    """Ajoute un avis"""
+    """Ajoute un avis de l'utilisateur authentifié"""
     try:
         data = request.get_json()
-        required_fields = ['school_id', 'user_id', 'rating', 'comment']
+        required_fields = ['school_id', 'rating', 'comment']
         
         for field in required_fields:
             if field not in data:
@@ -161,7 +416,7 @@ def add_review():
         
         success = db.add_review(
             data['school_id'],
-            data['user_id'],
+            g.user_id,
             data['rating'],
             data['comment']
         )
@@ -197,13 +452,14 @@ def register():
                     'error': f'Champ requis manquant: {field}'
                 }), 400
         
-        user_id = db.create_user(
-            data['email'],
-            data['password'],
-            data.get('first_name'),
-            data.get('last_name'),
-            data.get('city')
-        )
+        with auth_guard.register(request.remote_addr):
+            user_id = db.create_user(
+                data['email'],
+                data['password'],
+                data.get('first_name'),
+                data.get('last_name'),
+                data.get('city')
+            )
         
         if user_id:
             return jsonify({
@@ -216,6 +472,17 @@ def register():
                 'success': False,
                 'error': 'Erreur lors de la création de l\'utilisateur'
             }), 500
+    except RateLimited as e:
+        # Refus sans lecture en base ni bcrypt
+        return rate_limited_response(e)
+    except PasswordHasherBusy as e:
+        # Pool bcrypt saturé : les lectures du catalogue continuent d'être servies
+        response = jsonify({
+            'success': False,
+            'error': str(e)
+        })
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
     except Exception as e:
         return jsonify({
             'success': False,
@@ -236,19 +503,62 @@ def login():
                     'error': f'Champ requis manquant: {field}'
                 }), 400
         
-        user = db.authenticate_user(data['email'], data['password'])
+        with auth_guard.login(request.remote_addr, data['email']):
+            user = db.authenticate_user(data['email'], data['password'])
         
         if user:
+            # Les requêtes suivantes s'authentifient avec le jeton d'accès, sans bcrypt
             return jsonify({
                 'success': True,
                 'message': 'Connexion réussie',
-                'user': user
+                'user': user,
+                'tokens': issue_tokens(user['id'])
             })
         else:
             return jsonify({
                 'success': False,
                 'error': 'Email ou mot de passe incorrect'
             }), 401
+    except RateLimited as e:
+        # Refus sans lecture en base ni bcrypt
+        return rate_limited_response(e)
+    except PasswordHasherBusy as e:
+        # Pool bcrypt saturé : les lectures du catalogue continuent d'être servies
+        response = jsonify({
+            'success': False,
+            'error': str(e)
+        })
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@app.route('/api/auth/refresh', methods=['POST'])
+def refresh_tokens():
+    """Nouveaux jetons à partir du jeton de rafraîchissement (sans mot de passe ni lecture en base)"""
+    try:
+        data = request.get_json(silent=True) or {}
+        refresh_token = data.get('refresh_token')
+        
+        if not refresh_token:
+            return jsonify({
+                'success': False,
+                'error': 'Jeton de rafraîchissement requis'
+            }), 400
+        
+        user_id = verify_refresh_token(refresh_token)
+        return jsonify({
+            'success': True,
+            'tokens': issue_tokens(user_id)
+        })
+    except TokenError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 401
     except Exception as e:
         return jsonify({
             'success': False,
@@ -256,11 +566,19 @@ def login():
         }), 500
 
 # Endpoints pour les favoris
+@app.route('/api/favorites', methods=['GET'])
 @app.route('/api/favorites/<int:user_id>', methods=['GET'])
-def get_user_favorites(user_id):
-    """Récupère les favoris d'un utilisateur"""
+@require_auth
+def get_user_favorites(user_id=None):
+    """Récupère les favoris de l'utilisateur authentifié"""
     try:
-        favorites = db.get_user_favorites(user_id)
+        if user_id is not None and user_id != g.user_id:
+            return jsonify({
+                'success': False,
+                'error': 'Accès refusé aux favoris d\'un autre utilisateur'
+            }), 403
+        
+        favorites = db.get_user_favorites(g.user_id)
         return jsonify({
             'success': True,
             'data': favorites
@@ -272,11 +590,12 @@ def get_user_favorites(user_id):
         }), 500
 
 @app.route('/api/favorites', methods=['POST'])
+@require_auth
 def add_favorite():
-    """Ajoute un favori"""
+    """Ajoute un favori de l'utilisateur authentifié"""
     try:
         data = request.get_json()
-        required_fields = ['user_id', 'school_id']
+        required_fields = ['school_id']
         
         for field in required_fields:
             if field not in data:
@@ -285,7 +604,7 @@ def add_favorite():
                     'error': f'Champ requis manquant: {field}'
                 }), 400
         
-        success = db.add_favorite(data['user_id'], data['school_id'])
+        success = db.add_favorite(g.user_id, data['school_id'])
         
         if success:
             return jsonify({
@@ -304,11 +623,12 @@ def add_favorite():
         }), 500
 
 @app.route('/api/favorites', methods=['DELETE'])
+@require_auth
 def remove_favorite():
-    """Supprime un favori"""
+    """Supprime un favori de l'utilisateur authentifié"""
     try:
         data = request.get_json()
-        required_fields = ['user_id', 'school_id']
+        required_fields = ['school_id']
         
         for field in required_fields:
             if field not in data:
@@ -317,7 +637,7 @@ def remove_favorite():
                     'error': f'Champ requis manquant: {field}'
                 }), 400
         
-        success = db.remove_favorite(data['user_id'], data['school_id'])
+        success = db.remove_favorite(g.user_id, data['school_id'])
         
         if success:
             return jsonify({
@@ -335,16 +655,79 @@ def remove_favorite():
             'error': str(e)
         }), 500
 
+@app.route('/api/favorites/sync', methods=['PUT'])
+@require_auth
+def sync_favorites():
+    """
+    Synchronise les favoris de l'utilisateur authentifié en un appel : {"ids": [...], "version": n}
+    (ensemble complet du client et version de sa dernière synchronisation, null sur un nouvel
+    appareil). Répond avec l'ensemble fusionné et sa version.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        school_ids = parse_ids(data.get('ids'))
+        version = data.get('version')
+        if version is not None and (not isinstance(version, int) or isinstance(version, bool) or version < 0):
+            raise ValueError("version doit être un entier positif ou null")
+        
+        result = db.sync_favorites(g.user_id, school_ids, version)
+        if result is None:
+            return jsonify({
+                'success': False,
+                'error': 'Erreur lors de la synchronisation des favoris'
+            }), 500
+        return jsonify({
+            'success': True,
+            'data': result['school_ids'],
+            'version': result['version'],
+            'added': result['added'],
+            'removed': result['removed']
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 # Endpoints pour les événements
 @app.route('/api/events', methods=['GET'])
 def get_events():
-    """Récupère tous les événements"""
+    """
+    Calendrier : événements du `from` (aujourd'hui par défaut) au `to` inclus, d'une école
+    (`school_id`) ou d'une ville (`city`), par pages de `limit` (curseur `after`)
+    """
     try:
-        events = db.get_events()
+        filters = parse_event_filters(request.args, date.today())
+        limit = parse_limit(request.args, DEFAULT_EVENTS_LIMIT, MAX_EVENTS_LIMIT)
+        after = request.args.get('after') or None
+        
+        def build():
+            result = db.list_events(limit=limit, after=after, **filters)
+            return {
+                'success': True,
+                'data': result['data'],
+                'count': len(result['data']),
+                'pagination': {
+                    'limit': limit,
+                    'next_cursor': result['next_cursor']
+                }
+            }
+        
+        if set(request.args) - {'limit'}:
+            return jsonify(build())
+        # Première page du calendrier par défaut : réponse en cache, par jour et par limite
+        snapshot = snapshots.get(CACHE_KEY_EVENTS, build, variant=(filters['date_from'], limit))
+        return snapshot_response(snapshot)
+    except ValueError as e:
         return jsonify({
-            'success': True,
-            'data': events
-        })
+            'success': False,
+            'error': str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -372,16 +755,64 @@ def test_connection():
             'error': str(e)
         }), 500
 
+# Invalidation du cache
+@app.route('/api/cache/invalidate', methods=['POST'])
+def invalidate_cache():
+    """Invalide le cache du catalogue (appelé par les scripts d'import, avec le secret partagé)"""
+    if not check_invalidation_secret(request.headers.get(CACHE_INVALIDATION_HEADER)):
+        return jsonify({
+            'success': False,
+            'error': 'Secret d\'invalidation du cache manquant ou invalide'
+        }), 403
+    
+    try:
+        keys = parse_invalidation_keys(request.get_json(silent=True))
+        db.invalidate_cache(*keys)
+        return jsonify({
+            'success': True,
+            'invalidated': keys or 'all'
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+
+@app.route('/api/export', methods=['GET'])
+def export_data():
+    """Exporte toutes les données en NDJSON, envoyées au fil de la lecture (gzip si accepté)"""
+    try:
+        return ndjson_response(db.iter_export())
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+# Statistiques du pool de connexions
+@app.route('/api/pool-stats', methods=['GET'])
+def get_pool_stats():
+    """Retourne l'état du pool de connexions MySQL"""
+    return jsonify({
+        'success': True,
+        'data': db.get_pool_stats()
+    })
+
 if __name__ == '__main__':
     print("🚀 Démarrage du serveur API EazySkool MySQL...")
     print("📊 Base de données: MySQL")
     print("🌐 URL: http://localhost:5000")
     print("📚 API Documentation:")
-    print("   - GET  /api/schools")
+    print("   - GET  /api/schools[?page=&per_page=&after=&sort=rating|name&order=&fields=]")
     print("   - GET  /api/schools/<id>")
     print("   - GET  /api/schools/search?q=<query>")
     print("   - POST /api/auth/register")
     print("   - POST /api/auth/login")
+    print("   - POST /api/auth/refresh")
     print("   - GET  /api/test-connection")
+    print("   - GET  /api/pool-stats")
+    
+    if QUERY_AUDIT_ON_STARTUP:
+        print_audit_report(db.audit_query_plans())
     
     app.run(debug=True, host='0.0.0.0', port=5000) 
\ No newline at end of file
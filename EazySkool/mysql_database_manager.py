@@ -1,66 +1,508 @@
 import mysql.connector
 from mysql.connector import Error
-import bcrypt
-from typing import List, Dict, Optional, Any
-import json
-from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Dict, Optional, Any, Tuple
+from datetime import date, datetime, timedelta
 import os
+import sys
+import threading
+from contextlib import contextmanager
+from mysql.connector import errorcode
+from config import (MYSQL_POOL_MIN_SIZE, MYSQL_POOL_MAX_SIZE, MYSQL_POOL_TIMEOUT,
+                    MYSQL_POOL_MAX_USES, MYSQL_POOL_MAX_LIFETIME, MYSQL_POOL_PING_AFTER_IDLE,
+                    CACHE_TTL, CACHE_MAX_ENTRIES, DEFAULT_SCHOOLS_PER_PAGE, DEFAULT_REVIEWS_LIMIT,
+                    EXPORT_FETCH_SIZE, DEFAULT_NEARBY_LIMIT, MAP_CLUSTER_MAX_ZOOM, MAP_MAX_SCHOOLS,
+                    DEFAULT_EVENTS_LIMIT, EVENTS_ARCHIVE_AFTER_DAYS, SEEDED_RATING_WEIGHT)
+from mysql_pool import MySQLConnectionPool
+from cache import (TTLCache, CACHE_KEY_SCHOOLS, CACHE_KEY_CITIES, CACHE_KEY_SCHOOL_TYPES, CACHE_KEY_EVENTS,
+                   CACHE_KEY_MAP_GRID, CACHE_KEY_FACETS, CATALOG_CACHE_KEYS)
+from pagination import encode_cursor, decode_cursor
+from search import mysql_boolean_expression
+from query_audit import AuditProbe, mysql_full_scans
+from password_hashing import password_hasher
+from export_stream import ExportRecord, json_document_chunks, ndjson_chunks, write_chunks
+from geo import EARTH_RADIUS_KM, bounding_box
+from map_clusters import BoundingBox, ClusterGrid, map_point
+from facets import FACETS, FacetIndex, ids_bitmap
+from autocomplete import EntryRow
+from fuzzy import FuzzyRow
+
+# Champs d'une école exposés par l'API : nom -> expression SQL
+SCHOOL_FIELDS = {
+    'id': 's.id',
+    'name': 's.name',
+    'description': 's.description',
+    'address': 's.address',
+    'phone': 's.phone',
+    'email': 's.email',
+    'website': 's.website',
+    'latitude': 's.latitude',
+    'longitude': 's.longitude',
+    'city_id': 's.city_id',
+    'school_type_id': 's.school_type_id',
+    'rating': 's.rating',
+    'total_reviews': 's.total_reviews',
+    'price_range': 's.price_range',
+    'created_at': 's.created_at',
+    'updated_at': 's.updated_at',
+    'city_name': 'c.name',
+    'school_type_name': 'st.name',
+    # Sous-requête corrélée : évaluée uniquement pour les lignes de la page
+    'specializations': """(SELECT GROUP_CONCAT(sp.name)
+                           FROM school_specializations ss
+                           JOIN specializations sp ON ss.specialization_id = sp.id
+                           WHERE ss.school_id = s.id)"""
+}
+
+# Tris disponibles : nom -> (colonne indexée, sens par défaut)
+# `relevance` (score MATCH ... AGAINST de la recherche) exige une recherche
+SCHOOL_SORTS = {
+    'rating': ('s.rating', 'DESC'),
+    'name': ('s.name', 'ASC'),
+    'relevance': ('h.score', 'DESC')
+}
+
+# Relations qu'une fiche d'école peut inclure (include=images,reviews,...)
+SCHOOL_INCLUDES = ('images', 'reviews', 'events', 'specializations')
+
+# Requêtes de l'export en flux, dans l'ordre de la clé primaire (aucun tri en mémoire)
+EXPORT_QUERIES = [
+    ('schools', f"""
+        SELECT {', '.join(f'{expression} AS {name}' for name, expression in SCHOOL_FIELDS.items())}
+        FROM schools s
+        LEFT JOIN cities c ON s.city_id = c.id
+        LEFT JOIN school_types st ON s.school_type_id = st.id
+        ORDER BY s.id
+    """),
+    ('cities', "SELECT * FROM cities ORDER BY id"),
+    ('school_types', "SELECT * FROM school_types ORDER BY id"),
+    ('events', """
+        SELECT e.*, s.name AS school_name
+        FROM events e
+        LEFT JOIN schools s ON e.school_id = s.id
+        ORDER BY e.id
+    """)
+]
+
+# Centre des villes du jeu de données initial (les bases créées avant leurs coordonnées les reçoivent
+# par migration)
+CITY_CENTROIDS = {
+    'Strasbourg': (48.5839, 7.7455),
+    'Nancy': (48.6921, 6.1844),
+    'Metz': (49.1193, 6.1757),
+    'Reims': (49.2583, 4.0317),
+    'Troyes': (48.2973, 4.0744),
+    'Châlons-en-Champagne': (48.9566, 4.3631),
+    'Chalons-en-Champagne': (48.9566, 4.3631)
+}
+
+# Écoles sans coordonnées (import sans latitude/longitude) placées au centre de leur ville :
+# la recherche par proximité et la carte ne lisent que les écoles géolocalisées
+FILL_SCHOOL_COORDINATES = """
+    UPDATE schools s
+    JOIN cities c ON s.city_id = c.id
+    SET s.latitude = c.latitude, s.longitude = c.longitude
+    WHERE s.latitude IS NULL AND c.latitude IS NOT NULL
+"""
+
+# Migrations de schéma appliquées à la connexion, dans l'ordre, une seule fois chacune.
+# MySQL ne connaît pas CREATE INDEX IF NOT EXISTS : les erreurs « existe déjà » sont ignorées.
+SCHEMA_MIGRATIONS = [
+    ('004_schools_sort_indexes', [
+        "CREATE INDEX idx_schools_rating ON schools(rating, id)",
+        "CREATE INDEX idx_schools_name ON schools(name, id)"
+    ]),
+    # Collation utf8mb4_unicode_ci : la recherche ignore déjà les accents (é/è/ç) et la casse
+    ('005_schools_fulltext', [
+        "ALTER TABLE schools ADD FULLTEXT INDEX ft_schools_search (name, description)"
+    ]),
+    # Nombre et somme des notes : la moyenne se met à jour en O(1) à chaque avis
+    ('006_schools_rating_aggregates', [
+        "ALTER TABLE schools ADD COLUMN total_reviews INT NOT NULL DEFAULT 0",
+        "ALTER TABLE schools ADD COLUMN rating_sum DECIMAL(12,2) NOT NULL DEFAULT 0",
+        """UPDATE schools s
+           JOIN (SELECT school_id, COUNT(*) AS n, SUM(rating) AS total FROM reviews GROUP BY school_id) agg
+             ON agg.school_id = s.id
+           SET s.total_reviews = agg.n, s.rating_sum = agg.total"""
+    ]),
+    # Les clés étrangères ont déjà leur index (InnoDB) : on ajoute les index composites
+    # qui évitent les tris (filesort) et les filtres par nom
+    ('007_secondary_indexes', [
+        "CREATE INDEX idx_school_images_school ON school_images(school_id, is_primary)",
+        "CREATE INDEX idx_reviews_school_created ON reviews(school_id, created_at)",
+        "CREATE INDEX idx_favorites_user_created ON favorites(user_id, created_at)",
+        "CREATE INDEX idx_events_date ON events(event_date, event_time)",
+        "CREATE INDEX idx_cities_name ON cities(name)",
+        "CREATE INDEX idx_school_types_name ON school_types(name)",
+        "CREATE INDEX idx_schools_city_rating ON schools(city_id, rating)",
+        "CREATE INDEX idx_schools_type_rating ON schools(school_type_id, rating)"
+    ]),
+    # Histogramme des notes par école, tenu à jour par add_review : le résumé des avis
+    # se lit en 5 lignes au plus, quel que soit le nombre d'avis
+    ('008_school_rating_counts', [
+        """CREATE TABLE school_rating_counts (
+               school_id INT NOT NULL,
+               rating TINYINT NOT NULL,
+               review_count INT NOT NULL DEFAULT 0,
+               PRIMARY KEY (school_id, rating)
+           )""",
+        """INSERT INTO school_rating_counts (school_id, rating, review_count)
+           SELECT school_id, rating, COUNT(*) FROM reviews
+           WHERE school_id IS NOT NULL AND rating IS NOT NULL
+           GROUP BY school_id, rating
+           ON DUPLICATE KEY UPDATE review_count = VALUES(review_count)"""
+    ]),
+    # Coordonnées des écoles et index (latitude, longitude) : la recherche par proximité lit
+    # la plage de latitudes de la boîte englobante et filtre les longitudes dans l'index.
+    # (Un index SPATIAL exigerait une colonne POINT NOT NULL, or les écoles sans coordonnées
+    # restent possibles.)
+    ('009_schools_coordinates', [
+        "ALTER TABLE schools ADD COLUMN latitude DECIMAL(10, 8) NULL",
+        "ALTER TABLE schools ADD COLUMN longitude DECIMAL(11, 8) NULL",
+        "CREATE INDEX idx_schools_location ON schools(latitude, longitude)"
+    ]),
+    # Calendrier (/api/events) : fenêtre de dates lue dans l'ordre (date, heure, id), sans
+    # filesort, globalement ou pour une école. Les événements passés sont déplacés dans
+    # events_archive (archive_past_events) : les clés étrangères excluent le partitionnement.
+    ('010_events_calendar', [
+        "CREATE INDEX idx_events_date_time ON events(event_date, event_time, id)",
+        "DROP INDEX idx_events_date ON events",
+        "CREATE INDEX idx_events_school_date_time ON events(school_id, event_date, event_time, id)",
+        "DROP INDEX idx_events_school ON events",
+        "CREATE TABLE events_archive LIKE events",
+        "ALTER TABLE events_archive ADD COLUMN archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+    ]),
+    # Version des favoris de chaque utilisateur, incrémentée à chaque modification :
+    # la synchronisation sait si l'ensemble envoyé par un client est à jour
+    ('011_favorite_versions', [
+        """CREATE TABLE favorite_versions (
+               user_id INT PRIMARY KEY,
+               version INT NOT NULL DEFAULT 0
+           )"""
+    ]),
+    # 009_schools_coordinates a ajouté des colonnes vides : coordonnées des villes connues,
+    # puis écoles existantes placées au centre de leur ville
+    ('012_schools_coordinates_backfill', [
+        "ALTER TABLE cities ADD COLUMN latitude DECIMAL(10, 8) NULL",
+        "ALTER TABLE cities ADD COLUMN longitude DECIMAL(11, 8) NULL",
+        f"""UPDATE cities
+            SET latitude = CASE name {' '.join(f"WHEN '{name}' THEN {lat}" for name, (lat, lon) in CITY_CENTROIDS.items())} END,
+                longitude = CASE name {' '.join(f"WHEN '{name}' THEN {lon}" for name, (lat, lon) in CITY_CENTROIDS.items())} END
+            WHERE latitude IS NULL AND name IN ({', '.join(f"'{name}'" for name in CITY_CENTROIDS)})""",
+        FILL_SCHOOL_COORDINATES
+    ]),
+    # 006_schools_rating_aggregates n'a compté que les avis : la note d'une école sans avis devient
+    # une note a priori, pesant SEEDED_RATING_WEIGHT avis dans la moyenne (sinon le premier avis la
+    # remplace), sans compter dans total_reviews (nombre d'avis réels)
+    ('013_schools_rating_prior', [
+        "ALTER TABLE schools ADD COLUMN rating_prior_weight INT NOT NULL DEFAULT 0",
+        "ALTER TABLE schools ADD COLUMN rating_prior_sum DECIMAL(12,2) NOT NULL DEFAULT 0",
+        f"""UPDATE schools s
+            LEFT JOIN (SELECT school_id, COUNT(*) AS n, SUM(rating) AS total FROM reviews GROUP BY school_id) agg
+              ON agg.school_id = s.id
+            SET s.rating_prior_weight = {SEEDED_RATING_WEIGHT},
+                s.rating_prior_sum = s.rating * {SEEDED_RATING_WEIGHT},
+                s.total_reviews = 0,
+                s.rating_sum = 0
+            WHERE agg.n IS NULL AND s.rating > 0 AND s.rating_prior_weight = 0"""
+    ]),
+]
+
+# Distance haversine (km) entre le point (%s, %s) et une école, en SQL
+_HAVERSINE_KM = f"""(2 * {EARTH_RADIUS_KM} * ASIN(SQRT(
+    POWER(SIN(RADIANS(s.latitude - %s) / 2), 2)
+    + COS(RADIANS(%s)) * COS(RADIANS(s.latitude)) * POWER(SIN(RADIANS(s.longitude - %s) / 2), 2)
+)))"""
+
+_ALREADY_APPLIED_ERRORS = (
+    errorcode.ER_TABLE_EXISTS_ERROR,
+    errorcode.ER_DUP_FIELDNAME,
+    errorcode.ER_DUP_KEYNAME,
+    errorcode.ER_CANT_DROP_FIELD_OR_KEY
+)
+
+
+def rating_summary(counts: Iterable[Tuple[int, int]], count: Optional[int] = None,
+                   average: Optional[float] = None) -> Dict:
+    """
+    Résumé des avis : nombre et moyenne de l'école (`count`, `average`, ceux affichés dans le
+    catalogue), histogramme 1 à 5 des avis écrits à partir de (note, nombre d'avis) et leur
+    nombre (`written_count`). Sans nombre fourni, nombre et moyenne viennent de l'histogramme.
+    """
+    histogram = {rating: 0 for rating in range(1, 6)}
+    for rating, review_count in counts:
+        histogram[int(rating)] = int(review_count)
+    written = sum(histogram.values())
+    if count is None:
+        count = written
+        average = sum(rating * n for rating, n in histogram.items()) / written if written else None
+    return {
+        'count': int(count),
+        'average': round(float(average), 2) if average is not None else None,
+        'histogram': histogram,
+        'written_count': written
+    }
+
 
 class EazySkoolMySQLDB:
-    def __init__(self, host='localhost', user='root', password='', database='eazyskool', port=3306):
+    def __init__(self, host='localhost', user='root', password='', database='eazyskool', port=3306,
+                 pool_min_size=MYSQL_POOL_MIN_SIZE, pool_max_size=MYSQL_POOL_MAX_SIZE,
+                 pool_timeout=MYSQL_POOL_TIMEOUT, pool_max_uses=MYSQL_POOL_MAX_USES,
+                 pool_max_lifetime=MYSQL_POOL_MAX_LIFETIME, pool_ping_after_idle=MYSQL_POOL_PING_AFTER_IDLE):
         self.host = host
         self.user = user
         self.password = password
         self.database = database
         self.port = port
-        self.connection = None
+        self.pool_options = {
+            'min_size': pool_min_size,
+            'max_size': pool_max_size,
+            'timeout': pool_timeout,
+            'max_uses': pool_max_uses,
+            'max_lifetime': pool_max_lifetime,
+            'ping_after_idle': pool_ping_after_idle
+        }
+        self.pool = None
+        self._pool_lock = threading.Lock()
+        # Connexion de la transaction de lecture en cours, par thread (voir read_transaction)
+        self._local = threading.local()
+        # Catalogue en mémoire, invalidé explicitement par les écritures
+        self.cache = TTLCache(max_entries=CACHE_MAX_ENTRIES, ttl=CACHE_TTL)
+        # Fonctions appelées avec les clés invalidées (ex. réponses HTTP en cache du serveur)
+        self._invalidation_listeners = []
+        # Recherche via l'index FULLTEXT (sinon repli sur LIKE), déterminé après les migrations
+        self.fulltext_enabled = False
+        # Requêtes exécutées, enregistrées uniquement pendant l'audit des plans
+        self._query_log = None
         
     def connect(self):
-        """Établit la connexion à la base de données MySQL"""
+        """Crée le pool de connexions MySQL (une seule fois)"""
+        with self._pool_lock:
+            if self.pool is not None:
+                return True
+            try:
+                self.pool = MySQLConnectionPool(
+                    {
+                        'host': self.host,
+                        'user': self.user,
+                        'password': self.password,
+                        'database': self.database,
+                        'port': self.port,
+                        'charset': 'utf8mb4',
+                        'collation': 'utf8mb4_unicode_ci'
+                    },
+                    **self.pool_options
+                )
+            except Error as e:
+                print(f"Erreur de connexion MySQL: {e}")
+                return False
+        
+        self.apply_migrations()
+        self.fulltext_enabled = self._index_exists('schools', 'ft_schools_search')
+        return True
+    
+    def apply_migrations(self):
+        """Applique les migrations de SCHEMA_MIGRATIONS qui ne l'ont pas encore été"""
         try:
-            self.connection = mysql.connector.connect(
-                host=self.host,
-                user=self.user,
-                password=self.password,
-                database=self.database,
-                port=self.port,
-                charset='utf8mb4',
-                collation='utf8mb4_unicode_ci'
-            )
-            return True
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute("""
+                        CREATE TABLE IF NOT EXISTS schema_migrations (
+                            name VARCHAR(255) PRIMARY KEY,
+                            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                        )
+                    """)
+                    cursor.execute("SELECT name FROM schema_migrations")
+                    applied = {row[0] for row in cursor.fetchall()}
+                    
+                    for name, statements in SCHEMA_MIGRATIONS:
+                        if name in applied:
+                            continue
+                        for statement in statements:
+                            try:
+                                cursor.execute(statement)
+                            except Error as e:
+                                if e.errno not in _ALREADY_APPLIED_ERRORS:
+                                    raise
+                        cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s)", (name,))
+                        print(f"Migration appliquée: {name}")
+                finally:
+                    cursor.close()
         except Error as e:
-            print(f"Erreur de connexion MySQL: {e}")
-            return False
+            print(f"Erreur lors des migrations MySQL: {e}")
+    
+    def _index_exists(self, table: str, index: str) -> bool:
+        """Indique si un index existe sur une table de la base courante"""
+        result = self.execute_query("""
+            SELECT 1 FROM information_schema.STATISTICS
+            WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND INDEX_NAME = %s
+            LIMIT 1
+        """, (table, index))
+        return bool(result)
+    
+    def _search_hits(self, query: str) -> Tuple[str, List]:
+        """
+        Table dérivée (id, score) des écoles correspondant à la recherche : index FULLTEXT
+        (mode booléen, termes en préfixe) et nom de ville, ou LIKE si l'index est absent.
+        """
+        search_term = f"%{query}%"
+        match = mysql_boolean_expression(query) if self.fulltext_enabled else None
+        if match:
+            # UNION plutôt que OR : chaque branche garde son index (FULLTEXT / ville)
+            return ("""(
+                SELECT id, MAX(score) AS score FROM (
+                    SELECT id, MATCH(name, description) AGAINST (%s IN BOOLEAN MODE) AS score
+                    FROM schools
+                    WHERE MATCH(name, description) AGAINST (%s IN BOOLEAN MODE)
+                    UNION ALL
+                    SELECT hs.id, 0 AS score
+                    FROM schools hs JOIN cities hc ON hs.city_id = hc.id
+                    WHERE hc.name LIKE %s
+                ) matches
+                GROUP BY id
+            )""", [match, match, search_term])
+        return ("""(
+                SELECT hs.id, 0 AS score
+                FROM schools hs LEFT JOIN cities hc ON hs.city_id = hc.id
+                WHERE hs.name LIKE %s OR hs.description LIKE %s OR hc.name LIKE %s
+            )""", [search_term, search_term, search_term])
     
     def disconnect(self):
-        """Ferme la connexion à la base de données"""
-        if self.connection and self.connection.is_connected():
-            self.connection.close()
+        """Ferme le pool de connexions"""
+        with self._pool_lock:
+            if self.pool is not None:
+                self.pool.close()
+                self.pool = None
+    
+    def get_pool_stats(self) -> Dict:
+        """Retourne les statistiques du pool (connexions utilisées, inactives, attente)"""
+        if self.pool is None:
+            return {'size': 0, 'in_use': 0, 'idle': 0}
+        return self.pool.stats()
     
     def execute_query(self, query: str, params: tuple = None, fetch: bool = True):
-        """Exécute une requête SQL"""
+        """Exécute une requête SQL sur une connexion empruntée au pool"""
         try:
-            if not self.connection or not self.connection.is_connected():
-                if not self.connect():
-                    return None
+            if self.pool is None and not self.connect():
+                return None
+            
+            if self._query_log is not None:
+                self._query_log.append((query, params))
             
-            cursor = self.connection.cursor(dictionary=True)
+            # Dans read_transaction(), la requête lit l'instantané de la transaction en cours
+            connection = getattr(self._local, 'connection', None)
+            if connection is not None:
+                return self._run_query(connection, query, params, fetch)
+            
+            with self.pool.connection() as connection:
+                return self._run_query(connection, query, params, fetch)
+        except Error as e:
+            print(f"Erreur d'exécution de requête: {e}")
+            return None
+    
+    @staticmethod
+    def _run_query(connection, query: str, params: tuple, fetch: bool):
+        """Exécute une requête sur une connexion donnée"""
+        cursor = connection.cursor(dictionary=True)
+        try:
             cursor.execute(query, params or ())
             
             if fetch:
-                result = cursor.fetchall()
-            else:
-                self.connection.commit()
-                result = cursor.rowcount
-            
+                return cursor.fetchall()
+            connection.commit()
+            return cursor.rowcount
+        finally:
             cursor.close()
-            return result
+    
+    @contextmanager
+    def read_transaction(self):
+        """
+        Transaction en lecture seule (instantané cohérent) : dans le bloc, les requêtes du
+        thread passent par execute_query sur la même connexion et voient le même état.
+        """
+        if getattr(self._local, 'connection', None) is not None:
+            # Déjà dans une transaction de lecture : on la réutilise
+            yield
+            return
+        if self.pool is None and not self.connect():
+            raise Error(msg="Connexion MySQL indisponible")
+        
+        with self.pool.connection() as connection:
+            connection.start_transaction(consistent_snapshot=True, readonly=True)
+            self._local.connection = connection
+            try:
+                yield
+            finally:
+                self._local.connection = None
+                # Rien à valider : la fin de la transaction libère l'instantané
+                connection.rollback()
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Transaction sur une connexion du pool : `with db.transaction() as cursor: ...`
+        Validée en sortie du bloc, annulée si une exception en sort.
+        """
+        if self.pool is None and not self.connect():
+            raise Error(msg="Connexion MySQL indisponible")
+        
+        with self.pool.connection() as connection:
+            connection.start_transaction()
+            cursor = connection.cursor(dictionary=True)
+            try:
+                yield cursor
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+            finally:
+                cursor.close()
+    
+    def execute_insert(self, query: str, params: tuple = None) -> Optional[int]:
+        """Exécute un INSERT et retourne l'identifiant généré (même connexion que l'INSERT)"""
+        try:
+            if self.pool is None and not self.connect():
+                return None
+            
+            with self.pool.connection() as connection:
+                cursor = connection.cursor()
+                try:
+                    cursor.execute(query, params or ())
+                    connection.commit()
+                    return cursor.lastrowid
+                finally:
+                    cursor.close()
         except Error as e:
             print(f"Erreur d'exécution de requête: {e}")
             return None
     
+    def invalidate_cache(self, *keys: str):
+        """Invalide les clés indiquées du cache (tout le catalogue si aucune clé)"""
+        keys = keys or CATALOG_CACHE_KEYS
+        self.cache.invalidate(*keys)
+        for listener in self._invalidation_listeners:
+            listener(*keys)
+    
+    def add_invalidation_listener(self, listener: Callable[..., None]):
+        """Enregistre une fonction appelée avec les clés à chaque invalidation du cache"""
+        self._invalidation_listeners.append(listener)
+    
+    def _load_catalog(self, key: str, loader) -> List[Dict]:
+        """
+        Liste du catalogue mise en cache ; une erreur de lecture lève Error plutôt que de
+        renvoyer une liste vide, que l'API mettrait en cache comme un catalogue vide
+        """
+        rows = self.cache.get_or_load(key, loader)
+        if rows is None:
+            raise Error(msg=f"Lecture du catalogue impossible ({key})")
+        return rows
+    
     def get_all_schools(self) -> List[Dict]:
-        """Récupère toutes les écoles avec leurs informations complètes"""
+        """Récupère toutes les écoles avec leurs informations complètes (mises en cache)"""
+        return self._load_catalog(CACHE_KEY_SCHOOLS, self._load_all_schools)
+    
+    def _load_all_schools(self) -> Optional[List[Dict]]:
+        """Charge toutes les écoles depuis la base (None en cas d'erreur)"""
         query = """
         SELECT 
             s.*,
@@ -75,16 +517,7 @@ class EazySkoolMySQLDB:
         GROUP BY s.id
         """
         
-        schools = self.execute_query(query)
-        if schools:
-            # Convertir les objets datetime en chaînes pour JSON
-            for school in schools:
-                if 'created_at' in school and school['created_at']:
-                    school['created_at'] = school['created_at'].isoformat()
-                if 'updated_at' in school and school['updated_at']:
-                    school['updated_at'] = school['updated_at'].isoformat()
-        
-        return schools or []
+        return self.execute_query(query)
     
     def get_school_by_id(self, school_id: int) -> Optional[Dict]:
         """Récupère une école par son ID"""
@@ -105,115 +538,534 @@ class EazySkoolMySQLDB:
         
         result = self.execute_query(query, (school_id,))
         if result:
-            school = result[0]
-            if 'created_at' in school and school['created_at']:
-                school['created_at'] = school['created_at'].isoformat()
-            if 'updated_at' in school and school['updated_at']:
-                school['updated_at'] = school['updated_at'].isoformat()
-            return school
+            return result[0]
         return None
     
+    def list_schools(self, query: str = None, city: str = None, school_type: str = None,
+                     sort: str = None, order: str = None, page: int = 1, per_page: int = DEFAULT_SCHOOLS_PER_PAGE,
+                     after: str = None, fields: List[str] = None) -> Dict:
+        """
+        Liste paginée des écoles, triée et filtrée en SQL (ORDER BY indexé + LIMIT).
+        
+        `after` est le curseur `next_cursor` de la page précédente (pagination par clé,
+        prioritaire sur `page`) ; `fields` restreint les colonnes renvoyées.
+        Par défaut, une recherche est triée par pertinence et une liste par note.
+        """
+        if not query and sort in (None, 'relevance'):
+            sort = 'rating'
+        sort = sort or 'relevance'
+        if sort not in SCHOOL_SORTS:
+            raise ValueError(f"Tri inconnu: {sort}")
+        sort_column, direction = SCHOOL_SORTS[sort]
+        if order:
+            direction = 'DESC' if order.lower() == 'desc' else 'ASC'
+        fields = fields or list(SCHOOL_FIELDS)
+        
+        conditions = []
+        params = []
+        joins = ""
+        
+        if query:
+            hits, params = self._search_hits(query)
+            joins += f" JOIN {hits} h ON h.id = s.id"
+        
+        if city:
+            joins += " LEFT JOIN cities c ON s.city_id = c.id"
+            conditions.append("c.name = %s")
+            params.append(city)
+        
+        if school_type:
+            joins += " LEFT JOIN school_types st ON s.school_type_id = st.id"
+            conditions.append("st.name = %s")
+            params.append(school_type)
+        
+        filter_clause = " AND ".join(conditions) if conditions else "1=1"
+        count = self.execute_query(f"SELECT COUNT(*) AS total FROM schools s{joins} WHERE {filter_clause}", tuple(params))
+        if count is None:
+            return {'data': [], 'total': 0, 'page': None if after else page, 'per_page': per_page, 'next_cursor': None}
+        
+        page_conditions = list(conditions)
+        page_params = list(params)
+        offset = 0
+        if after:
+            last_value, last_id = decode_cursor(after)
+            comparison = '<' if direction == 'DESC' else '>'
+            page_conditions.append(f"({sort_column}, s.id) {comparison} (%s, %s)")
+            page_params.extend([last_value, last_id])
+        else:
+            offset = (page - 1) * per_page
+        
+        page_clause = " AND ".join(page_conditions) if page_conditions else "1=1"
+        columns = ", ".join(f"{SCHOOL_FIELDS[field]} AS {field}" for field in fields)
+        
+        # La table dérivée choisit les identifiants de la page via l'index de tri ;
+        # les jointures et les spécialités ne sont calculées que pour ces lignes.
+        # Une ligne de plus que demandé indique s'il existe une page suivante.
+        rows = self.execute_query(f"""
+            SELECT {columns}, page.sort_value AS _sort_value, page.id AS _cursor_id
+            FROM (
+                SELECT s.id AS id, {sort_column} AS sort_value
+                FROM schools s{joins}
+                WHERE {page_clause}
+                ORDER BY {sort_column} {direction}, s.id {direction}
+                LIMIT %s OFFSET %s
+            ) page
+            JOIN schools s ON s.id = page.id
+            LEFT JOIN cities c ON s.city_id = c.id
+            LEFT JOIN school_types st ON s.school_type_id = st.id
+            ORDER BY page.sort_value {direction}, page.id {direction}
+        """, tuple(page_params + [per_page + 1, offset])) or []
+        
+        has_more = len(rows) > per_page
+        rows = rows[:per_page]
+        
+        next_cursor = None
+        if has_more:
+            last_value = rows[-1]['_sort_value']
+            # DECIMAL n'est pas sérialisable en JSON : note et score repassent en float dans le curseur
+            if sort in ('rating', 'relevance'):
+                last_value = float(last_value)
+            next_cursor = encode_cursor([last_value, rows[-1]['_cursor_id']])
+        
+        for school in rows:
+            school.pop('_sort_value', None)
+            school.pop('_cursor_id', None)
+        
+        return {
+            'data': rows,
+            'total': count[0]['total'],
+            'page': None if after else page,
+            'per_page': per_page,
+            'next_cursor': next_cursor
+        }
+    
     def search_schools(self, query: str) -> List[Dict]:
-        """Recherche des écoles par nom ou description"""
-        search_query = """
+        """Recherche des écoles par nom, description ou ville (les plus pertinentes d'abord)"""
+        hits, params = self._search_hits(query)
+        search_query = f"""
         SELECT 
             s.*,
             c.name as city_name,
             st.name as school_type_name,
             GROUP_CONCAT(DISTINCT sp.name) as specializations
         FROM schools s
+        JOIN {hits} h ON h.id = s.id
         LEFT JOIN cities c ON s.city_id = c.id
         LEFT JOIN school_types st ON s.school_type_id = st.id
         LEFT JOIN school_specializations ss ON s.id = ss.school_id
         LEFT JOIN specializations sp ON ss.specialization_id = sp.id
-        WHERE s.name LIKE %s OR s.description LIKE %s OR c.name LIKE %s
         GROUP BY s.id
+        ORDER BY MAX(h.score) DESC, s.rating DESC
         """
         
-        search_term = f"%{query}%"
-        schools = self.execute_query(search_query, (search_term, search_term, search_term))
-        
-        if schools:
-            for school in schools:
-                if 'created_at' in school and school['created_at']:
-                    school['created_at'] = school['created_at'].isoformat()
-                if 'updated_at' in school and school['updated_at']:
-                    school['updated_at'] = school['updated_at'].isoformat()
+        schools = self.execute_query(search_query, tuple(params))
         
         return schools or []
     
+    def _load_facet_index(self) -> Optional[FacetIndex]:
+        """Construit les listes d'écoles de chaque ville, région, type et spécialisation (None en cas d'erreur)"""
+        rows = self.execute_query("""
+            SELECT s.id AS school_id, 'city' AS facet, c.name AS value
+            FROM schools s LEFT JOIN cities c ON s.city_id = c.id
+            UNION ALL
+            SELECT s.id, 'region', c.region FROM schools s LEFT JOIN cities c ON s.city_id = c.id
+            UNION ALL
+            SELECT s.id, 'type', st.name FROM schools s LEFT JOIN school_types st ON s.school_type_id = st.id
+            UNION ALL
+            SELECT ss.school_id, 'specialization', sp.name
+            FROM school_specializations ss JOIN specializations sp ON ss.specialization_id = sp.id
+        """)
+        if rows is None:
+            return None
+        return FacetIndex((row['school_id'], row['facet'], row['value']) for row in rows)
+    
+    def get_search_facets(self, query: str = None, city: str = None, school_type: str = None,
+                          facets: Iterable[str] = FACETS) -> Dict[str, List[Dict]]:
+        """
+        Comptes par facette (city, type, region, specialization) des résultats de la recherche
+        avec les mêmes critères : intersections de l'index des facettes (en cache, invalidé avec
+        le catalogue) et des écoles trouvées par la recherche, lues en une requête.
+        """
+        index = self.cache.get_or_load(CACHE_KEY_FACETS, self._load_facet_index)
+        if index is None:
+            return {facet: [] for facet in facets}
+        hits = self._search_hits_bitmap(query) if query else None
+        filters = {'city': [city] if city else [], 'type': [school_type] if school_type else []}
+        return index.counts(filters, hits, facets)
+    
+    def _search_hits_bitmap(self, query: str) -> int:
+        """Bitmap des écoles trouvées par la recherche (seule requête de get_search_facets une fois l'index en cache)"""
+        hits_query, params = self._search_hits(query)
+        rows = self.execute_query(f"SELECT h.id FROM {hits_query} h", tuple(params)) or []
+        return ids_bitmap(row['id'] for row in rows)
+    
+    def get_autocomplete_entries(self) -> Optional[List[EntryRow]]:
+        """
+        Entrées de l'autocomplétion : écoles (note), villes et spécialisations (moyenne de leurs écoles) ;
+        None en cas d'erreur
+        """
+        rows = self.execute_query("""
+            SELECT 'school' AS kind, s.id AS id, s.name AS label, s.rating AS score FROM schools s
+            UNION ALL
+            SELECT 'city', c.id, c.name, AVG(s.rating) FROM cities c
+            LEFT JOIN schools s ON s.city_id = c.id GROUP BY c.id, c.name
+            UNION ALL
+            SELECT 'specialization', sp.id, sp.name, AVG(s.rating) FROM specializations sp
+            LEFT JOIN school_specializations ss ON ss.specialization_id = sp.id
+            LEFT JOIN schools s ON s.id = ss.school_id GROUP BY sp.id, sp.name
+        """)
+        if rows is None:
+            return None
+        return [(row['kind'], row['id'], row['label'], row['score']) for row in rows]
+    
+    def get_fuzzy_entries(self) -> Optional[List[FuzzyRow]]:
+        """Écoles pour la recherche tolérante aux fautes : nom, ville, type, spécialisations et note (None en cas d'erreur)"""
+        rows = self.execute_query("""
+            SELECT s.id, s.name, c.name AS city_name, st.name AS school_type_name,
+                   (SELECT GROUP_CONCAT(sp.name SEPARATOR ' ')
+                    FROM school_specializations ss
+                    JOIN specializations sp ON ss.specialization_id = sp.id
+                    WHERE ss.school_id = s.id) AS specializations,
+                   s.rating
+            FROM schools s
+            LEFT JOIN cities c ON s.city_id = c.id
+            LEFT JOIN school_types st ON s.school_type_id = st.id
+        """)
+        if rows is None:
+            return None
+        return [(row['id'], row['name'], row['city_name'], row['school_type_name'], row['specializations'],
+                 row['rating']) for row in rows]
+    
     def get_cities(self) -> List[Dict]:
-        """Récupère toutes les villes"""
-        query = "SELECT * FROM cities ORDER BY name"
-        return self.execute_query(query) or []
+        """Récupère toutes les villes (mises en cache)"""
+        return self._load_catalog(CACHE_KEY_CITIES, self._load_cities)
+    
+    def _load_cities(self) -> Optional[List[Dict]]:
+        """Charge les villes depuis la base (None en cas d'erreur)"""
+        return self.execute_query("SELECT * FROM cities ORDER BY name")
     
     def get_school_types(self) -> List[Dict]:
-        """Récupère tous les types d'écoles"""
-        query = "SELECT * FROM school_types ORDER BY name"
-        return self.execute_query(query) or []
+        """Récupère tous les types d'écoles (mis en cache)"""
+        return self._load_catalog(CACHE_KEY_SCHOOL_TYPES, self._load_school_types)
+    
+    def _load_school_types(self) -> Optional[List[Dict]]:
+        """Charge les types d'écoles depuis la base (None en cas d'erreur)"""
+        return self.execute_query("SELECT * FROM school_types ORDER BY name")
     
     def get_school_images(self, school_id: int) -> List[Dict]:
         """Récupère les images d'une école"""
         query = "SELECT * FROM school_images WHERE school_id = %s ORDER BY is_primary DESC"
         images = self.execute_query(query, (school_id,))
         
-        if images:
-            for image in images:
-                if 'created_at' in image and image['created_at']:
-                    image['created_at'] = image['created_at'].isoformat()
-        
         return images or []
     
-    def get_school_reviews(self, school_id: int) -> List[Dict]:
-        """Récupère les avis d'une école"""
+    def list_school_reviews(self, school_id: int, limit: int = DEFAULT_REVIEWS_LIMIT, after: str = None) -> Dict:
+        """
+        Page d'avis d'une école, du plus récent au plus ancien, avec le résumé des notes.
+        
+        `after` est le curseur `next_cursor` de la page précédente : pagination par clé sur
+        (created_at, id), servie par l'index (school_id, created_at) complété par la clé primaire.
+        """
+        conditions = ["r.school_id = %s"]
+        params = [school_id]
+        if after:
+            last_created_at, last_id = decode_cursor(after)
+            conditions.append("(r.created_at, r.id) < (%s, %s)")
+            params.extend([last_created_at, last_id])
+        
+        with self.read_transaction():
+            # Une ligne de plus que demandé indique s'il existe une page suivante
+            reviews = self.execute_query(f"""
+                SELECT r.*, u.first_name, u.last_name
+                FROM reviews r
+                JOIN users u ON r.user_id = u.id
+                WHERE {" AND ".join(conditions)}
+                ORDER BY r.created_at DESC, r.id DESC
+                LIMIT %s
+            """, tuple(params + [limit + 1])) or []
+            summary = self.get_review_summary(school_id)
+        
+        has_more = len(reviews) > limit
+        reviews = reviews[:limit]
+        next_cursor = None
+        if has_more:
+            # DATETIME n'est pas sérialisable en JSON : le curseur garde sa forme texte
+            next_cursor = encode_cursor([str(reviews[-1]['created_at']), reviews[-1]['id']])
+        
+        return {
+            'data': reviews,
+            'summary': summary,
+            'next_cursor': next_cursor
+        }
+    
+    def get_review_summary(self, school_id: int) -> Dict:
+        """Nombre d'avis et note moyenne de l'école, histogramme des notes des avis écrits"""
+        schools = self.execute_query("SELECT total_reviews, rating FROM schools WHERE id = %s", (school_id,))
+        rows = self.execute_query(
+            "SELECT rating, review_count FROM school_rating_counts WHERE school_id = %s", (school_id,)
+        ) or []
+        counts = ((row['rating'], row['review_count']) for row in rows)
+        if not schools:
+            return rating_summary(counts)
+        return rating_summary(counts, schools[0]['total_reviews'], schools[0]['rating'])
+    
+    def get_school_events(self, school_id: int) -> List[Dict]:
+        """Récupère les événements à venir d'une école"""
+        query = """
+        SELECT * FROM events
+        WHERE school_id = %s AND event_date >= CURDATE()
+        ORDER BY event_date ASC, event_time ASC
+        """
+        
+        events = self.execute_query(query, (school_id,))
+        
+        return events or []
+    
+    def get_school_specializations(self, school_id: int) -> List[Dict]:
+        """Récupère les spécialités d'une école (nom, description)"""
         query = """
-        SELECT r.*, u.first_name, u.last_name
-        FROM reviews r
-        JOIN users u ON r.user_id = u.id
-        WHERE r.school_id = %s
-        ORDER BY r.created_at DESC
+        SELECT sp.*
+        FROM school_specializations ss
+        JOIN specializations sp ON ss.specialization_id = sp.id
+        WHERE ss.school_id = %s
+        ORDER BY sp.name
+        """
+        
+        specializations = self.execute_query(query, (school_id,))
+        
+        return specializations or []
+    
+    def get_school_detail(self, school_id: int, include: Iterable[str] = ()) -> Optional[Dict]:
+        """
+        Fiche d'une école avec les relations demandées (voir SCHOOL_INCLUDES), lues dans une
+        seule transaction de lecture sur une seule connexion du pool.
+        `specializations` remplace la liste des noms par les spécialités complètes.
+        """
+        loaders = {
+            'images': self.get_school_images,
+            'events': self.get_school_events,
+            'specializations': self.get_school_specializations
+        }
+        with self.read_transaction():
+            school = self.get_school_by_id(school_id)
+            if school is not None:
+                for name in include:
+                    if name == 'reviews':
+                        # Première page d'avis, avec le résumé des notes et le curseur de la suite
+                        page = self.list_school_reviews(school_id)
+                        school['reviews'] = page['data']
+                        school['reviews_summary'] = page['summary']
+                        school['reviews_next_cursor'] = page['next_cursor']
+                    else:
+                        school[name] = loaders[name](school_id)
+        
+        return school
+    
+    def get_schools_by_ids(self, ids: List[int], fields: List[str] = None) -> List[Dict]:
+        """
+        Écoles dont l'identifiant figure dans `ids`, dans l'ordre demandé (les absentes sont
+        ignorées), avec leurs images. Trois requêtes quel que soit le nombre d'identifiants :
+        les écoles, leurs spécialités et leurs images (WHERE ... IN), dans une même transaction.
+        """
+        if not ids:
+            return []
+        fields = fields or list(SCHOOL_FIELDS)
+        columns = ", ".join(f"{SCHOOL_FIELDS[field]} AS {field}"
+                            for field in fields if field != 'specializations')
+        
+        with self.read_transaction():
+            rows = self.execute_query(f"""
+                SELECT {columns}
+                FROM schools s
+                LEFT JOIN cities c ON s.city_id = c.id
+                LEFT JOIN school_types st ON s.school_type_id = st.id
+                WHERE s.id IN ({", ".join(["%s"] * len(ids))})
+            """, tuple(ids)) or []
+            schools = {school['id']: school for school in rows}
+            for school in rows:
+                school['images'] = []
+                if 'specializations' in fields:
+                    school['specializations'] = None
+            
+            found = tuple(schools)
+            placeholders = ", ".join(["%s"] * len(found))
+            if found and 'specializations' in fields:
+                specializations = self.execute_query(f"""
+                    SELECT ss.school_id, GROUP_CONCAT(sp.name) AS names
+                    FROM school_specializations ss
+                    JOIN specializations sp ON ss.specialization_id = sp.id
+                    WHERE ss.school_id IN ({placeholders})
+                    GROUP BY ss.school_id
+                """, found) or []
+                for row in specializations:
+                    schools[row['school_id']]['specializations'] = row['names']
+            
+            if found:
+                images = self.execute_query(f"""
+                    SELECT * FROM school_images
+                    WHERE school_id IN ({placeholders})
+                    ORDER BY school_id, is_primary DESC
+                """, found) or []
+                for image in images:
+                    schools[image['school_id']]['images'].append(image)
+        
+        return [schools[school_id] for school_id in ids if school_id in schools]
+    
+    def get_nearby_schools(self, lat: float, lon: float, radius_km: float,
+                           limit: int = DEFAULT_NEARBY_LIMIT) -> List[Dict]:
+        """
+        Écoles à moins de `radius_km` km du point (lat, lon), de la plus proche à la plus
+        éloignée (`distance_km`). Seules les écoles de la boîte englobante, lues par
+        idx_schools_location, sont mesurées ; les champs sont lus pour les `limit` retenues.
+        """
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+        columns = ", ".join(f"{expression} AS {name}" for name, expression in SCHOOL_FIELDS.items())
+        query = f"""
+        SELECT {columns}, n.distance_km
+        FROM (
+            SELECT s.id, {_HAVERSINE_KM} AS distance_km
+            FROM schools s
+            WHERE s.latitude BETWEEN %s AND %s AND s.longitude BETWEEN %s AND %s
+            HAVING distance_km <= %s
+            ORDER BY distance_km, s.id
+            LIMIT %s
+        ) n
+        JOIN schools s ON s.id = n.id
+        LEFT JOIN cities c ON s.city_id = c.id
+        LEFT JOIN school_types st ON s.school_type_id = st.id
+        ORDER BY n.distance_km, s.id
         """
         
-        reviews = self.execute_query(query, (school_id,))
+        schools = self.execute_query(query, (lat, lat, lon, min_lat, max_lat, min_lon, max_lon, radius_km, limit)) or []
+        for school in schools:
+            school['distance_km'] = round(float(school['distance_km']), 2)
         
-        if reviews:
-            for review in reviews:
-                if 'created_at' in review and review['created_at']:
-                    review['created_at'] = review['created_at'].isoformat()
+        return schools
+    
+    def fill_missing_coordinates(self) -> int:
+        """Place au centre de leur ville les écoles importées sans coordonnées ; retourne leur nombre"""
+        updated = self.execute_query(FILL_SCHOOL_COORDINATES, fetch=False) or 0
+        if updated:
+            self.invalidate_cache(CACHE_KEY_SCHOOLS, CACHE_KEY_MAP_GRID)
+        return updated
+    
+    def _load_map_grid(self) -> Optional[ClusterGrid]:
+        """Construit la grille de regroupement de la carte (None en cas d'erreur)"""
+        rows = self.execute_query("""
+            SELECT id, name, latitude, longitude FROM schools
+            WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+        """)
+        if rows is None:
+            return None
+        return ClusterGrid((row['id'], row['name'], float(row['latitude']), float(row['longitude'])) for row in rows)
+    
+    def get_map_schools(self, bbox: BoundingBox, zoom: int, limit: int = MAP_MAX_SCHOOLS) -> Dict:
+        """
+        Contenu de la carte pour la fenêtre `bbox` : jusqu'à MAP_CLUSTER_MAX_ZOOM, les groupes de la
+        grille précalculée (en cache, invalidée avec le catalogue) ; au-delà, les écoles de la
+        fenêtre lues par idx_schools_location, au plus `limit` (`truncated` si d'autres existent).
+        """
+        if zoom <= MAP_CLUSTER_MAX_ZOOM:
+            grid = self.cache.get_or_load(CACHE_KEY_MAP_GRID, self._load_map_grid)
+            return {'clustered': True, 'data': grid.clusters(bbox, zoom) if grid else [], 'truncated': False}
         
-        return reviews or []
+        min_lat, max_lat, min_lon, max_lon = bbox
+        rows = self.execute_query("""
+            SELECT id, name, latitude, longitude FROM schools
+            WHERE latitude BETWEEN %s AND %s AND longitude BETWEEN %s AND %s
+            ORDER BY id
+            LIMIT %s
+        """, (min_lat, max_lat, min_lon, max_lon, limit + 1)) or []
+        return {
+            'clustered': False,
+            'data': [map_point(row['id'], row['name'], float(row['latitude']), float(row['longitude']))
+                     for row in rows[:limit]],
+            'truncated': len(rows) > limit
+        }
     
     def add_review(self, school_id: int, user_id: int, rating: int, comment: str) -> bool:
-        """Ajoute un avis"""
-        query = "INSERT INTO reviews (school_id, user_id, rating, comment) VALUES (%s, %s, %s, %s)"
-        result = self.execute_query(query, (school_id, user_id, rating, comment), fetch=False)
-        return result is not None and result > 0
+        """Ajoute un avis et met à jour la note de l'école dans la même transaction"""
+        try:
+            with self.transaction() as cursor:
+                cursor.execute(
+                    "INSERT INTO reviews (school_id, user_id, rating, comment) VALUES (%s, %s, %s, %s)",
+                    (school_id, user_id, rating, comment)
+                )
+                # MySQL évalue les affectations de gauche à droite : la moyenne d'abord,
+                # calculée avec l'ancienne somme et l'ancien nombre d'avis (plus la note a priori)
+                cursor.execute("""
+                    UPDATE schools
+                    SET rating = (rating_sum + rating_prior_sum + %s) / (total_reviews + rating_prior_weight + 1),
+                        rating_sum = rating_sum + %s,
+                        total_reviews = total_reviews + 1
+                    WHERE id = %s
+                """, (rating, rating, school_id))
+                cursor.execute("""
+                    INSERT INTO school_rating_counts (school_id, rating, review_count)
+                    VALUES (%s, %s, 1)
+                    ON DUPLICATE KEY UPDATE review_count = review_count + 1
+                """, (school_id, rating))
+        except Error as e:
+            print(f"Erreur lors de l'ajout de l'avis: {e}")
+            return False
+        
+        self.invalidate_cache(CACHE_KEY_SCHOOLS)
+        return True
+    
+    def recompute_rating_aggregates(self) -> int:
+        """
+        Recalcule note, somme, nombre d'avis et histogramme des notes de toutes les écoles
+        depuis la table reviews (maintenance/réparation), note a priori comprise. Une école sans
+        avis ni note a priori garde sa note. Retourne le nombre d'écoles modifiées.
+        """
+        try:
+            with self.transaction() as cursor:
+                cursor.execute("""
+                    UPDATE schools s
+                    LEFT JOIN (
+                        SELECT school_id, COUNT(*) AS n, SUM(rating) AS total
+                        FROM reviews
+                        GROUP BY school_id
+                    ) agg ON agg.school_id = s.id
+                    SET s.total_reviews = COALESCE(agg.n, 0),
+                        s.rating_sum = COALESCE(agg.total, 0),
+                        s.rating = IF(COALESCE(agg.n, 0) + s.rating_prior_weight > 0,
+                                      (COALESCE(agg.total, 0) + s.rating_prior_sum) / (COALESCE(agg.n, 0) + s.rating_prior_weight),
+                                      s.rating)
+                """)
+                updated = cursor.rowcount
+                
+                cursor.execute("DELETE FROM school_rating_counts")
+                cursor.execute("""
+                    INSERT INTO school_rating_counts (school_id, rating, review_count)
+                    SELECT school_id, rating, COUNT(*) FROM reviews
+                    WHERE school_id IS NOT NULL AND rating IS NOT NULL
+                    GROUP BY school_id, rating
+                """)
+        except Error as e:
+            print(f"Erreur lors du recalcul des notes: {e}")
+            return 0
+        
+        self.invalidate_cache(CACHE_KEY_SCHOOLS)
+        return updated
     
     def create_user(self, email: str, password: str, first_name: str = None, last_name: str = None, city: str = None) -> Optional[int]:
-        """Crée un nouvel utilisateur"""
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+        """Crée un nouvel utilisateur (PasswordHasherBusy si le pool bcrypt est saturé)"""
+        password_hash = password_hasher.hash_password(password)
         query = "INSERT INTO users (email, password_hash, first_name, last_name, city) VALUES (%s, %s, %s, %s, %s)"
-        result = self.execute_query(query, (email, password_hash, first_name, last_name, city), fetch=False)
-        
-        if result and result > 0:
-            # Récupérer l'ID de l'utilisateur créé
-            user_id = self.execute_query("SELECT LAST_INSERT_ID() as id")
-            return user_id[0]['id'] if user_id else None
-        return None
+        # LAST_INSERT_ID() n'a de sens que sur la connexion de l'INSERT : on lit lastrowid directement
+        user_id = self.execute_insert(query, (email, password_hash, first_name, last_name, city))
+        return user_id or None
     
     def authenticate_user(self, email: str, password: str) -> Optional[Dict]:
-        """Authentifie un utilisateur"""
+        """Authentifie un utilisateur (PasswordHasherBusy si le pool bcrypt est saturé)"""
         query = "SELECT * FROM users WHERE email = %s"
         user = self.execute_query(query, (email,))
         
-        if user and bcrypt.checkpw(password.encode('utf-8'), user[0]['password_hash'].encode('utf-8')):
+        if user and password_hasher.check_password(password, user[0]['password_hash']):
             user_data = user[0].copy()
             # Ne pas renvoyer le hash du mot de passe
             user_data.pop('password_hash', None)
-            if 'created_at' in user_data and user_data['created_at']:
-                user_data['created_at'] = user_data['created_at'].isoformat()
-            if 'updated_at' in user_data and user_data['updated_at']:
-                user_data['updated_at'] = user_data['updated_at'].isoformat()
             return user_data
         return None
     
@@ -229,58 +1081,296 @@ class EazySkoolMySQLDB:
         
         favorites = self.execute_query(query, (user_id,))
         
-        if favorites:
-            for favorite in favorites:
-                if 'created_at' in favorite and favorite['created_at']:
-                    favorite['created_at'] = favorite['created_at'].isoformat()
-        
         return favorites or []
     
     def add_favorite(self, user_id: int, school_id: int) -> bool:
         """Ajoute un favori"""
-        query = "INSERT IGNORE INTO favorites (user_id, school_id) VALUES (%s, %s)"
-        result = self.execute_query(query, (user_id, school_id), fetch=False)
-        return result is not None and result > 0
+        try:
+            with self.transaction() as cursor:
+                cursor.execute("INSERT IGNORE INTO favorites (user_id, school_id) VALUES (%s, %s)",
+                               (user_id, school_id))
+                added = cursor.rowcount > 0
+                if added:
+                    self._bump_favorites_version(cursor, user_id)
+        except Error as e:
+            print(f"Erreur lors de l'ajout aux favoris: {e}")
+            return False
+        return added
     
     def remove_favorite(self, user_id: int, school_id: int) -> bool:
         """Supprime un favori"""
-        query = "DELETE FROM favorites WHERE user_id = %s AND school_id = %s"
-        result = self.execute_query(query, (user_id, school_id), fetch=False)
-        return result is not None and result > 0
+        try:
+            with self.transaction() as cursor:
+                cursor.execute("DELETE FROM favorites WHERE user_id = %s AND school_id = %s",
+                               (user_id, school_id))
+                removed = cursor.rowcount > 0
+                if removed:
+                    self._bump_favorites_version(cursor, user_id)
+        except Error as e:
+            print(f"Erreur lors de la suppression des favoris: {e}")
+            return False
+        return removed
     
-    def get_events(self) -> List[Dict]:
-        """Récupère tous les événements"""
-        query = """
-        SELECT e.*, s.name as school_name
-        FROM events e
-        LEFT JOIN schools s ON e.school_id = s.id
-        ORDER BY e.event_date ASC, e.event_time ASC
+    @staticmethod
+    def _bump_favorites_version(cursor, user_id: int) -> int:
+        """Incrémente la version des favoris de l'utilisateur (dans la transaction en cours)"""
+        cursor.execute("""
+            INSERT INTO favorite_versions (user_id, version) VALUES (%s, 1)
+            ON DUPLICATE KEY UPDATE version = version + 1
+        """, (user_id,))
+        cursor.execute("SELECT version FROM favorite_versions WHERE user_id = %s", (user_id,))
+        return cursor.fetchone()['version']
+    
+    def sync_favorites(self, user_id: int, school_ids: List[int], version: Optional[int] = None) -> Optional[Dict]:
         """
+        Fusionne l'ensemble complet des favoris d'un client avec ceux de la base, en une transaction.
         
-        events = self.execute_query(query)
-        
-        if events:
-            for event in events:
-                if 'created_at' in event and event['created_at']:
-                    event['created_at'] = event['created_at'].isoformat()
-                if 'event_date' in event and event['event_date']:
-                    event['event_date'] = event['event_date'].isoformat()
-                if 'event_time' in event and event['event_time']:
-                    event['event_time'] = str(event['event_time'])
+        `version` est celle renvoyée au client par sa dernière synchronisation : si elle est à jour,
+        l'ensemble du client fait foi (ajouts et retraits) ; périmée ou absente (nouvel appareil),
+        les deux ensembles sont réunis sans rien retirer. Les écoles inconnues sont ignorées.
+        Retourne {'school_ids', 'version', 'added', 'removed'}, ou None en cas d'erreur.
+        """
+        try:
+            with self.transaction() as cursor:
+                # La ligne de version, créée au besoin puis verrouillée, sérialise les
+                # synchronisations d'un même utilisateur
+                cursor.execute("INSERT IGNORE INTO favorite_versions (user_id, version) VALUES (%s, 0)", (user_id,))
+                cursor.execute("SELECT version FROM favorite_versions WHERE user_id = %s FOR UPDATE", (user_id,))
+                current_version = cursor.fetchone()['version']
+                cursor.execute("SELECT school_id FROM favorites WHERE user_id = %s", (user_id,))
+                current = {row['school_id'] for row in cursor.fetchall()}
+                
+                known = set()
+                if school_ids:
+                    cursor.execute(f"SELECT id FROM schools WHERE id IN ({', '.join(['%s'] * len(school_ids))})",
+                                   tuple(school_ids))
+                    known = {row['id'] for row in cursor.fetchall()}
+                added = [school_id for school_id in school_ids if school_id in known and school_id not in current]
+                removed = []
+                if version == current_version:
+                    wanted = set(school_ids)
+                    removed = [school_id for school_id in current if school_id not in wanted]
+                
+                if added:
+                    cursor.executemany("INSERT INTO favorites (user_id, school_id) VALUES (%s, %s)",
+                                       [(user_id, school_id) for school_id in added])
+                if removed:
+                    cursor.executemany("DELETE FROM favorites WHERE user_id = %s AND school_id = %s",
+                                       [(user_id, school_id) for school_id in removed])
+                if added or removed:
+                    current_version = self._bump_favorites_version(cursor, user_id)
+                
+                cursor.execute("""
+                    SELECT school_id FROM favorites
+                    WHERE user_id = %s
+                    ORDER BY created_at DESC, id DESC
+                """, (user_id,))
+                merged = [row['school_id'] for row in cursor.fetchall()]
+        except Error as e:
+            print(f"Erreur lors de la synchronisation des favoris: {e}")
+            return None
         
-        return events or []
+        return {
+            'school_ids': merged,
+            'version': current_version,
+            'added': len(added),
+            'removed': len(removed)
+        }
     
-    def export_to_json(self, filename: str = 'eazyskool_export.json'):
-        """Exporte toutes les données en JSON"""
-        data = {
-            'schools': self.get_all_schools(),
-            'cities': self.get_cities(),
-            'school_types': self.get_school_types(),
-            'events': self.get_events()
+    def list_events(self, date_from: str, date_to: str = None, school_id: int = None, city: str = None,
+                    limit: int = DEFAULT_EVENTS_LIMIT, after: str = None) -> Dict:
+        """
+        Page d'événements du `date_from` au `date_to` inclus (AAAA-MM-JJ), dans l'ordre
+        (date, heure, id), éventuellement d'une école ou d'une ville.
+        
+        `after` est le curseur `next_cursor` de la page précédente : la lecture reprend dans
+        l'index (event_date, event_time, id) à partir de sa date, sans relire les pages servies
+        ni les événements passés, quel que soit l'historique du calendrier.
+        """
+        conditions = ["e.event_date >= %s"]
+        params = [date_from]
+        if after:
+            last_date, last_time, last_id = decode_cursor(after)
+            # La date du curseur borne la plage lue ; l'heure et l'id départagent ce jour-là
+            # (heure absente = NULL, classée en premier)
+            params[0] = max(date_from, last_date)
+            if last_time is None:
+                conditions.append("(e.event_date > %s OR e.event_time IS NOT NULL OR e.id > %s)")
+                params.extend([last_date, last_id])
+            else:
+                conditions.append("(e.event_date, e.event_time, e.id) > (%s, %s, %s)")
+                params.extend([last_date, last_time, last_id])
+        if date_to:
+            conditions.append("e.event_date <= %s")
+            params.append(date_to)
+        if school_id is not None:
+            conditions.append("e.school_id = %s")
+            params.append(school_id)
+        if city:
+            conditions.append("""e.school_id IN (
+                SELECT s2.id FROM schools s2 JOIN cities c ON s2.city_id = c.id WHERE c.name = %s
+            )""")
+            params.append(city)
+        
+        # Une ligne de plus que demandé indique s'il existe une page suivante
+        events = self.execute_query(f"""
+            SELECT e.*, s.name as school_name
+            FROM events e
+            LEFT JOIN schools s ON e.school_id = s.id
+            WHERE {" AND ".join(conditions)}
+            ORDER BY e.event_date ASC, e.event_time ASC, e.id ASC
+            LIMIT %s
+        """, tuple(params + [limit + 1]))
+        if events is None:
+            raise Error(msg="Lecture des événements impossible")
+        
+        has_more = len(events) > limit
+        events = events[:limit]
+        next_cursor = None
+        if has_more:
+            # DATE et TIME (timedelta) ne sont pas sérialisables en JSON : le curseur garde leur forme texte
+            last = events[-1]
+            last_time = str(last['event_time']) if last['event_time'] is not None else None
+            next_cursor = encode_cursor([str(last['event_date']), last_time, last['id']])
+        
+        return {
+            'data': events,
+            'next_cursor': next_cursor
         }
+    
+    def archive_past_events(self, before: str = None) -> int:
+        """
+        Déplace dans events_archive les événements antérieurs à `before` (AAAA-MM-JJ, par défaut
+        il y a EVENTS_ARCHIVE_AFTER_DAYS jours) : la table events ne garde que le calendrier
+        utile. Retourne le nombre d'événements archivés.
+        """
+        if before is None:
+            before = (date.today() - timedelta(days=EVENTS_ARCHIVE_AFTER_DAYS)).isoformat()
+        try:
+            with self.transaction() as cursor:
+                # events_archive a les colonnes d'events (CREATE TABLE ... LIKE), puis archived_at
+                cursor.execute(
+                    "INSERT INTO events_archive SELECT e.*, CURRENT_TIMESTAMP FROM events e WHERE e.event_date < %s",
+                    (before,)
+                )
+                cursor.execute("DELETE FROM events WHERE event_date < %s", (before,))
+                archived = cursor.rowcount
+        except Error as e:
+            print(f"Erreur lors de l'archivage des événements: {e}")
+            return 0
+        
+        if archived:
+            self.invalidate_cache(CACHE_KEY_EVENTS)
+        return archived
+    
+    def _audit_probes(self) -> List[AuditProbe]:
+        """Appels représentatifs de chaque requête de lecture, pour l'audit des plans"""
+        return [
+            ('get_all_schools', self._load_all_schools, True),
+            ('get_cities', self._load_cities, True),
+            ('get_school_types', self._load_school_types, True),
+            ('get_map_schools (grille)', self._load_map_grid, True),
+            ('get_search_facets (index)', self._load_facet_index, True),
+            # L'index (lecture complète, en cache) a sa propre sonde : ici, la requête de chaque recherche
+            ('get_search_facets', lambda: self._search_hits_bitmap('ecole'), False),
+            ('get_autocomplete_entries', self.get_autocomplete_entries, True),
+            ('get_fuzzy_entries', self.get_fuzzy_entries, True),
+            ('get_school_by_id', lambda: self.get_school_by_id(1), False),
+            ('list_schools', lambda: self.list_schools(), False),
+            ('list_schools (curseur)', lambda: self.list_schools(after=encode_cursor([5, 1])), False),
+            ('list_schools (ville, type)', lambda: self.list_schools(city='Strasbourg', school_type='Université'), False),
+            ('list_schools (recherche)', lambda: self.list_schools('ecole'), False),
+            ('search_schools', lambda: self.search_schools('ecole'), False),
+            ('get_school_images', lambda: self.get_school_images(1), False),
+            ('list_school_reviews', lambda: self.list_school_reviews(1), False),
+            ('list_school_reviews (curseur)',
+             lambda: self.list_school_reviews(1, after=encode_cursor(['2024-01-01 00:00:00', 1])), False),
+            ('get_school_detail', lambda: self.get_school_detail(1, SCHOOL_INCLUDES), False),
+            ('get_schools_by_ids', lambda: self.get_schools_by_ids([1, 2, 3]), False),
+            ('get_nearby_schools', lambda: self.get_nearby_schools(48.58, 7.75, 10), False),
+            ('get_map_schools', lambda: self.get_map_schools((48.5, 48.7, 7.6, 7.9), MAP_CLUSTER_MAX_ZOOM + 2), False),
+            ('authenticate_user', lambda: self.authenticate_user('audit@eazyskool.invalid', ''), False),
+            ('get_user_favorites', lambda: self.get_user_favorites(1), False),
+            ('list_events', lambda: self.list_events(date.today().isoformat()), False),
+            ('list_events (curseur)',
+             lambda: self.list_events('2024-01-01', after=encode_cursor(['2024-09-27', '14:00:00', 1])), False),
+            ('list_events (école)', lambda: self.list_events('2024-01-01', school_id=1), False),
+            ('list_events (ville)', lambda: self.list_events('2024-01-01', city='Strasbourg'), False),
+        ]
+    
+    def audit_query_plans(self) -> List[Dict]:
+        """
+        Exécute chaque sonde en enregistrant ses requêtes, puis passe chaque SELECT dans
+        EXPLAIN pour signaler les parcours complets de table (type = ALL).
+        """
+        if self.pool is None and not self.connect():
+            return []
+        
+        report = []
+        for name, probe, full_scan_expected in self._audit_probes():
+            self._query_log = []
+            try:
+                probe()
+            finally:
+                statements, self._query_log = self._query_log, None
+            
+            scans = []
+            try:
+                with self.pool.connection() as connection:
+                    cursor = connection.cursor(dictionary=True)
+                    try:
+                        for query, params in statements:
+                            if query.lstrip().upper().startswith('SELECT'):
+                                scans.extend(mysql_full_scans(cursor, query, params))
+                    finally:
+                        cursor.close()
+            except Error as e:
+                print(f"Erreur lors de l'audit de {name}: {e}")
+            
+            report.append({
+                'name': name,
+                'queries': len(statements),
+                'scans': scans,
+                'full_scan_expected': full_scan_expected
+            })
         
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        return report
+    
+    def iter_export(self, fetch_size: int = EXPORT_FETCH_SIZE) -> Iterator[ExportRecord]:
+        """
+        Parcourt les données exportées, (table, ligne), dans une transaction de lecture.
+        Curseurs non bufferisés : MySQL envoie les lignes au fil des fetchmany, la mémoire
+        utilisée ne dépend pas du volume.
+        """
+        with self.read_transaction():
+            connection = self._local.connection
+            for table, query in EXPORT_QUERIES:
+                cursor = connection.cursor(dictionary=True)
+                try:
+                    cursor.execute(query)
+                    while True:
+                        rows = cursor.fetchmany(fetch_size)
+                        if not rows:
+                            break
+                        for row in rows:
+                            if table == 'schools':
+                                row['specializations'] = row['specializations'].split(',') if row['specializations'] else []
+                            yield table, row
+                finally:
+                    if connection.unread_result:
+                        # Export interrompu (client déconnecté) : lignes restantes lues et ignorées
+                        connection.consume_results()
+                    cursor.close()
+    
+    def export_ndjson(self, filename: str = 'eazyskool_export.ndjson') -> int:
+        """Exporte toutes les données en NDJSON (gzip si le nom finit par .gz), en flux"""
+        written = write_chunks(filename, ndjson_chunks(self.iter_export()))
+        print(f"Export terminé: {filename}")
+        return written
+    
+    def export_to_json(self, filename: str = 'eazyskool_export.json'):
+        """Exporte toutes les données en JSON (un tableau par table), écrit au fil de la lecture"""
+        write_chunks(filename, json_document_chunks(self.iter_export()))
         
         print(f"Export terminé: {filename}")
     
@@ -288,8 +1378,10 @@ class EazySkoolMySQLDB:
         """Teste la connexion à la base de données"""
         try:
             if self.connect():
+                # Emprunte une connexion sans fermer le pool partagé par le serveur
+                with self.pool.connection() as connection:
+                    connection.ping(reconnect=False)
                 print("✅ Connexion MySQL réussie!")
-                self.disconnect()
                 return True
             else:
                 print("❌ Échec de la connexion MySQL")
@@ -305,6 +1397,21 @@ def test_mysql_connection():
     return db.test_connection()
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == 'recompute-ratings':
+        # python mysql_database_manager.py recompute-ratings
+        db = EazySkoolMySQLDB()
+        updated = db.recompute_rating_aggregates()
+        print(f"Notes recalculées pour {updated} écoles")
+        db.disconnect()
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == 'archive-events':
+        # python mysql_database_manager.py archive-events [AAAA-MM-JJ]
+        db = EazySkoolMySQLDB()
+        archived = db.archive_past_events(sys.argv[2] if len(sys.argv) > 2 else None)
+        print(f"{archived} événements archivés")
+        db.disconnect()
+        sys.exit(0)
+    
     print("Test de connexion MySQL...")
     if test_mysql_connection():
         print("La base de données MySQL est prête!")
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool MySQL Pool
+Pool de connexions MySQL borné, partagé entre les threads du serveur API
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict
+
+import mysql.connector
+from mysql.connector import Error
+from mysql.connector.errors import InterfaceError, OperationalError, PoolError
+
+
+class PoolTimeoutError(PoolError):
+    """Aucune connexion n'a pu être obtenue dans le délai imparti"""
+
+
+class _PooledConnection:
+    """Connexion MySQL accompagnée de ses métadonnées de recyclage"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+        self.uses = 0
+
+
+class MySQLConnectionPool:
+    """
+    Pool borné de connexions MySQL.
+
+    - entre `min_size` et `max_size` connexions ouvertes ;
+    - un emprunt attend au plus `timeout` secondes avant PoolTimeoutError ;
+    - une connexion inactive depuis plus de `ping_after_idle` secondes est
+      vérifiée (ping) avant d'être prêtée, et remplacée si elle est morte ;
+    - une connexion est recyclée après `max_uses` emprunts ou `max_lifetime` secondes.
+    """
+
+    def __init__(self, connect_kwargs: Dict, min_size: int = 2, max_size: int = 10,
+                 timeout: float = 5.0, max_uses: int = 1000, max_lifetime: float = 1800.0,
+                 ping_after_idle: float = 1.0):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Taille de pool invalide: 0 <= min_size <= max_size et max_size >= 1")
+
+        self.connect_kwargs = dict(connect_kwargs)
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_uses = max_uses
+        self.max_lifetime = max_lifetime
+        self.ping_after_idle = ping_after_idle
+
+        self._idle = deque()
+        self._size = 0  # connexions ouvertes (inactives + empruntées)
+        self._in_use = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+        # Statistiques
+        self._checkouts = 0
+        self._timeouts = 0
+        self._created = 0
+        self._recycled = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+        for _ in range(min_size):
+            self._idle.append(self._create())
+            self._size += 1
+
+    def _create(self) -> _PooledConnection:
+        """Ouvre une nouvelle connexion physique"""
+        connection = mysql.connector.connect(**self.connect_kwargs)
+        connection.autocommit = True
+        with self._condition:
+            self._created += 1
+        return _PooledConnection(connection)
+
+    def _is_expired(self, pooled: _PooledConnection) -> bool:
+        """Indique si la connexion a atteint sa limite d'utilisations ou de durée de vie"""
+        if self.max_uses and pooled.uses >= self.max_uses:
+            return True
+        if self.max_lifetime and time.monotonic() - pooled.created_at >= self.max_lifetime:
+            return True
+        return False
+
+    def _is_alive(self, pooled: _PooledConnection) -> bool:
+        """Vérifie la connexion par un ping si elle est restée inactive trop longtemps"""
+        if time.monotonic() - pooled.last_used_at < self.ping_after_idle:
+            return True
+        try:
+            pooled.connection.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    @staticmethod
+    def _close_quietly(pooled: _PooledConnection):
+        try:
+            pooled.connection.close()
+        except Error:
+            pass
+
+    def acquire(self) -> _PooledConnection:
+        """Emprunte une connexion, en attendant au plus `timeout` secondes"""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        pooled = None
+
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise PoolError("Le pool de connexions est fermé")
+                if self._idle:
+                    # LIFO : on réutilise la connexion la plus « chaude »
+                    pooled = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    # Réserve la place avant d'ouvrir la connexion hors du verrou
+                    self._size += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeoutError(
+                        f"Aucune connexion MySQL disponible après {self.timeout:.1f}s "
+                        f"({self._in_use}/{self.max_size} utilisées)"
+                    )
+                self._condition.wait(remaining)
+            self._in_use += 1
+
+        try:
+            if pooled is None:
+                pooled = self._create()
+            elif self._is_expired(pooled) or not self._is_alive(pooled):
+                self._close_quietly(pooled)
+                with self._condition:
+                    self._recycled += 1
+                pooled = self._create()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._in_use -= 1
+                self._condition.notify()
+            raise
+
+        waited = time.monotonic() - started
+        with self._condition:
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return pooled
+
+    def release(self, pooled: _PooledConnection, broken: bool = False):
+        """Rend une connexion au pool (elle est fermée si cassée ou expirée)"""
+        pooled.uses += 1
+        pooled.last_used_at = time.monotonic()
+
+        if not broken:
+            try:
+                # Une transaction laissée ouverte ne doit pas fuiter vers le prochain emprunteur
+                if pooled.connection.in_transaction:
+                    pooled.connection.rollback()
+            except Error:
+                broken = True
+
+        with self._condition:
+            self._in_use -= 1
+            if broken or self._closed or self._is_expired(pooled):
+                self._size -= 1
+                if not broken and not self._closed:
+                    self._recycled += 1
+                self._close_quietly(pooled)
+            else:
+                self._idle.append(pooled)
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self):
+        """Contexte d'emprunt : `with pool.connection() as conn: ...`"""
+        pooled = self.acquire()
+        broken = False
+        try:
+            yield pooled.connection
+        except (InterfaceError, OperationalError):
+            broken = True
+            raise
+        finally:
+            self.release(pooled, broken=broken)
+
+    def stats(self) -> Dict:
+        """Retourne les statistiques d'utilisation du pool"""
+        with self._condition:
+            return {
+                'size': self._size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'checkouts': self._checkouts,
+                'timeouts': self._timeouts,
+                'created': self._created,
+                'recycled': self._recycled,
+                'avg_wait_ms': round(self._total_wait / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+                'max_wait_ms': round(self._max_wait * 1000, 3),
+            }
+
+    def close(self):
+        """Ferme les connexions inactives ; les connexions empruntées sont fermées à leur retour"""
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                self._close_quietly(self._idle.pop())
+                self._size -= 1
+            self._condition.notify_all()
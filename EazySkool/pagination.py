@@ -0,0 +1,233 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Pagination
+Curseurs opaques et lecture des paramètres de pagination/tri/projection des listes
+"""
+
+import base64
+import json
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config import DEFAULT_SCHOOLS_PER_PAGE, MAX_SCHOOLS_PER_PAGE, MAX_SCHOOL_IDS_PER_REQUEST
+
+# Paramètres de requête qui activent la pagination côté serveur
+PAGINATION_ARGS = ('page', 'per_page', 'after', 'sort', 'order', 'fields')
+
+
+def encode_cursor(values: Iterable) -> str:
+    """Encode les valeurs de la dernière ligne servie en un curseur opaque"""
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> List:
+    """Décode un curseur produit par encode_cursor (ValueError s'il est invalide)"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Curseur invalide: {cursor}") from e
+    if not isinstance(values, list):
+        raise ValueError(f"Curseur invalide: {cursor}")
+    return values
+
+
+def parse_fields(raw: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """Transforme `fields=id,name` en liste validée (None = tous les champs)"""
+    if not raw:
+        return None
+    allowed = list(allowed)
+    fields = [field.strip() for field in raw.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValueError(f"Champ(s) inconnu(s): {', '.join(unknown)}")
+    # L'identifiant est toujours renvoyé : le client en a besoin pour les liens et favoris
+    if 'id' not in fields:
+        fields.insert(0, 'id')
+    return fields
+
+
+def parse_include(raw: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """Transforme `include=images,reviews` en liste validée de relations (None = non précisé)"""
+    if raw is None:
+        return None
+    allowed = list(allowed)
+    include = []
+    for name in (name.strip() for name in raw.split(',')):
+        if name and name not in include:
+            include.append(name)
+    unknown = [name for name in include if name not in allowed]
+    if unknown:
+        raise ValueError(f"Relation(s) inconnue(s): {', '.join(unknown)} (valeurs possibles: {', '.join(allowed)})")
+    return include
+
+
+def parse_facets(raw: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """Transforme `facets=city,type` (ou `facets=1` pour toutes) en liste validée (None = pas de facettes)"""
+    if raw is None or raw.strip().lower() in ('', '0', 'false'):
+        return None
+    if raw.strip().lower() in ('1', 'true', 'all'):
+        return list(allowed)
+    try:
+        return parse_include(raw, allowed)
+    except ValueError:
+        raise ValueError(f"Facette(s) inconnue(s) : valeurs possibles {', '.join(allowed)}")
+
+
+def parse_fuzzy(args) -> str:
+    """Lit `fuzzy` : auto (si la recherche exacte ne trouve rien, par défaut), 1 (toujours) ou 0 (jamais)"""
+    mode = args.get('fuzzy', 'auto').strip().lower() or 'auto'
+    if mode not in ('auto', '0', '1'):
+        raise ValueError("fuzzy doit valoir auto, 0 ou 1")
+    return mode
+
+
+def parse_ids(raw) -> List[int]:
+    """
+    Transforme `ids=1,4,9` (ou une liste JSON) en identifiants distincts, dans l'ordre
+    demandé (ValueError si absents, invalides ou trop nombreux)
+    """
+    if raw is None:
+        raise ValueError("Paramètre ids requis")
+    values = raw.split(',') if isinstance(raw, str) else raw
+    if not isinstance(values, list):
+        raise ValueError("ids doit être une liste d'identifiants")
+    # Refusé avant toute lecture : le coût ne dépend pas de la taille de la liste envoyée
+    if len(values) > MAX_SCHOOL_IDS_PER_REQUEST:
+        raise ValueError(f"Trop d'identifiants (maximum {MAX_SCHOOL_IDS_PER_REQUEST})")
+    # Dictionnaire : doublons retirés sans relire la liste, ordre de la demande conservé
+    ids = {}
+    for value in values:
+        if isinstance(value, str):
+            value = value.strip()
+            if not value:
+                continue
+            if value.isdigit():
+                value = int(value)
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(f"Identifiant invalide: {value}")
+        ids[value] = None
+    return list(ids)
+
+
+def parse_limit(args, default: int, maximum: int) -> int:
+    """Lit `limit` depuis les paramètres de requête : entier positif, plafonné à `maximum`"""
+    try:
+        limit = int(args.get('limit', default))
+    except (TypeError, ValueError):
+        raise ValueError("limit doit être un entier")
+    if limit < 1:
+        raise ValueError("limit doit être positif")
+    return min(limit, maximum)
+
+
+def parse_event_filters(args, today: date) -> Dict:
+    """
+    Lit `from` (aujourd'hui par défaut), `to` (dates AAAA-MM-JJ incluses), `school_id` et `city`
+    du calendrier (ValueError si invalides)
+    """
+    window = {}
+    for name, default in (('from', today), ('to', None)):
+        raw = args.get(name)
+        try:
+            window[name] = date.fromisoformat(raw) if raw else default
+        except ValueError:
+            raise ValueError(f"{name} doit être une date AAAA-MM-JJ")
+    if window['to'] is not None and window['to'] < window['from']:
+        raise ValueError("to doit être postérieure ou égale à from")
+
+    school_id = args.get('school_id')
+    if school_id is not None:
+        try:
+            school_id = int(school_id)
+        except ValueError:
+            raise ValueError("school_id doit être un entier")
+
+    return {
+        'date_from': window['from'].isoformat(),
+        'date_to': window['to'].isoformat() if window['to'] else None,
+        'school_id': school_id,
+        'city': args.get('city') or None
+    }
+
+
+def parse_location(args, default_radius_km: float, max_radius_km: float) -> Tuple[float, float, float]:
+    """Lit `lat`, `lon` (obligatoires) et `radius_km` (plafonné à `max_radius_km`)"""
+    values = {}
+    for name, low, high in (('lat', -90, 90), ('lon', -180, 180)):
+        raw = args.get(name)
+        if raw is None or raw == '':
+            raise ValueError(f"Paramètre {name} requis")
+        try:
+            value = float(raw)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} doit être un nombre")
+        if not low <= value <= high:
+            raise ValueError(f"{name} doit être compris entre {low} et {high}")
+        values[name] = value
+    try:
+        radius_km = float(args.get('radius_km', default_radius_km))
+    except (TypeError, ValueError):
+        raise ValueError("radius_km doit être un nombre")
+    if not radius_km > 0:
+        raise ValueError("radius_km doit être positif")
+    return values['lat'], values['lon'], min(radius_km, max_radius_km)
+
+
+def parse_map_view(args, max_zoom: int) -> Tuple[Tuple[float, float, float, float], int]:
+    """
+    Lit `bbox=lon_min,lat_min,lon_max,lat_max` (ordre GeoJSON, bornée au globe) et `zoom`
+    (entier de 0 à `max_zoom`) ; renvoie ((lat min, lat max, lon min, lon max), zoom)
+    """
+    raw = args.get('bbox')
+    if not raw:
+        raise ValueError("Paramètre bbox requis")
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(value) for value in raw.split(','))
+    except ValueError:
+        raise ValueError("bbox doit être lon_min,lat_min,lon_max,lat_max")
+    min_lat, max_lat = max(-90.0, min_lat), min(90.0, max_lat)
+    min_lon, max_lon = max(-180.0, min_lon), min(180.0, max_lon)
+    if not (min_lat <= max_lat and min_lon <= max_lon):
+        raise ValueError("bbox vide : les minimums doivent précéder les maximums")
+    try:
+        zoom = int(args.get('zoom', ''))
+    except ValueError:
+        raise ValueError("Paramètre zoom requis (entier)")
+    if not 0 <= zoom <= max_zoom:
+        raise ValueError(f"zoom doit être compris entre 0 et {max_zoom}")
+    return (min_lat, max_lat, min_lon, max_lon), zoom
+
+
+def wants_pagination(args) -> bool:
+    """Indique si la requête demande une liste paginée plutôt que le catalogue complet"""
+    return any(name in args for name in PAGINATION_ARGS)
+
+
+def parse_list_args(args, sorts: Iterable[str]) -> Dict:
+    """Lit page/per_page/after/sort/order depuis les paramètres de requête (ValueError si invalides)"""
+    try:
+        page = int(args.get('page', 1))
+        per_page = int(args.get('per_page', DEFAULT_SCHOOLS_PER_PAGE))
+    except (TypeError, ValueError):
+        raise ValueError("page et per_page doivent être des entiers")
+    if page < 1 or per_page < 1:
+        raise ValueError("page et per_page doivent être positifs")
+
+    # Sans tri explicite, le gestionnaire choisit (pertinence pour une recherche, note sinon)
+    sort = args.get('sort') or None
+    if sort is not None and sort not in sorts:
+        raise ValueError(f"Tri inconnu: {sort} (valeurs possibles: {', '.join(sorts)})")
+
+    order = args.get('order')
+    if order not in (None, 'asc', 'desc'):
+        raise ValueError("order doit valoir asc ou desc")
+
+    return {
+        'page': page,
+        'per_page': min(per_page, MAX_SCHOOLS_PER_PAGE),
+        'after': args.get('after') or None,
+        'sort': sort,
+        'order': order
+    }
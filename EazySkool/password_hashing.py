@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Password Hashing
+Hachage et vérification bcrypt dans un pool de processus dédié, borné et isolé des lectures
+"""
+
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Optional
+
+import bcrypt
+
+from config import BCRYPT_ROUNDS, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING, PASSWORD_HASH_TIMEOUT
+
+
+# Processus du pool démarrés par un serveur dédié (forkserver), ou lancés à neuf (spawn, Windows) :
+# un fork du serveur Flask, multithread, pourrait hériter d'un verrou tenu par un autre thread
+# (journalisation, cache, connexions) et s'y bloquer indéfiniment
+_START_METHOD = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class PasswordHasherBusy(Exception):
+    """Trop de calculs de mot de passe en attente, ou délai dépassé : la requête peut être réessayée"""
+
+    # Délai conseillé au client avant de réessayer (en-tête Retry-After)
+    retry_after = 1
+
+
+# Fonctions exécutées dans les processus du pool (au niveau du module : sérialisables)
+def _hash_password(password: bytes, rounds: int) -> bytes:
+    return bcrypt.hashpw(password, bcrypt.gensalt(rounds))
+
+
+def _check_password(password: bytes, password_hash: bytes) -> bool:
+    return bcrypt.checkpw(password, password_hash)
+
+
+class PasswordHasher:
+    """
+    Calculs bcrypt (~250 ms de CPU chacun au coût 12) exécutés hors des threads de requête.
+
+    - `workers` processus : les connexions s'étalent sur plusieurs cœurs sans bloquer
+      les lectures du catalogue (0 = calcul dans le thread appelant, pour les scripts) ;
+    - au plus `max_pending` calculs en cours ou en attente : au-delà, PasswordHasherBusy
+      immédiatement plutôt qu'une file qui s'allonge ;
+    - `timeout` secondes d'attente au plus par calcul.
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING,
+                 timeout: float = PASSWORD_HASH_TIMEOUT, rounds: int = BCRYPT_ROUNDS):
+        self.workers = workers
+        self.timeout = timeout
+        self.rounds = rounds
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        """Pool de processus, créé au premier calcul (pas au chargement du module)"""
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context(_START_METHOD))
+            return self._executor
+
+    def _run(self, function: Callable, *args):
+        if self.workers <= 0:
+            return function(*args)
+
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy("Trop de demandes d'authentification en cours, réessayez dans un instant")
+        try:
+            future: Future = self._get_executor().submit(function, *args)
+        except BrokenProcessPool:
+            self._slots.release()
+            self._reset_executor()
+            raise PasswordHasherBusy("Service d'authentification indisponible, réessayez dans un instant")
+        # La place est libérée quand le calcul se termine, même si l'appelant a abandonné
+        future.add_done_callback(lambda _: self._slots.release())
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            raise PasswordHasherBusy("Délai d'authentification dépassé, réessayez dans un instant")
+        except BrokenProcessPool:
+            self._reset_executor()
+            raise PasswordHasherBusy("Service d'authentification indisponible, réessayez dans un instant")
+
+    def _reset_executor(self):
+        """Abandonne un pool dont un processus est mort : le suivant sera recréé à la demande"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def hash_password(self, password: str) -> str:
+        """Hash bcrypt d'un mot de passe, au coût BCRYPT_ROUNDS"""
+        return self._run(_hash_password, password.encode('utf-8'), self.rounds).decode('utf-8')
+
+    def check_password(self, password: str, password_hash: str) -> bool:
+        """Vérifie un mot de passe contre son hash bcrypt"""
+        return self._run(_check_password, password.encode('utf-8'), password_hash.encode('utf-8'))
+
+    def shutdown(self):
+        """Arrête les processus du pool"""
+        self._reset_executor()
+
+
+# Pool partagé par les gestionnaires de base de données
+password_hasher = PasswordHasher()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Query Audit
+Audit des plans d'exécution (EXPLAIN QUERY PLAN / EXPLAIN) des requêtes des gestionnaires
+"""
+
+import re
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# Une sonde = (nom, appel exécutant les requêtes d'une méthode, parcours complet attendu)
+# Les lectures du catalogue complet (toutes les écoles, villes...) parcourent légitimement leur table.
+AuditProbe = Tuple[str, Callable[[], object], bool]
+
+# SQLite : « SCAN schools » parcourt la table ; « SCAN s USING INDEX ... » suit un index.
+# Anciennes versions : « SCAN TABLE schools ».
+_SQLITE_SCAN = re.compile(r"^SCAN (?:TABLE )?(\S+)( .*)?$")
+# Sous-requêtes matérialisées : les parcourir ne lit pas une table
+_SQLITE_DERIVED = re.compile(r"^(?:MATERIALIZE|CO-ROUTINE) (\S+)")
+# Requêtes internes des tables virtuelles (FTS5...), tracées avec les nôtres
+_SQLITE_INTERNAL = re.compile(r"'main'\.'")
+
+
+def sqlite_full_scans(conn, statement: str) -> List[str]:
+    """Étapes du plan SQLite qui parcourent une table entière"""
+    if _SQLITE_INTERNAL.search(statement):
+        return []
+    details = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {statement}").fetchall()]
+    derived = {match.group(1) for match in map(_SQLITE_DERIVED.match, details) if match}
+    scans = []
+    for detail in details:
+        match = _SQLITE_SCAN.match(detail)
+        if match and not match.group(2) and match.group(1) not in derived:
+            scans.append(detail)
+    return scans
+
+
+def mysql_full_scans(cursor, statement: str, params: Optional[Iterable] = None) -> List[str]:
+    """Tables du plan MySQL lues en parcours complet (type = ALL)"""
+    cursor.execute(f"EXPLAIN {statement}", tuple(params or ()))
+    columns = [column[0] for column in cursor.description]
+    scans = []
+    for row in cursor.fetchall():
+        row = row if isinstance(row, dict) else dict(zip(columns, row))
+        # <derived2>, <subquery3>... : tables temporaires issues des sous-requêtes
+        if row.get('type') == 'ALL' and not str(row.get('table') or '').startswith('<'):
+            scans.append(f"ALL {row.get('table')} (~{row.get('rows')} lignes)")
+    return scans
+
+
+def print_audit_report(report: List[Dict]):
+    """Affiche le résultat d'un audit : une ligne par requête, détail des parcours complets"""
+    flagged = [entry for entry in report if entry['scans'] and not entry['full_scan_expected']]
+    print(f"🔎 Audit des plans d'exécution : {len(report)} requêtes, {len(flagged)} parcours complet(s) inattendu(s)")
+    for entry in flagged:
+        print(f"   ⚠️  {entry['name']}")
+        for scan in entry['scans']:
+            print(f"       {scan}")
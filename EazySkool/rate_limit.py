@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Rate Limit
+Limitation des tentatives d'authentification : seaux à jetons par IP et par email,
+plafond de vérifications de mot de passe simultanées, réponses 429 avec Retry-After
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+from flask import jsonify
+
+from config import (LOGIN_LIMIT_PER_IP, LOGIN_LIMIT_PER_EMAIL, REGISTER_LIMIT_PER_IP, AUTH_MAX_CONCURRENT,
+                    RATE_LIMIT_REDIS_URL)
+
+try:
+    import redis
+except ImportError:  # redis est optionnel : sans lui, les compteurs restent en mémoire
+    redis = None
+
+# Une limite = (nombre de tentatives, période en secondes) : seau de cette capacité,
+# rempli au rythme de capacité / période jetons par seconde
+Limit = Tuple[int, float]
+
+
+class RateLimited(Exception):
+    """Tentative refusée : le client peut réessayer dans `retry_after` secondes"""
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class MemoryBucketBackend:
+    """
+    Seaux à jetons en mémoire du processus (un serveur, ou des limites par processus).
+    Au-delà de `max_keys` seaux, les moins récemment utilisés sont oubliés : coût constant
+    par tentative, même quand les clés (emails, IP) changent à chaque requête.
+    """
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # clé -> (jetons restants, instant du dernier calcul, rythme de remplissage, capacité),
+        # du moins récemment utilisé au plus récent
+        self._buckets: 'OrderedDict[str, Tuple[float, float, float, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def consume(self, key: str, capacity: float, rate: float) -> float:
+        """Prend un jeton du seau `key` ; 0 si accepté, sinon secondes avant le prochain jeton"""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at, _, _ = self._buckets.get(key, (capacity, now, rate, capacity))
+            tokens = min(capacity, tokens + (now - updated_at) * rate)
+            if tokens >= 1:
+                wait = 0.0
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now, rate, capacity)
+            self._buckets.move_to_end(key)
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+
+# Seau à jetons atomique côté Redis (horloge du serveur Redis, commune à tous les processus)
+_REDIS_CONSUME = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisBucketBackend:
+    """Seaux à jetons partagés par tous les serveurs via Redis (RATE_LIMIT_REDIS_URL)"""
+
+    def __init__(self, url: str, prefix: str = 'eazyskool:ratelimit:'):
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._consume = self._client.register_script(_REDIS_CONSUME)
+
+    def consume(self, key: str, capacity: float, rate: float) -> float:
+        return float(self._consume(keys=[self.prefix + key], args=[capacity, rate]))
+
+
+def default_backend():
+    """Redis si RATE_LIMIT_REDIS_URL est défini (et le module installé), sinon la mémoire du processus"""
+    if RATE_LIMIT_REDIS_URL and redis is not None:
+        return RedisBucketBackend(RATE_LIMIT_REDIS_URL)
+    return MemoryBucketBackend()
+
+
+class AuthGuard:
+    """
+    Admission des requêtes d'authentification, vérifiée avant toute lecture en base ou tout bcrypt :
+    seaux par IP et par email, puis une place parmi `max_concurrent` vérifications simultanées.
+    """
+
+    def __init__(self, backend=None, login_per_ip: Limit = LOGIN_LIMIT_PER_IP,
+                 login_per_email: Limit = LOGIN_LIMIT_PER_EMAIL, register_per_ip: Limit = REGISTER_LIMIT_PER_IP,
+                 max_concurrent: int = AUTH_MAX_CONCURRENT):
+        self.backend = backend if backend is not None else default_backend()
+        self.login_per_ip = login_per_ip
+        self.login_per_email = login_per_email
+        self.register_per_ip = register_per_ip
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+
+    def _consume(self, key: str, limit: Limit, message: str):
+        capacity, period = limit
+        wait = self.backend.consume(key, capacity, capacity / period)
+        if wait > 0:
+            raise RateLimited(message, wait)
+
+    @contextmanager
+    def _slot(self):
+        if not self._slots.acquire(blocking=False):
+            raise RateLimited("Trop de connexions en cours, réessayez dans un instant", 1)
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def login(self, ip: Optional[str], email: str):
+        """Bloc d'une tentative de connexion (RateLimited si refusée)"""
+        self._consume(f"login:ip:{ip}", self.login_per_ip, "Trop de tentatives de connexion, réessayez plus tard")
+        self._consume(f"login:email:{str(email).strip().lower()}", self.login_per_email,
+                      "Trop de tentatives pour ce compte, réessayez plus tard")
+        with self._slot():
+            yield
+
+    @contextmanager
+    def register(self, ip: Optional[str]):
+        """Bloc d'une création de compte (RateLimited si refusée)"""
+        self._consume(f"register:ip:{ip}", self.register_per_ip, "Trop de créations de compte, réessayez plus tard")
+        with self._slot():
+            yield
+
+
+def rate_limited_response(error: RateLimited):
+    """Réponse 429 sans autre calcul, avec le délai conseillé"""
+    response = jsonify({
+        'success': False,
+        'error': str(error)
+    })
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
@@ -18,17 +18,30 @@ let modalMarkers = [];
 // =================================================================================
 
 // Fonction pour faire des appels API
+// Les GET restent des requêtes « simples » (sans Content-Type ni pré-vérification CORS) :
+// le navigateur les revalide lui-même avec If-None-Match et le serveur répond 304 si rien n'a changé.
+// `auth: true` ajoute le jeton d'accès (Authorization: Bearer), rafraîchi une fois s'il a expiré.
 async function apiCall(endpoint, options = {}) {
     try {
+        const { auth, retried, ...fetchOptions } = options;
         const url = `${API_BASE_URL}${endpoint}`;
+        const headers = options.body ? { 'Content-Type': 'application/json' } : {};
+        const tokens = auth ? getTokens() : null;
+        if (tokens) {
+            headers['Authorization'] = `Bearer ${tokens.access_token}`;
+        }
         const response = await fetch(url, {
+            ...fetchOptions,
             headers: {
-                'Content-Type': 'application/json',
+                ...headers,
                 ...options.headers
-            },
-            ...options
+            }
         });
         
+        if (response.status === 401 && tokens && !retried && await refreshTokens()) {
+            return apiCall(endpoint, { ...options, retried: true });
+        }
+        
         if (!response.ok) {
             throw new Error(`HTTP error! status: ${response.status}`);
         }
@@ -68,9 +81,23 @@ async function searchSchoolsFromAPI(query, city, schoolType) {
     }
 }
 
-// Récupère une école par son ID
-async function getSchoolByIdFromAPI(schoolId) {
-    const result = await apiCall(`/schools/${schoolId}`);
+// Récupère une page d'écoles triée par le serveur
+async function searchSchoolsPageFromAPI(query, sort, order, page) {
+    const params = new URLSearchParams({ sort, order, page, per_page: SCHOOLS_PER_PAGE });
+    if (query) params.append('q', query);
+    
+    const result = await apiCall(`/schools/search?${params.toString()}`);
+    if (result.success) {
+        return result;
+    } else {
+        console.error('Erreur lors de la recherche:', result.error);
+        return { data: [], pagination: { total: 0 } };
+    }
+}
+
+// Récupère une école par son ID, avec les relations demandées (images, reviews, events, specializations)
+async function getSchoolByIdFromAPI(schoolId, include = ['images', 'reviews']) {
+    const result = await apiCall(`/schools/${schoolId}?include=${include.join(',')}`);
     if (result.success) {
         return result.data;
     } else {
@@ -79,6 +106,68 @@ async function getSchoolByIdFromAPI(schoolId) {
     }
 }
 
+// Récupère une page d'avis d'une école (curseur `after` = next_cursor de la page précédente)
+async function getSchoolReviewsFromAPI(schoolId, after = null) {
+    const params = after ? `?after=${encodeURIComponent(after)}` : '';
+    const result = await apiCall(`/schools/${schoolId}/reviews${params}`);
+    if (result.success) {
+        return result;
+    } else {
+        console.error('Erreur lors du chargement des avis:', result.error);
+        return { data: [], pagination: { next_cursor: null } };
+    }
+}
+
+// Récupère plusieurs écoles par ID en une requête (favoris, comparaison)
+// Les longues listes passent par POST /schools/batch plutôt que par l'URL
+async function getSchoolsByIdsFromAPI(schoolIds) {
+    const result = schoolIds.length <= 50
+        ? await apiCall(`/schools?ids=${schoolIds.join(',')}`)
+        : await apiCall('/schools/batch', {
+            method: 'POST',
+            body: JSON.stringify({ ids: schoolIds })
+        });
+    if (result.success) {
+        return result.data;
+    } else {
+        console.error('Erreur lors du chargement des écoles:', result.error);
+        return [];
+    }
+}
+
+// Récupère les écoles autour d'un point, de la plus proche à la plus éloignée (distance_km)
+async function getNearbySchoolsFromAPI(lat, lon, radiusKm = 10, limit = 20) {
+    const params = new URLSearchParams({ lat, lon, radius_km: radiusKm, limit });
+    const result = await apiCall(`/schools/nearby?${params}`);
+    if (result.success) {
+        return result.data;
+    } else {
+        console.error('Erreur lors de la recherche à proximité:', result.error);
+        return [];
+    }
+}
+
+// Suggestions à la frappe (écoles, villes, spécialisations), servies par un index en mémoire
+async function getAutocompleteFromAPI(query, limit = 8) {
+    const params = new URLSearchParams({ q: query, limit });
+    const result = await apiCall(`/autocomplete?${params}`);
+    return result.success ? result.data : [];
+}
+
+// Récupère le contenu de la carte pour une fenêtre : groupes d'écoles (count) aux petits zooms,
+// écoles une par une au-delà ; bounds = L.LatLngBounds de Leaflet
+async function getMapSchoolsFromAPI(bounds, zoom) {
+    const bbox = [bounds.getWest(), bounds.getSouth(), bounds.getEast(), bounds.getNorth()]
+        .map((value, i) => Math.max(i % 2 ? -90 : -180, Math.min(i % 2 ? 90 : 180, value)).toFixed(5));
+    const result = await apiCall(`/schools/map?bbox=${bbox.join(',')}&zoom=${zoom}`);
+    if (result.success) {
+        return result;
+    } else {
+        console.error('Erreur lors du chargement de la carte:', result.error);
+        return { data: [], clustered: false };
+    }
+}
+
 // Récupère les villes depuis l'API
 async function loadCitiesFromAPI() {
     const result = await apiCall('/cities');
@@ -112,7 +201,7 @@ async function loadEventsFromAPI() {
     }
 }
 
-// Authentification utilisateur
+// Authentification utilisateur : conserve les jetons signés renvoyés par le serveur
 async function loginUser(email, password) {
     const result = await apiCall('/auth/login', {
         method: 'POST',
@@ -120,7 +209,8 @@ async function loginUser(email, password) {
     });
     
     if (result.success) {
-        return result.data;
+        setTokens(result.tokens);
+        return result.data || result.user;
     } else {
         throw new Error(result.error || 'Erreur de connexion');
     }
@@ -140,12 +230,25 @@ async function registerUser(userData) {
     }
 }
 
-// Gestion des favoris via l'API
-async function getUserFavorites(userId) {
-    const result = await apiCall('/favorites', {
+// Nouveaux jetons à partir du jeton de rafraîchissement ; déconnecte l'utilisateur s'il est refusé
+async function refreshTokens() {
+    const tokens = getTokens();
+    if (!tokens) return false;
+    const result = await apiCall('/auth/refresh', {
         method: 'POST',
-        body: JSON.stringify({ user_id: userId })
+        body: JSON.stringify({ refresh_token: tokens.refresh_token })
     });
+    if (result.success) {
+        setTokens(result.tokens);
+        return true;
+    }
+    logout();
+    return false;
+}
+
+// Gestion des favoris via l'API (utilisateur désigné par le jeton d'accès)
+async function getUserFavorites() {
+    const result = await apiCall('/favorites', { auth: true });
     
     if (result.success) {
         return result.data;
@@ -155,31 +258,50 @@ async function getUserFavorites(userId) {
     }
 }
 
-async function addFavorite(userId, schoolId) {
+async function addFavorite(schoolId) {
     const result = await apiCall('/favorites', {
         method: 'POST',
-        body: JSON.stringify({ user_id: userId, school_id: schoolId })
+        auth: true,
+        body: JSON.stringify({ school_id: schoolId })
     });
     
     return result.success;
 }
 
-async function removeFavorite(userId, schoolId) {
+async function removeFavorite(schoolId) {
     const result = await apiCall('/favorites', {
         method: 'DELETE',
-        body: JSON.stringify({ user_id: userId, school_id: schoolId })
+        auth: true,
+        body: JSON.stringify({ school_id: schoolId })
     });
     
     return result.success;
 }
 
+// Fusionne les favoris locaux avec ceux du serveur en un seul appel (connexion, nouvel appareil)
+async function syncFavorites() {
+    const result = await apiCall('/favorites/sync', {
+        method: 'PUT',
+        auth: true,
+        body: JSON.stringify({ ids: getFavs(), version: getFavsVersion() })
+    });
+    
+    if (result.success) {
+        setFavs(result.data);
+        setFavsVersion(result.version);
+    } else {
+        console.error('Erreur lors de la synchronisation des favoris:', result.error);
+    }
+    return result.success;
+}
+
 // Ajout d'un avis
-async function addReview(schoolId, userId, rating, comment) {
+async function addReview(schoolId, rating, comment) {
     const result = await apiCall('/reviews', {
         method: 'POST',
+        auth: true,
         body: JSON.stringify({
             school_id: schoolId,
-            user_id: userId,
             rating: rating,
             comment: comment
         })
@@ -203,12 +325,29 @@ function setCurrentUser(user) {
         localStorage.removeItem('eazyskool_current_user');
     }
 }
-function logout() { setCurrentUser(null); }
+function getTokens() { return JSON.parse(localStorage.getItem('eazyskool_tokens') || 'null'); }
+function setTokens(tokens) {
+    if (tokens) {
+        localStorage.setItem('eazyskool_tokens', JSON.stringify(tokens));
+    } else {
+        localStorage.removeItem('eazyskool_tokens');
+    }
+}
+function logout() { setCurrentUser(null); setTokens(null); setFavs([]); setFavsVersion(null); }
 
 // --- Helpers pour les Favoris ---
 function getFavs() { return JSON.parse(localStorage.getItem('eazyskool_favs') || '[]'); }
 function setFavs(favs) { localStorage.setItem('eazyskool_favs', JSON.stringify(favs)); }
 function isFav(id) { return getFavs().includes(id); }
+// Version des favoris lors de la dernière synchronisation (null : inconnue, le serveur fusionne sans rien retirer)
+function getFavsVersion() { return JSON.parse(localStorage.getItem('eazyskool_favs_version') || 'null'); }
+function setFavsVersion(version) {
+    if (version !== null) {
+        localStorage.setItem('eazyskool_favs_version', JSON.stringify(version));
+    } else {
+        localStorage.removeItem('eazyskool_favs_version');
+    }
+}
 
 // --- Helpers pour les Images ---
 function getEcoleImages(ecole) {
@@ -297,11 +436,8 @@ async function renderSchoolsListTo(list, container) {
         return;
     }
     
-    const startIndex = (currentPage - 1) * SCHOOLS_PER_PAGE;
-    const endIndex = startIndex + SCHOOLS_PER_PAGE;
-    const schoolsToShow = list.slice(startIndex, endIndex);
-    
-    schoolsToShow.forEach(ecole => {
+    // La liste reçue est déjà la page courante, triée par le serveur
+    list.forEach(ecole => {
         const images = getEcoleImages(ecole);
         const isFavorite = isFav(ecole.id);
         
@@ -336,8 +472,26 @@ async function renderSchoolsListTo(list, container) {
         container.appendChild(schoolCard);
     });
     
-    // Pagination
-    renderPagination(list.length);
+}
+
+function renderPagination(totalCount) {
+    const container = document.getElementById('pagination-container');
+    if (!container) return;
+    
+    const totalPages = Math.ceil(totalCount / SCHOOLS_PER_PAGE);
+    container.innerHTML = '';
+    if (totalPages <= 1) return;
+    
+    for (let page = 1; page <= totalPages; page++) {
+        const button = document.createElement('button');
+        button.className = `btn ${page === currentPage ? 'btn-primary' : 'btn-secondary'}`;
+        button.textContent = page;
+        button.addEventListener('click', () => {
+            currentPage = page;
+            loadSchoolsPage();
+        });
+        container.appendChild(button);
+    }
 }
 
 async function renderFavoritesList() {
@@ -349,8 +503,7 @@ async function renderFavoritesList() {
         return;
     }
     
-    const user = JSON.parse(currentUser);
-    const favorites = await getUserFavorites(user.id);
+    const favorites = await getUserFavorites();
     
     if (favorites.length === 0) {
         container.innerHTML = '<div class="empty-state"><i class="fa-solid fa-star"></i><h3>Aucun favori</h3><p>Vous n\'avez pas encore d\'écoles favorites.</p></div>';
@@ -388,7 +541,8 @@ async function renderFavoritesList() {
 // =================================================================================
 
 async function openSchoolModal(schoolId) {
-    const school = await getSchoolByIdFromAPI(schoolId);
+    // Une seule requête : école, avis et spécialités lus ensemble par le serveur
+    const school = await getSchoolByIdFromAPI(schoolId, ['reviews', 'specializations']);
     if (!school) {
         showToast('Erreur lors du chargement de l\'école', 'error');
         return;
@@ -424,7 +578,7 @@ async function openSchoolModal(schoolId) {
         ${school.specializations.length > 0 ? `
             <h4>Spécialités</h4>
             <div class="specializations">
-                ${school.specializations.map(spec => `<span class="specialization-tag">${spec}</span>`).join('')}
+                ${school.specializations.map(spec => `<span class="specialization-tag" title="${spec.description || ''}">${spec.name}</span>`).join('')}
             </div>
         ` : ''}
     `;
@@ -447,24 +601,12 @@ async function openSchoolModal(schoolId) {
         </button>
     `;
     
-    // Affiche les avis
+    // Affiche le résumé et la première page des avis (les suivantes à la demande)
     const reviewsContainer = modalContent.querySelector('#reviews-list');
     if (school.reviews && school.reviews.length > 0) {
-        school.reviews.forEach(review => {
-            const reviewElement = document.createElement('div');
-            reviewElement.className = 'review-item';
-            reviewElement.innerHTML = `
-                <div class="review-header">
-                    <div class="review-author">${review.user_name}</div>
-                    <div class="review-rating">
-                        ${'★'.repeat(review.rating)}${'☆'.repeat(5 - review.rating)}
-                    </div>
-                </div>
-                <div class="review-comment">${review.comment}</div>
-                <div class="review-date">${new Date(review.created_at).toLocaleDateString()}</div>
-            `;
-            reviewsContainer.appendChild(reviewElement);
-        });
+        renderReviewsSummary(reviewsContainer, school.reviews_summary);
+        appendReviews(reviewsContainer, school.reviews);
+        renderMoreReviewsButton(reviewsContainer, school.id, school.reviews_next_cursor);
     } else {
         reviewsContainer.innerHTML = '<p>Aucun avis pour le moment.</p>';
     }
@@ -476,31 +618,85 @@ async function openSchoolModal(schoolId) {
     openModal(modal);
 }
 
+function renderReviewsSummary(container, summary) {
+    if (!summary || summary.count === 0) return;
+    const summaryElement = document.createElement('div');
+    summaryElement.className = 'reviews-summary';
+    summaryElement.innerHTML = `
+        <div class="reviews-summary-average">${summary.average.toFixed(1)} / 5 (${summary.count} avis)</div>
+        ${[5, 4, 3, 2, 1].map(stars => `
+            <div class="reviews-summary-row">
+                <span>${stars} ★</span>
+                <div class="reviews-summary-bar"><div style="width: ${summary.written_count ? 100 * summary.histogram[stars] / summary.written_count : 0}%"></div></div>
+                <span>${summary.histogram[stars]}</span>
+            </div>
+        `).join('')}
+        <div class="reviews-summary-note">Répartition des ${summary.written_count} avis écrits</div>
+    `;
+    container.appendChild(summaryElement);
+}
+
+function appendReviews(container, reviews) {
+    reviews.forEach(review => {
+        const reviewElement = document.createElement('div');
+        reviewElement.className = 'review-item';
+        reviewElement.innerHTML = `
+            <div class="review-header">
+                <div class="review-author">${review.user_name}</div>
+                <div class="review-rating">
+                    ${'★'.repeat(review.rating)}${'☆'.repeat(5 - review.rating)}
+                </div>
+            </div>
+            <div class="review-comment">${review.comment}</div>
+            <div class="review-date">${new Date(review.created_at).toLocaleDateString()}</div>
+        `;
+        container.appendChild(reviewElement);
+    });
+}
+
+function renderMoreReviewsButton(container, schoolId, nextCursor) {
+    if (!nextCursor) return;
+    const button = document.createElement('button');
+    button.className = 'btn btn-secondary reviews-more-btn';
+    button.textContent = 'Voir plus d\'avis';
+    button.addEventListener('click', async () => {
+        button.disabled = true;
+        const page = await getSchoolReviewsFromAPI(schoolId, nextCursor);
+        button.remove();
+        appendReviews(container, page.data);
+        renderMoreReviewsButton(container, schoolId, page.pagination.next_cursor);
+    });
+    container.appendChild(button);
+}
+
 // =================================================================================
 // --- FONCTIONS DE FILTRAGE ET RECHERCHE ---
 // =================================================================================
 
-async function applyFiltersAndSort() {
-    const searchInput = document.getElementById('school-search-input');
-    const sortSelect = document.getElementById('sort-by');
-    
-    const query = searchInput.value.trim();
-    const sortBy = sortSelect.value;
-    
-    // Récupère les écoles depuis l'API
-    ecoleData = await searchSchoolsFromAPI(query);
+// Correspondance entre le menu de tri et les paramètres sort/order de l'API
+const SORT_OPTIONS = {
+    'avis-desc': { sort: 'rating', order: 'desc' },
+    'nom-asc': { sort: 'name', order: 'asc' },
+    'nom-desc': { sort: 'name', order: 'desc' }
+};
+
+async function loadSchoolsPage() {
+    const query = document.getElementById('school-search-input').value.trim();
+    const { sort, order } = SORT_OPTIONS[document.getElementById('sort-by').value] || SORT_OPTIONS['avis-desc'];
     
-    // Applique le tri
-    if (sortBy === 'avis-desc') {
-        ecoleData.sort((a, b) => b.average_rating - a.average_rating);
-    } else if (sortBy === 'nom-asc') {
-        ecoleData.sort((a, b) => a.name.localeCompare(b.name));
-    } else if (sortBy === 'nom-desc') {
-        ecoleData.sort((a, b) => b.name.localeCompare(a.name));
+    // Le tri et la pagination sont faits par le serveur : seule la page affichée est transférée
+    const result = await searchSchoolsPageFromAPI(query, sort, order, currentPage);
+    ecoleData = result.data;
+    renderSchoolsListTo(ecoleData, document.getElementById('schools-list'));
+    renderPagination(result.pagination.total);
+    if (result.fuzzy && result.pagination.total) {
+        showToast('Aucun résultat exact : écoles aux noms proches affichées', 'info');
     }
-    
+}
+
+async function applyFiltersAndSort() {
     currentPage = 1;
-    renderSchoolsListTo(ecoleData, document.getElementById('schools-list'));
+    await loadSchoolsPage();
 }
 
 async function toggleFavAndRefresh(id) {
@@ -510,19 +706,18 @@ async function toggleFavAndRefresh(id) {
         return;
     }
     
-    const user = JSON.parse(currentUser);
     const isCurrentlyFav = isFav(id);
     
     let success;
     if (isCurrentlyFav) {
-        success = await removeFavorite(user.id, id);
+        success = await removeFavorite(id);
         if (success) {
             const favs = getFavs().filter(favId => favId !== id);
             setFavs(favs);
             showToast('École retirée des favoris', 'success');
         }
     } else {
-        success = await addFavorite(user.id, id);
+        success = await addFavorite(id);
         if (success) {
             const favs = [...getFavs(), id];
             setFavs(favs);
@@ -531,12 +726,81 @@ async function toggleFavAndRefresh(id) {
     }
     
     if (success) {
+        // Un autre appareil a pu modifier les favoris entre-temps : la prochaine synchronisation fusionnera
+        setFavsVersion(null);
         // Rafraîchit l'affichage
         applyFiltersAndSort();
         renderFavoritesList();
     }
 }
 
+// =================================================================================
+// --- CARTE ---
+// =================================================================================
+
+// Vue initiale de la grande carte (Grand Est)
+const MAP_DEFAULT_CENTER = [48.7, 6.2];
+const MAP_DEFAULT_ZOOM = 7;
+let modalMapRequest = 0;
+
+function openMapModal() {
+    openModal(document.getElementById('map-modal'));
+    // La carte est mesurée une fois la modale affichée
+    setTimeout(() => {
+        if (!modalMap) {
+            initModalMap();
+        } else {
+            modalMap.invalidateSize();
+            updateModalMapMarkers();
+        }
+    }, 10);
+}
+
+function initModalMap() {
+    const modalMapDiv = document.getElementById('modal-map');
+    if (!modalMapDiv) return;
+    modalMap = L.map(modalMapDiv, { zoomControl: true }).setView(MAP_DEFAULT_CENTER, MAP_DEFAULT_ZOOM);
+    L.tileLayer('https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png', {
+        maxZoom: 18,
+        minZoom: 5,
+    }).addTo(modalMap);
+    // Seule la fenêtre visible est demandée, à chaque déplacement ou zoom
+    modalMap.on('moveend', updateModalMapMarkers);
+    updateModalMapMarkers();
+}
+
+async function updateModalMapMarkers() {
+    if (!modalMap) return;
+    const request = ++modalMapRequest;
+    const zoom = modalMap.getZoom();
+    const result = await getMapSchoolsFromAPI(modalMap.getBounds(), zoom);
+    // Une réponse arrivée après celle d'un déplacement plus récent est ignorée
+    if (request !== modalMapRequest) return;
+    
+    modalMarkers.forEach(marker => modalMap.removeLayer(marker));
+    modalMarkers = result.data.map(item => {
+        const position = [item.latitude, item.longitude];
+        if (item.count > 1) {
+            const marker = L.circleMarker(position, {
+                radius: Math.min(30, 10 + 4 * Math.log2(item.count)),
+                weight: 2,
+                fillOpacity: 0.6
+            });
+            marker.bindTooltip(`${item.count}`, { permanent: true, direction: 'center' });
+            marker.on('click', () => modalMap.setView(position, Math.min(zoom + 2, modalMap.getMaxZoom())));
+            return marker.addTo(modalMap);
+        }
+        const marker = L.marker(position);
+        marker.bindTooltip(item.name);
+        marker.on('click', () => openSchoolModal(item.id));
+        return marker.addTo(modalMap);
+    });
+    
+    if (result.truncated) {
+        showToast('Zoomez pour afficher toutes les écoles de la zone', 'info');
+    }
+}
+
 // =================================================================================
 // --- INITIALISATION ---
 // =================================================================================
@@ -544,10 +808,12 @@ async function toggleFavAndRefresh(id) {
 async function initializeApp() {
     console.log('Initialisation de EazySkool avec API...');
     
-    // Charge les données depuis l'API
-    ecoleData = await loadSchoolsFromAPI();
+    // Favoris à jour avant le premier affichage (un appel, quel que soit leur nombre)
+    if (getCurrentUser()) {
+        await syncFavorites();
+    }
     
-    // Initialise l'affichage
+    // Initialise l'affichage (première page chargée depuis l'API)
     applyFiltersAndSort();
     updateUserInfo();
     
@@ -590,6 +856,37 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Suggestions de recherche à la frappe (liste proposée par le navigateur)
+    const searchInput = document.getElementById('school-search-input');
+    if (searchInput) {
+        const suggestions = document.createElement('datalist');
+        suggestions.id = 'school-search-suggestions';
+        searchInput.after(suggestions);
+        searchInput.setAttribute('list', suggestions.id);
+        let suggestTimer = null;
+        let suggestRequest = 0;
+        searchInput.addEventListener('input', function() {
+            clearTimeout(suggestTimer);
+            const query = this.value.trim();
+            if (query.length < 2) {
+                suggestions.innerHTML = '';
+                return;
+            }
+            suggestTimer = setTimeout(async () => {
+                const request = ++suggestRequest;
+                const items = await getAutocompleteFromAPI(query);
+                // Réponse d'une frappe précédente : ignorée
+                if (request !== suggestRequest) return;
+                suggestions.innerHTML = '';
+                items.forEach(item => {
+                    const option = document.createElement('option');
+                    option.value = item.label;
+                    suggestions.appendChild(option);
+                });
+            }, 150);
+        });
+    }
+    
     // Gestionnaire de tri
     const sortSelect = document.getElementById('sort-by');
     if (sortSelect) {
@@ -632,6 +929,8 @@ document.addEventListener('DOMContentLoaded', function() {
             try {
                 const user = await loginUser(email, password);
                 setCurrentUser(user);
+                await syncFavorites();
+                applyFiltersAndSort();
                 updateUserInfo();
                 closeModal(document.getElementById('modal-login'));
                 showToast('Connexion réussie !', 'success');
@@ -659,6 +958,12 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
     
+    // Grande carte des écoles
+    const openBigMapBtn = document.getElementById('open-big-map');
+    if (openBigMapBtn) {
+        openBigMapBtn.addEventListener('click', openMapModal);
+    }
+    
     // Gestionnaires des boutons d'ouverture de modales
     const openLoginBtn = document.getElementById('open-login-btn-account');
     if (openLoginBtn) {
@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+"""
+EazySkool Search
+Découpage des recherches en termes et construction des requêtes plein texte (FTS5 / FULLTEXT)
+"""
+
+import re
+import unicodedata
+from typing import List, Optional
+
+# Un terme = une suite de lettres/chiffres (les apostrophes et tirets séparent : « l'école » -> l, école)
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Termes plus courts ignorés : élisions françaises (l', d') et lettres isolées
+FTS5_MIN_TERM_SIZE = 2
+
+# Longueur minimale d'un mot indexé par InnoDB (innodb_ft_min_token_size)
+MYSQL_FT_MIN_TOKEN_SIZE = 3
+
+
+def search_terms(query: Optional[str]) -> List[str]:
+    """Découpe une recherche utilisateur en termes (sans opérateurs ni guillemets)"""
+    return _TERM_PATTERN.findall(query or '')
+
+
+def fold_text(text: Optional[str]) -> str:
+    """
+    Forme de comparaison d'un texte : sans accents ni majuscules, termes séparés par une espace
+    (« Université d'Économie » -> « universite d economie »)
+    """
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    stripped = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(search_terms(stripped.casefold()))
+
+
+def fts5_match_expression(query: Optional[str]) -> Optional[str]:
+    """
+    Expression MATCH FTS5 : chaque terme est recherché comme préfixe et tous sont requis
+    (« ecole ing » -> "ecole"* "ing"*). None si la recherche ne contient aucun terme.
+    """
+    terms = [term for term in search_terms(query) if len(term) >= FTS5_MIN_TERM_SIZE]
+    if not terms:
+        return None
+    return ' '.join(f'"{term}"*' for term in terms)
+
+
+def mysql_boolean_expression(query: Optional[str]) -> Optional[str]:
+    """
+    Expression MATCH ... AGAINST (IN BOOLEAN MODE) : +terme* pour chaque terme requis.
+    Les termes trop courts pour l'index InnoDB sont ignorés ; None s'il n'en reste aucun.
+    """
+    terms = [term for term in search_terms(query) if len(term) >= MYSQL_FT_MIN_TOKEN_SIZE]
+    if not terms:
+        return None
+    return ' '.join(f'+{term}*' for term in terms)
@@ -163,6 +163,7 @@ def test_api():
     
     # Test 8: Connexion utilisateur
     print("8. Test de connexion...")
+    access_token = None
     try:
         login_data = {
             "email": "test@example.com",
@@ -177,6 +178,7 @@ def test_api():
                 print("✅ Connexion réussie")
                 print(f"   Utilisateur: {user.get('first_name')} {user.get('last_name')}")
                 print(f"   Email: {user.get('email')}")
+                access_token = data.get('tokens', {}).get('access_token')
             else:
                 print(f"❌ Erreur API: {data.get('error')}")
         else:
@@ -184,6 +186,182 @@ def test_api():
     except Exception as e:
         print(f"❌ Erreur: {e}")
     
+    print()
+
+    # Test 9: Plusieurs écoles par identifiant
+    print("9. Test de récupération par identifiants...")
+    try:
+        response = requests.post(f"{BASE_URL}/api/schools/batch", json={"ids": [1, 2, 3]})
+        if response.status_code == 200:
+            data = response.json()
+            if data.get('success'):
+                print(f"✅ {len(data.get('data', []))} écoles récupérées (ids 1, 2, 3)")
+            else:
+                print(f"❌ Erreur API: {data.get('error')}")
+        else:
+            print(f"❌ Erreur HTTP: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+    
+    print()
+    
+    # Test 10: Avis paginés et résumé des notes
+    print("10. Test des avis d'une école...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/schools/1/reviews?limit=2")
+        if response.status_code == 200:
+            data = response.json()
+            if data.get('success'):
+                summary = data.get('summary', {})
+                print(f"✅ {data.get('count')} avis, note {summary.get('average')} ({summary.get('count')} avis)")
+                print(f"   Page suivante: {data.get('pagination', {}).get('next_cursor')}")
+            else:
+                print(f"❌ Erreur API: {data.get('error')}")
+        else:
+            print(f"❌ Erreur HTTP: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+    
+    print()
+    
+    # Test 11: Écoles proches d'un point
+    print("11. Test des écoles proches de Strasbourg...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/schools/nearby?lat=48.5839&lon=7.7455&radius_km=20")
+        if response.status_code == 200:
+            data = response.json()
+            schools = data.get('data', [])
+            if data.get('success') and schools:
+                print(f"✅ {len(schools)} écoles à moins de 20 km")
+                for school in schools[:3]:
+                    print(f"   - {school['name']} ({school['distance_km']} km)")
+            else:
+                print(f"❌ Aucune école trouvée: {data.get('error')}")
+        else:
+            print(f"❌ Erreur HTTP: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+    
+    print()
+    
+    # Test 12: Carte (groupes d'écoles aux petites échelles)
+    print("12. Test de la carte du Grand Est...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/schools/map?bbox=3.5,47.5,8.5,49.6&zoom=6")
+        if response.status_code == 200:
+            data = response.json()
+            points = data.get('data', [])
+            if data.get('success') and points:
+                print(f"✅ {len(points)} points sur la carte (groupés: {data.get('clustered')})")
+            else:
+                print(f"❌ Carte vide: {data.get('error')}")
+        else:
+            print(f"❌ Erreur HTTP: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+    
+    print()
+    
+    # Test 13: Recherche avec comptes par facette
+    print("13. Test des facettes de recherche...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/schools/search?city=Strasbourg&facets=city,type")
+        if response.status_code == 200:
+            data = response.json()
+            if data.get('success') and 'facets' in data:
+                print(f"✅ {data.get('count')} écoles à Strasbourg")
+                for item in data['facets'].get('city', []):
+                    print(f"   - {item['value']}: {item['count']}")
+            else:
+                print(f"❌ Erreur API: {data.get('error')}")
+        else:
+            print(f"❌ Erreur HTTP: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+    
+    print()
+    
+    # Test 14: Recherche tolérante aux fautes de frappe
+    print("14. Test de la recherche approchée...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/schools/search?q=Univeristé de Strasbourg")
+        if response.status_code == 200:
+            data = response.json()
+            schools = data.get('data', [])
+            if data.get('success') and schools:
+                print(f"✅ {len(schools)} écoles trouvées pour 'Univeristé de Strasbourg' (approchée: {data.get('fuzzy')})")
+                print(f"   Meilleure: {schools[0]['name']}")
+            else:
+                print(f"❌ Aucune école trouvée: {data.get('error')}")
+        else:
+            print(f"❌ Erreur HTTP: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+    
+    print()
+    
+    # Test 15: Suggestions à la frappe
+    print("15. Test de l'autocomplétion...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/autocomplete?q=stras&limit=5")
+        if response.status_code == 200:
+            data = response.json()
+            suggestions = data.get('data', [])
+            if data.get('success') and suggestions:
+                print(f"✅ {len(suggestions)} suggestions pour 'stras'")
+                for suggestion in suggestions:
+                    print(f"   - {suggestion['label']} ({suggestion['type']})")
+            else:
+                print(f"❌ Aucune suggestion: {data.get('error')}")
+        else:
+            print(f"❌ Erreur HTTP: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+    
+    print()
+    
+    # Test 16: Calendrier en cache (304 si inchangé)
+    print("16. Test du cache HTTP des événements...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/events?limit=5")
+        etag = response.headers.get('ETag')
+        revalidated = requests.get(f"{BASE_URL}/api/events?limit=5", headers={'If-None-Match': etag})
+        if response.status_code == 200 and revalidated.status_code == 304:
+            print(f"✅ {response.json().get('count')} événements, 304 à la revalidation")
+        else:
+            print(f"❌ Erreur HTTP: {response.status_code} / {revalidated.status_code}")
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+    
+    print()
+    
+    # Test 17: Synchronisation des favoris (jeton du test 8)
+    print("17. Test de synchronisation des favoris...")
+    try:
+        headers = {'Authorization': f"Bearer {access_token}"} if access_token else {}
+        response = requests.put(f"{BASE_URL}/api/favorites/sync", json={"ids": [1, 2], "version": None},
+                                headers=headers)
+        if response.status_code == 200:
+            data = response.json()
+            print(f"✅ Favoris synchronisés: {data.get('data')} (version {data.get('version')})")
+        else:
+            print(f"❌ Erreur HTTP: {response.status_code} {response.json().get('error')}")
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+    
+    print()
+    
+    # Test 18: Invalidation du cache refusée sans le secret partagé
+    print("18. Test de l'invalidation du cache sans secret...")
+    try:
+        response = requests.post(f"{BASE_URL}/api/cache/invalidate", json={"keys": ["cities"]})
+        if response.status_code == 403:
+            print("✅ Invalidation refusée sans secret")
+        else:
+            print(f"❌ Réponse inattendue: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+    
     print()
     print("=== Tests terminés ===")
 
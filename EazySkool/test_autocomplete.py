@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""Tests de l'arbre des préfixes (autocomplete.py) : mises à jour comparées à une reconstruction"""
+
+import random
+
+from autocomplete import Autocompleter, PrefixIndex, _entry
+from search import fold_text
+
+LABELS = ['Université de Strasbourg', 'Sciences Po Strasbourg', 'EM Strasbourg', 'INSA Strasbourg',
+          'Université de Lorraine', 'ICN Business School', 'NEOMA Business School', 'Strasbourg',
+          'Nancy', 'Reims', 'Management', 'Sciences politiques', 'Génie civil', 'École de design']
+
+# Arbre volontairement petit : tops tronqués et recherches plus longues que l'arbre
+OPTIONS = {'top_k': 3, 'max_depth': 5}
+
+
+def queries(entries):
+    """Tous les préfixes de chaque mot des libellés (au-delà de max_depth compris)"""
+    result = set()
+    for entry in entries:
+        words = fold_text(entry.label).split(' ')
+        for i in range(len(words)):
+            suffix = ' '.join(words[i:])
+            result.update(suffix[:n] for n in range(1, len(suffix) + 1))
+    return sorted(result)
+
+
+def assert_same(index, entries):
+    rebuilt = PrefixIndex.build(entries, **OPTIONS)
+    assert index.entries == rebuilt.entries
+    for query in queries(entries) + ['zz', 'strasbourg x']:
+        for limit in (1, 3):
+            assert index.search(query, limit) == rebuilt.search(query, limit), (query, limit)
+
+
+def test_search_prefix_of_any_word_ranked_by_score():
+    entries = [_entry(('school', i, label, 5 - i % 5)) for i, label in enumerate(LABELS)]
+    index = PrefixIndex.build(entries, **OPTIONS)
+    # Notes 5, 4, 3 et 3 : à note égale, ordre des libellés
+    assert [entry.label for entry in index.search('stras', 3)] == [
+        'Université de Strasbourg', 'Sciences Po Strasbourg', 'EM Strasbourg'
+    ]
+    assert [entry.label for entry in index.search('ECOLE', 3)] == ['École de design']
+    assert index.search('', 3) == []
+    # Recherche plus longue que l'arbre : filtrée sur les suffixes complets
+    assert [entry.label for entry in index.search('business school', 3)] == [
+        'ICN Business School', 'NEOMA Business School'
+    ]
+
+
+def test_remove_and_readd_matches_rebuild():
+    entries = {('school', i): _entry(('school', i, label, (i * 7) % 5)) for i, label in enumerate(LABELS)}
+    index = PrefixIndex.build(entries.values(), **OPTIONS)
+
+    for key in [('school', 0), ('school', 3), ('school', 7)]:
+        index.remove(key)
+        del entries[key]
+        assert_same(index, entries.values())
+
+    # Ré-ajout avec une autre note, puis renommage
+    for entry in [_entry(('school', 0, LABELS[0], 5)), _entry(('school', 3, LABELS[3], 0)),
+                  _entry(('school', 7, 'Strasbourg Centre', 4.5))]:
+        index.add(entry)
+        entries[(entry.kind, entry.id)] = entry
+        assert_same(index, entries.values())
+
+
+def test_random_updates_match_rebuild():
+    rng = random.Random(42)
+    entries = {}
+    index = PrefixIndex.build([], **OPTIONS)
+    for _ in range(300):
+        key = (rng.choice(['school', 'city']), rng.randrange(12))
+        if key in entries and rng.random() < 0.4:
+            index.remove(key)
+            del entries[key]
+        else:
+            entry = _entry((key[0], key[1], rng.choice(LABELS), rng.choice([0, 2.5, 3, 4.25, 5])))
+            index.add(entry)
+            entries[key] = entry
+    assert_same(index, entries.values())
+    # Arbre élagué : tout retirer laisse la racine vide
+    for key in list(entries):
+        index.remove(key)
+    assert index.root.children == {} and index.root.top == []
+
+
+def test_autocompleter_refresh_applies_diff():
+    rows = [('school', 1, 'EM Strasbourg', 4.3), ('city', 1, 'Strasbourg', None)]
+    autocompleter = Autocompleter(lambda: rows)
+    assert [item['label'] for item in autocompleter.suggest('stras', 5)] == ['EM Strasbourg', 'Strasbourg']
+
+    rows = [('school', 1, 'EM Strasbourg Business School', 4.3), ('school', 2, 'INSA Strasbourg', 4.4)]
+    autocompleter.refresh()
+    assert [item['label'] for item in autocompleter.suggest('stras', 5)] == [
+        'INSA Strasbourg', 'EM Strasbourg Business School'
+    ]
+    assert autocompleter.suggest('business', 5)[0]['id'] == 1
@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+"""Tests des lecteurs en flux et du chargement par lots de bulk_import.py (sans serveur MySQL)"""
+
+import io
+import json
+from decimal import Decimal
+
+import pytest
+
+from bulk_import import BulkImporter, SQLValuesError, _json_values, parse_insert_values, read_json, read_sql
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+
+    def execute(self, query, params=None):
+        self.connection.statements.append(query)
+
+    def executemany(self, query, rows):
+        self.connection.inserts.append((query, list(rows)))
+
+    def fetchall(self):
+        # information_schema.COLUMNS : colonnes de la table, dans l'ordre
+        return [(column,) for column in self.connection.columns]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, columns):
+        self.columns = columns
+        self.statements = []
+        self.inserts = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+
+def operations(ops):
+    return [(op[0], op[1], op[2], list(op[3])) if op[0] == 'rows' else op for op in ops]
+
+
+def test_parse_insert_values():
+    rows = list(parse_insert_values("(1, 'l''école\\n', NULL, -2.5), (2, '', TRUE)"))
+    assert rows == [(1, "l'école\n", None, Decimal('-2.5')), (2, '', 1)]
+
+    for values in ("(1, NOW())", "(1, 2", "(1 2)"):
+        with pytest.raises(SQLValuesError):
+            list(parse_insert_values(values))
+
+
+def test_read_sql(tmp_path):
+    path = tmp_path / 'dump.sql'
+    path.write_text(
+        "-- commentaire ; ignoré\n"
+        "CREATE TABLE cities (id INT, name VARCHAR(50));\n"
+        "INSERT INTO cities (id, name) VALUES (1, 'Metz'),\n(2, 'Nancy; centre');\n"
+        "INSERT INTO `events` VALUES (1, 'a');\n"
+        "INSERT INTO logs (created_at) VALUES (NOW());\n",
+        encoding='utf-8'
+    )
+    ops = operations(read_sql(str(path)))
+    assert ops[0] == ('sql', 'CREATE TABLE cities (id INT, name VARCHAR(50))')
+    assert ops[1] == ('rows', 'cities', ['id', 'name'], [(1, 'Metz'), (2, 'Nancy; centre')])
+    # Sans liste de colonnes : toutes les colonnes de la table
+    assert ops[2] == ('rows', 'events', (), [(1, 'a')])
+    # Liste VALUES non reconnue : exécutée telle quelle
+    assert ops[3] == ('sql', 'INSERT INTO logs (created_at) VALUES (NOW())')
+
+
+def test_json_values_small_chunks():
+    text = '{"schools": [{"id": 1, "name": "' + 'x' * 20 + '"}, {"id": 22222}], "cities": [], "events": [3.5]}'
+    values = list(_json_values(io.StringIO(text), chunk_size=3))
+    assert values == [('schools', {'id': 1, 'name': 'x' * 20}), ('schools', {'id': 22222}), ('events', 3.5)]
+
+
+def test_read_json_tables_and_ndjson(tmp_path):
+    path = tmp_path / 'data.json'
+    path.write_text(json.dumps({'schools': [{'id': 1}, {'id': 2}], 'empty': [], 'cities': [{'name': 'Metz'}]}),
+                    encoding='utf-8')
+    assert operations(read_json(str(path))) == [
+        ('rows', 'schools', None, [{'id': 1}, {'id': 2}]),
+        ('rows', 'cities', None, [{'name': 'Metz'}])
+    ]
+
+    # Opération non consommée (reprise) : le lecteur passe au tableau suivant
+    ops = read_json(str(path))
+    next(ops)
+    assert next(ops)[1] == 'cities'
+
+    ndjson = tmp_path / 'events.ndjson'
+    ndjson.write_text('{"id": 1}\n\n{"id": 2, "title": "JPO"}\n', encoding='utf-8')
+    assert operations(read_json(str(ndjson), 'events')) == [
+        ('rows', 'events', None, [{'id': 1}, {'id': 2, 'title': 'JPO'}])
+    ]
+
+
+def test_dict_rows_use_each_row_keys():
+    connection = FakeConnection(['id', 'name', 'region', 'created_at'])
+    importer = BulkImporter(connection, batch_size=10, index_min_rows=None)
+    rows = [
+        {'id': 1, 'name': 'Metz'},
+        {'id': 2, 'name': 'Nancy'},
+        # Clés absentes de la première ligne : insérées, pas perdues
+        {'id': 3, 'name': 'Reims', 'region': 'Grand Est'},
+        # Champ joint d'un export : ignoré
+        {'id': 4, 'name': 'Troyes', 'city_name': 'Troyes'}
+    ]
+    importer.run([('rows', 'cities', None, iter(rows))], 'data.json')
+
+    assert connection.inserts == [
+        ("INSERT INTO `cities` (`id`, `name`) VALUES (%s, %s)", [(1, 'Metz'), (2, 'Nancy')]),
+        ("INSERT INTO `cities` (`id`, `name`, `region`) VALUES (%s, %s, %s)", [(3, 'Reims', 'Grand Est')]),
+        ("INSERT INTO `cities` (`id`, `name`) VALUES (%s, %s)", [(4, 'Troyes')])
+    ]
+    assert importer.rows_loaded == 4
+
+
+def test_dict_rows_without_table_column():
+    importer = BulkImporter(FakeConnection(['id', 'name']), index_min_rows=None)
+    with pytest.raises(ValueError):
+        importer.run([('rows', 'cities', None, iter([{'city_name': 'Metz'}]))], 'data.json')
@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""Tests des comptes de facettes (facets.py) : sémantique disjonctive comparée à un calcul naïf"""
+
+from itertools import product
+
+from facets import FACETS, FacetIndex, ids_bitmap
+
+SCHOOLS = {
+    1: {'city': 'Strasbourg', 'type': 'Université', 'region': 'Grand Est', 'specialization': ['Droit', 'Sciences']},
+    2: {'city': 'Strasbourg', 'type': 'IEP', 'region': 'Grand Est', 'specialization': ['Sciences']},
+    3: {'city': 'Nancy', 'type': 'Université', 'region': 'Grand Est', 'specialization': ['Sciences']},
+    4: {'city': 'Nancy', 'type': 'Commerce', 'region': 'Grand Est', 'specialization': ['Management']},
+    5: {'city': 'Lille', 'type': 'Commerce', 'region': 'Hauts-de-France', 'specialization': ['Management', 'Droit']},
+    6: {'city': 'Lille', 'type': 'Université', 'region': 'Hauts-de-France', 'specialization': []},
+    # École sans ville connue : comptée dans les autres facettes
+    7: {'city': None, 'type': 'IEP', 'region': None, 'specialization': ['Droit']}
+}
+
+
+def rows():
+    for school_id, values in SCHOOLS.items():
+        for facet in FACETS:
+            value = values[facet]
+            for item in (value if isinstance(value, list) else [value]):
+                yield school_id, facet, item
+        if not values['specialization']:
+            yield school_id, 'specialization', None
+
+
+def values_of(school_id, facet):
+    value = SCHOOLS[school_id][facet]
+    return set(value) if isinstance(value, list) else {value} - {None}
+
+
+def naive_counts(filters, hits=None):
+    """Comptes d'une facette : écoles respectant les filtres des autres facettes seulement"""
+    result = {}
+    for facet in FACETS:
+        counts = {}
+        for school_id in SCHOOLS:
+            if hits is not None and school_id not in hits:
+                continue
+            if any(values and not values_of(school_id, other) & set(values)
+                   for other, values in filters.items() if other != facet):
+                continue
+            for value in values_of(school_id, facet):
+                counts[value] = counts.get(value, 0) + 1
+        for value in filters.get(facet) or ():
+            counts.setdefault(value, 0)
+        result[facet] = sorted(
+            ({'value': value, 'count': count, 'selected': value in (filters.get(facet) or ())}
+             for value, count in counts.items()),
+            key=lambda item: (-item['count'], item['value'])
+        )
+    return result
+
+
+def test_ids_bitmap():
+    assert ids_bitmap([]) == 0
+    assert ids_bitmap([0, 3, 9, 3]) == (1 << 0) | (1 << 3) | (1 << 9)
+
+
+def test_counts_without_filters():
+    index = FacetIndex(rows())
+    counts = index.counts({})
+    assert counts == naive_counts({})
+    assert counts['city'][:2] == [{'value': 'Lille', 'count': 2, 'selected': False},
+                                  {'value': 'Nancy', 'count': 2, 'selected': False}]
+
+
+def test_selected_facet_ignores_its_own_filter():
+    index = FacetIndex(rows())
+    counts = index.counts({'city': ['Strasbourg']})
+    # Les autres villes restent proposées avec le nombre d'écoles qu'elles donneraient
+    assert {item['value']: item['count'] for item in counts['city']} == {'Strasbourg': 2, 'Nancy': 2, 'Lille': 2}
+    # Les autres facettes sont restreintes à Strasbourg
+    assert {item['value']: item['count'] for item in counts['type']} == {'Université': 1, 'IEP': 1}
+
+
+def test_values_of_a_facet_are_ored_and_facets_anded():
+    index = FacetIndex(rows())
+    filters = {'city': ['Strasbourg', 'Lille'], 'type': ['Université']}
+    counts = index.counts(filters)
+    assert counts == naive_counts(filters)
+    # Université à Strasbourg ou Lille : écoles 1 et 6
+    assert {item['value']: item['count'] for item in counts['region']} == {'Grand Est': 1, 'Hauts-de-France': 1}
+
+
+def test_selected_value_without_results_is_kept():
+    index = FacetIndex(rows())
+    counts = index.counts({'city': ['Nancy'], 'type': ['IEP'], 'specialization': ['Inconnue']})
+    assert {'value': 'IEP', 'count': 0, 'selected': True} in counts['type']
+    assert {'value': 'Inconnue', 'count': 0, 'selected': True} in counts['specialization']
+    assert counts['region'] == []
+
+
+def test_counts_match_naive_for_all_filter_combinations():
+    index = FacetIndex(rows())
+    choices = {
+        'city': [None, ['Strasbourg'], ['Nancy', 'Lille']],
+        'type': [None, ['Université'], ['IEP', 'Commerce']],
+        'specialization': [None, ['Droit'], ['Sciences', 'Management']]
+    }
+    for hits in (None, {1, 2, 5, 7}):
+        hits_bitmap = None if hits is None else ids_bitmap(hits)
+        for combination in product(*choices.values()):
+            filters = {facet: values for facet, values in zip(choices, combination) if values}
+            assert index.counts(filters, hits_bitmap) == naive_counts(filters, hits), (filters, hits)
+
+
+def test_counts_of_selected_facets_only():
+    index = FacetIndex(rows())
+    counts = index.counts({'type': ['Commerce']}, facets=('city',))
+    assert list(counts) == ['city']
+    assert {item['value']: item['count'] for item in counts['city']} == {'Nancy': 1, 'Lille': 1}
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+"""Tests de l'index de trigrammes (fuzzy.py) : seuils de similarité, filtres et mises à jour"""
+
+import math
+
+from fuzzy import FuzzySearcher, TrigramIndex, trigrams
+
+ROWS = [
+    (1, 'Université de Strasbourg', 'Strasbourg', 'Université', 'Sciences Droit', 4.2),
+    (2, 'Sciences Po Strasbourg', 'Strasbourg', "Institut d'études politiques", 'Sciences politiques', 4.7),
+    (3, 'Université de Lorraine', 'Nancy', 'Université', 'Sciences', 4.0),
+    (4, 'ICN Business School', 'Nancy', 'École de commerce', 'Management', 4.5),
+    (5, 'INSA Strasbourg', 'Strasbourg', "École d'ingénieurs", 'Génie civil', 4.4)
+]
+
+
+def expected(rows, query, min_similarity):
+    """Recherche naïve : part des trigrammes de la recherche présents dans chaque école"""
+    wanted = trigrams(query)
+    required = max(1, math.ceil(min_similarity * len(wanted)))
+    result = {}
+    for row in rows:
+        document = trigrams(' '.join(filter(None, row[1:5])))
+        shared = len(wanted & document)
+        if shared >= required:
+            result[row[0]] = round(shared / len(wanted), 3)
+    return result
+
+
+def test_trigrams_fold_and_pad():
+    assert trigrams('Éc') == {'  e', ' ec', 'ec '}
+    assert trigrams('') == frozenset()
+
+
+def test_search_matches_naive_count_at_each_threshold():
+    index = TrigramIndex.build(ROWS)
+    for query in ('Univeristé de Strasbourg', 'Science Po', 'strasbourg', 'lorrain', 'business'):
+        for min_similarity in (0.1, 0.3, 0.5, 0.7, 0.9, 1.0):
+            results = index.search(query, limit=len(ROWS), min_similarity=min_similarity)
+            assert dict(results) == expected(ROWS, query, min_similarity), (query, min_similarity)
+            # Du plus similaire au moins similaire
+            similarities = [similarity for _, similarity in results]
+            assert similarities == sorted(similarities, reverse=True)
+
+
+def test_search_typo_finds_school():
+    index = TrigramIndex.build(ROWS)
+    results = index.search('Univeristé de Strasbourg')
+    assert results[0][0] == 1
+    assert index.search('Science Po')[0][0] == 2
+    assert index.search('xyzzy') == []
+    assert index.search('') == []
+
+
+def test_search_limit_and_tie_order():
+    index = TrigramIndex.build(ROWS)
+    # À similarité égale : document le plus court, puis le mieux noté
+    results = index.search('strasbourg', limit=2)
+    assert len(results) == 2
+    assert {school_id for school_id, _ in results} <= {1, 2, 5}
+    assert results == index.search('strasbourg', limit=len(ROWS))[:2]
+
+
+def test_search_filters():
+    index = TrigramIndex.build(ROWS)
+    assert [school_id for school_id, _ in index.search('universite', city='Nancy')] == [3]
+    assert {school_id for school_id, _ in index.search('strasbourg', school_type='Université')} == {1}
+    assert index.search('strasbourg', city='Metz') == []
+
+
+def test_add_remove_matches_rebuild():
+    index = TrigramIndex.build(ROWS)
+    index.remove(2)
+    index.add((4, 'ICN Business School Metz', 'Metz', 'École de commerce', 'Management', 4.5))
+    index.add((6, 'EM Strasbourg', 'Strasbourg', 'École de commerce', 'Management', 4.3))
+
+    rows = [ROWS[0], ROWS[2], (4, 'ICN Business School Metz', 'Metz', 'École de commerce', 'Management', 4.5),
+            ROWS[4], (6, 'EM Strasbourg', 'Strasbourg', 'École de commerce', 'Management', 4.3)]
+    rebuilt = TrigramIndex.build(rows)
+    assert index.postings == rebuilt.postings
+    for query in ('strasbourg', 'Science Po', 'business metz', 'commerce'):
+        assert index.search(query, city='Strasbourg') == rebuilt.search(query, city='Strasbourg')
+        assert index.search(query, limit=10, min_similarity=0.3) == rebuilt.search(query, limit=10, min_similarity=0.3)
+
+
+def test_searcher_refresh_applies_changes():
+    rows = list(ROWS)
+    searcher = FuzzySearcher(lambda: rows)
+    assert searcher.search('Science Po')[0][0] == 2
+
+    rows = [row for row in ROWS if row[0] != 2]
+    searcher.refresh()
+    assert 2 not in {school_id for school_id, _ in searcher.search('Science Po')}
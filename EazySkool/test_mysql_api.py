@@ -127,8 +127,41 @@ def test_api():
     except Exception as e:
         print(f"❌ Erreur: {e}")
     
-    # 8. Test inscription utilisateur
-    print("\n8. Test inscription utilisateur...")
+    # 8. Test recherche par proximité (écoles géolocalisées du jeu de données)
+    print("\n8. Test écoles proches de Strasbourg...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/schools/nearby?lat=48.5839&lon=7.7455&radius_km=20")
+        if response.status_code == 200:
+            data = response.json()
+            schools = data.get('data', [])
+            if data.get('success') and schools:
+                print(f"✅ {len(schools)} écoles à moins de 20 km")
+                print(f"   Plus proche: {schools[0].get('name')} ({schools[0].get('distance_km')} km)")
+            else:
+                print(f"❌ Aucune école géolocalisée: {data.get('error')}")
+        else:
+            print(f"❌ Erreur: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+    
+    # 9. Test grille de la carte sur le Grand Est (non vide sur le jeu de données)
+    print("\n9. Test carte du Grand Est...")
+    try:
+        response = requests.get(f"{BASE_URL}/api/schools/map?bbox=3.5,47.5,8.5,49.6&zoom=6")
+        if response.status_code == 200:
+            data = response.json()
+            points = data.get('data', [])
+            if data.get('success') and points:
+                print(f"✅ {len(points)} points sur la carte (groupés: {data.get('clustered')})")
+            else:
+                print(f"❌ Grille de la carte vide: {data.get('error')}")
+        else:
+            print(f"❌ Erreur: {response.status_code}")
+    except Exception as e:
+        print(f"❌ Erreur: {e}")
+    
+    # 10. Test inscription utilisateur
+    print("\n10. Test inscription utilisateur...")
     try:
         user_data = {
             "email": "test@example.com",
@@ -153,8 +186,8 @@ def test_api():
         print(f"❌ Erreur: {e}")
         user_id = None
     
-    # 9. Test connexion utilisateur
-    print("\n9. Test connexion utilisateur...")
+    # 11. Test connexion utilisateur
+    print("\n11. Test connexion utilisateur...")
     try:
         login_data = {
             "email": "test@example.com",